@@ -0,0 +1,10 @@
+'''
+Created on Nov 7, 2012
+
+@package: ally core
+@copyright: 2011 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Special package that is targeted by the application deployment.
+'''
@@ -0,0 +1,76 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Special module that is used in deploying the application.
+'''
+
+from .prepare import OptionsBenchmark
+from ally.container import ioc, aop, context
+from ally.container.impl.config import load
+from functools import partial
+from threading import Thread
+import application
+import logging
+import os
+import sys
+import traceback
+
+# --------------------------------------------------------------------
+
+@ioc.start
+def benchmark():
+    assert isinstance(application.options, OptionsBenchmark), 'Invalid application options %s' % application.options
+    if not application.options.benchmark: return
+    configFile = application.options.configurationPath
+    if os.path.isfile(configFile):
+        with open(configFile, 'r') as f: config = load(f)
+    else: config = {}
+    # The samples are registered and no configured server is started since the socket benchmark has its own server.
+    config.update(benchmark_samples=True, server_type='benchmark')
+    logging.basicConfig(level=logging.WARN)
+
+    try:
+        context.open(aop.modulesIn('__setup__.**'), config=config)
+        try:
+            context.processStart()
+
+            from __setup__.ally_benchmark.service import serverBenchmark
+            from __setup__.ally_core_http.processor import root_uri_resources
+            from __setup__.ally_http.server import assemblyServer
+            from ally.benchmark.runner import ClientInProcess, ClientSocket, measure, report, scenarios
+
+            requests, concurrency = application.options.benchmarkRequests, application.options.benchmarkConcurrency
+            tests = scenarios(root_uri_resources() % '')
+
+            client = ClientInProcess(assemblyServer())
+            report('In process', [measure(lambda: client, scenario, requests) for scenario in tests])
+
+            if isinstance(application.options.benchmark, str):
+                host, _sep, port = application.options.benchmark.rpartition(':')
+                createClient, server = partial(ClientSocket, host or 'localhost', int(port)), None
+            else:
+                server = serverBenchmark()
+                createClient = partial(ClientSocket, *server.server_address[:2])
+                thread = Thread(name='HTTP benchmark server thread', target=server.serve_forever)
+                thread.daemon = True
+                thread.start()
+            try:
+                report('Socket with %s concurrent clients' % concurrency,
+                       [measure(createClient, scenario, requests, concurrency) for scenario in tests])
+            finally:
+                if server:
+                    server.shutdown()
+                    server.server_close()
+        finally: context.deactivate()
+
+    except SystemExit: raise
+    except:
+        print('-' * 150, file=sys.stderr)
+        print('A problem occurred while running the benchmark', file=sys.stderr)
+        traceback.print_exc(file=sys.stderr)
+        print('-' * 150, file=sys.stderr)
@@ -0,0 +1,58 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Special module that is used in preparing the application deploy.
+'''
+
+from ..ally.prepare import OptionsCore, prepareCoreOptions, prepareCoreActions
+from ally.container import ioc
+from argparse import ArgumentParser
+from inspect import isclass
+import application
+
+# --------------------------------------------------------------------
+
+class OptionsBenchmark(OptionsCore):
+    '''
+    The prepared option class.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self._benchmark = False
+        self.benchmarkRequests = 1000
+        self.benchmarkConcurrency = 1
+
+    def setBenchmark(self, value):
+        '''Setter for the benchmark'''
+        self._benchmark = value
+        self._start = self._start and not value
+
+    benchmark = property(lambda self: self._benchmark, setBenchmark)
+
+# --------------------------------------------------------------------
+
+@ioc.after(prepareCoreOptions)
+def prepareBenchmarkOptions():
+    assert isclass(application.Options), 'Invalid options class %s' % application.Options
+    class Options(OptionsBenchmark, application.Options): pass
+    application.Options = Options
+
+@ioc.after(prepareCoreActions)
+def prepareBenchmarkActions():
+    assert isinstance(application.parser, ArgumentParser), 'Invalid parser %s' % application.parser
+    application.parser.add_argument('-benchmark', metavar='address', dest='benchmark', nargs='?', const=True,
+                                    default=False, help='Provide this option in order to run the request pipeline '
+                                    'benchmark and exit, the benchmark sample services are processed in process and over '
+                                    'a socket on a basic server started only for the benchmark, provide an address like '
+                                    '"localhost:8080" in order to run the socket benchmark against a running application '
+                                    'that has the "benchmark_samples" configuration enabled')
+    application.parser.add_argument('--brequests', metavar='count', dest='benchmarkRequests', type=int,
+                                    help='The number of requests executed for each benchmark scenario, by default 1000')
+    application.parser.add_argument('--bconcurrency', metavar='count', dest='benchmarkConcurrency', type=int,
+                                    help='The number of concurrent clients used by the socket benchmark, by default 1')
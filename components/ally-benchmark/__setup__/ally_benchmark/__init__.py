@@ -0,0 +1,19 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Contains setup and configuration files for the request pipeline benchmark.
+'''
+
+from .. import ally_core_http
+
+# --------------------------------------------------------------------
+
+NAME = 'ally benchmark'
+GROUP = ally_core_http.GROUP
+VERSION = '1.0'
+DESCRIPTION = 'Provides the load test and micro benchmark for the request processing pipeline'
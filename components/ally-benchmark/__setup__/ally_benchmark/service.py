@@ -0,0 +1,61 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the benchmark sample services and the server used for the socket benchmark.
+'''
+
+from ..ally_core.resources import services
+from ..ally_http import server_version
+from ..ally_http.server import assemblyServer, serverBasicRequestHandler
+from ally.benchmark.api.article import IArticleTypeService, IArticleService
+from ally.benchmark.impl.article import ArticleTypeService, ArticleService
+from ally.container import ioc
+from ally.http.server import server_basic
+
+# --------------------------------------------------------------------
+
+@ioc.config
+def benchmark_samples() -> bool:
+    '''
+    Flag indicating that the benchmark sample services should be registered, enable this only on the deployment that
+    is the target of a socket benchmark, the "-benchmark" option registers them anyway
+    '''
+    return False
+
+@ioc.config
+def benchmark_articles() -> int:
+    '''The number of articles that the benchmark sample service is populated with'''
+    return 1000
+
+# --------------------------------------------------------------------
+
+@ioc.entity
+def articleTypeService() -> IArticleTypeService: return ArticleTypeService()
+
+@ioc.entity
+def articleService() -> IArticleService:
+    b = ArticleService()
+    b.articles = benchmark_articles()
+    b.articleTypeService = articleTypeService()
+    return b
+
+@ioc.entity
+def serverBenchmark():
+    b = server_basic.BasicServer()
+    b.serverVersion = server_version()
+    b.serverHost = '127.0.0.1'
+    b.serverPort = 0  # Any free port
+    b.requestHandlerFactory = serverBasicRequestHandler()
+    b.assembly = assemblyServer()
+    return b
+
+# --------------------------------------------------------------------
+
+@ioc.before(services)
+def registerSamples():
+    if benchmark_samples(): services().extend((articleTypeService(), articleService()))
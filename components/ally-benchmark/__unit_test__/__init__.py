@@ -0,0 +1,10 @@
+'''
+Created on Jun 1, 2011
+
+@package: ally benchmark
+@copyright: 2011 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Nistor Gabriel
+
+Contains the unit tests.
+'''
@@ -0,0 +1,63 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the benchmark runner.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.benchmark.runner import Scenario, Measure, measure
+import unittest
+
+# --------------------------------------------------------------------
+
+class Client:
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    def request(self, method, uri, headers, body=None):
+        return self.statuses.pop(0), b''
+
+    def close(self): pass
+
+# --------------------------------------------------------------------
+
+class TestRunner(unittest.TestCase):
+
+    def testPercentile(self):
+        result = Measure(Scenario('test', 'GET', 'test'))
+        self.assertEqual(result.percentile(50), 0.0)
+
+        result.latencies.extend(k / 1000 for k in range(100, 0, -1))
+        result.elapsed = 2.0
+        self.assertEqual(result.percentile(50), 0.05)
+        self.assertEqual(result.percentile(99), 0.099)
+        self.assertEqual(result.percentile(100), 0.1)
+        self.assertEqual(result.percentile(0), 0.001)
+        self.assertEqual(result.requestsPerSecond(), 50.0)
+
+    def testMeasure(self):
+        client = Client([200, 200, 200, 404, 200])
+        result = measure(lambda: client, Scenario('test', 'GET', 'test'), 4, warmup=1)
+        self.assertEqual(len(result.latencies), 4)
+        self.assertEqual(result.failures, 1)
+        self.assertFalse(client.statuses)
+
+        result = measure(lambda: Client([200] * 3), Scenario('test', 'GET', 'test'), 5, concurrency=2, warmup=0)
+        self.assertEqual(len(result.latencies), 5)
+        self.assertEqual(result.failures, 0)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,100 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+API specifications for the benchmark sample articles.
+'''
+
+from .domain_benchmark import modelBenchmark
+from ally.api.config import service, call, query
+from ally.api.criteria import AsLikeOrdered
+from ally.api.model import Content
+from ally.api.type import Iter
+from ally.support.api.entity import Entity, QEntity, IEntityService
+
+# --------------------------------------------------------------------
+
+@modelBenchmark
+class ArticleType(Entity):
+    '''
+    Provides the article type model.
+    '''
+    Name = str
+
+@modelBenchmark
+class Article(Entity):
+    '''
+    Provides the article model.
+    '''
+    Name = str
+    Type = ArticleType
+    Body = str
+
+@modelBenchmark
+class Attachment(Entity):
+    '''
+    Provides the article attachment model.
+    '''
+    Article = Article
+    Name = str
+    Size = int
+
+# --------------------------------------------------------------------
+
+@query(ArticleType)
+class QArticleType(QEntity):
+    '''
+    Provides the query article type model.
+    '''
+    name = AsLikeOrdered
+
+@query(Article)
+class QArticle(QEntity):
+    '''
+    Provides the query article model.
+    '''
+    name = AsLikeOrdered
+
+# --------------------------------------------------------------------
+
+@service((Entity, ArticleType), (QEntity, QArticleType))
+class IArticleTypeService(IEntityService):
+    '''
+    Provides services for article types.
+    '''
+
+@service((Entity, Article), (QEntity, QArticle))
+class IArticleService(IEntityService):
+    '''
+    Provides services for articles.
+    '''
+
+    @call
+    def getAttachments(self, articleId:Article.Id, offset:int=None, limit:int=None) -> Iter(Attachment):
+        '''
+        Provides the attachments of the article.
+        
+        @param articleId: integer
+            The article id to provide the attachments for.
+        @param offset: integer
+            The offset to retrieve the attachments from.
+        @param limit: integer
+            The limit of attachments to retrieve.
+        '''
+
+    @call
+    def insertAttachment(self, articleId:Article.Id, content:Content) -> Attachment.Id:
+        '''
+        Uploads an attachment for the article, the attachment content is only measured not stored.
+        
+        @param articleId: integer
+            The article id to upload the attachment for.
+        @param content: Content
+            The attachment content.
+        @return: integer
+            The id assigned to the attachment.
+        '''
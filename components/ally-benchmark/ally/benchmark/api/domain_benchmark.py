@@ -0,0 +1,18 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the decorator to be used by the models in the benchmark domain.
+'''
+
+from ally.api.config import model
+from functools import partial
+
+# --------------------------------------------------------------------
+
+DOMAIN = 'Benchmark/'
+modelBenchmark = partial(model, domain=DOMAIN)
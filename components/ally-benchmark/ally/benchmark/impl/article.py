@@ -0,0 +1,105 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Implementation for the benchmark sample articles.
+'''
+
+from ..api.article import IArticleTypeService, ArticleType, QArticleType, \
+    IArticleService, Article, QArticle, Attachment
+from .entity import EntityServiceMemory
+from ally.api.extension import IterPart
+from ally.api.model import Content
+from ally.container.ioc import injected
+from ally.support.api.util_service import trimIter
+
+# --------------------------------------------------------------------
+
+@injected
+class ArticleTypeService(EntityServiceMemory, IArticleTypeService):
+    '''
+    Implementation for @see: IArticleTypeService
+    '''
+
+    types = 10
+    # The number of article types that the service is populated with.
+
+    def __init__(self):
+        '''
+        Construct the article type service.
+        '''
+        assert isinstance(self.types, int), 'Invalid types count %s' % self.types
+        EntityServiceMemory.__init__(self, ArticleType, QArticleType)
+
+        for k in range(1, self.types + 1):
+            articleType = ArticleType()
+            articleType.Name = 'Type %s' % k
+            self.insert(articleType)
+
+@injected
+class ArticleService(EntityServiceMemory, IArticleService):
+    '''
+    Implementation for @see: IArticleService
+    '''
+
+    articles = 1000
+    # The number of articles that the service is populated with.
+    bodySize = 1024
+    # The size of the articles body.
+    articleTypeService = IArticleTypeService
+    # The article type service used to provide the types for the populated articles.
+
+    def __init__(self):
+        '''
+        Construct the article service.
+        '''
+        assert isinstance(self.articles, int), 'Invalid articles count %s' % self.articles
+        assert isinstance(self.bodySize, int), 'Invalid body size %s' % self.bodySize
+        assert isinstance(self.articleTypeService, IArticleTypeService), \
+        'Invalid article type service %s' % self.articleTypeService
+        EntityServiceMemory.__init__(self, Article, QArticle)
+
+        self._attachments = {}
+        self._lastAttachmentId = 0
+
+        types = [articleType.Id for articleType in self.articleTypeService.getAll()]
+        for k in range(1, self.articles + 1):
+            article = Article()
+            article.Name = 'Article %s' % k
+            if types: article.Type = types[k % len(types)]
+            article.Body = ('Body %s ' % k * self.bodySize)[:self.bodySize]
+            self.insert(article)
+
+    def getAttachments(self, articleId, offset=None, limit=None):
+        '''
+        @see: IArticleService.getAttachments
+        '''
+        self.getById(articleId)
+        attachments = self._attachments.get(articleId, ())
+        return IterPart(trimIter(attachments, len(attachments), offset, limit), len(attachments), offset, limit)
+
+    def insertAttachment(self, articleId, content):
+        '''
+        @see: IArticleService.insertAttachment
+        '''
+        assert isinstance(content, Content), 'Invalid content %s' % content
+        self.getById(articleId)
+
+        size = 0
+        while True:
+            block = content.read(1024 * 64)
+            if not block: break
+            size += len(block)
+
+        self._lastAttachmentId += 1
+        attachment = Attachment()
+        attachment.Id = self._lastAttachmentId
+        attachment.Article = articleId
+        attachment.Name = content.name
+        attachment.Size = size
+        self._attachments.setdefault(articleId, []).append(attachment)
+        return attachment.Id
@@ -0,0 +1,89 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the generic in memory implementation for the entities services, the entities are kept in memory so that the
+benchmarks measure only the request processing pipeline.
+'''
+
+from ally.api.extension import IterPart
+from ally.exception import InputError, Ref
+from ally.internationalization import _
+from ally.support.api.util_service import trimIter, processQuery, copy
+from collections import OrderedDict
+from inspect import isclass
+
+# --------------------------------------------------------------------
+
+class EntityServiceMemory:
+    '''
+    Generic implementation for @see: IEntityService that keeps the entities in memory.
+    '''
+
+    def __init__(self, Entity, QEntity=None):
+        '''
+        Construct the in memory entity service.
+        
+        @param Entity: class
+            The entity model class.
+        @param QEntity: class|None
+            The entity query class.
+        '''
+        assert isclass(Entity), 'Invalid entity class %s' % Entity
+        assert QEntity is None or isclass(QEntity), 'Invalid query class %s' % QEntity
+        self.Entity = Entity
+        self.QEntity = QEntity
+
+        self._entities = OrderedDict()
+        self._lastId = 0
+
+    def getById(self, id):
+        '''
+        @see: IEntityGetService.getById
+        '''
+        entity = self._entities.get(id)
+        if entity is None: raise InputError(Ref(_('Unknown id'), ref=self.Entity.Id))
+        return entity
+
+    def getAll(self, offset=None, limit=None, detailed=False, q=None):
+        '''
+        @see: IEntityQueryService.getAll
+        '''
+        if limit == 0: entities = ()
+        else: entities = self._entities.values()
+        length = len(self._entities)
+        if q:
+            assert isinstance(q, self.QEntity), 'Invalid query %s' % q
+            entities = processQuery(entities, q, self.Entity)
+            length = len(entities)
+
+        entities = trimIter(entities, length, offset, limit)
+        if detailed: return IterPart(entities, length, offset, limit)
+        return entities
+
+    def insert(self, entity):
+        '''
+        @see: IEntityCRUDService.insert
+        '''
+        assert isinstance(entity, self.Entity), 'Invalid entity %s' % entity
+        self._lastId += 1
+        entity.Id = self._lastId
+        self._entities[entity.Id] = entity
+        return entity.Id
+
+    def update(self, entity):
+        '''
+        @see: IEntityCRUDService.update
+        '''
+        assert isinstance(entity, self.Entity), 'Invalid entity %s' % entity
+        copy(entity, self.getById(entity.Id), exclude=('Id',))
+
+    def delete(self, id):
+        '''
+        @see: IEntityCRUDService.delete
+        '''
+        return self._entities.pop(id, None) is not None
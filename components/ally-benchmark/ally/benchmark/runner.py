@@ -0,0 +1,324 @@
+'''
+Created on Mar 21, 2013
+
+@package: ally benchmark
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the benchmark runner that drives the request processing pipeline in process or over a socket and measures
+the requests per second and the latency percentiles.
+'''
+
+from ally.design.processor.assembly import Assembly
+from ally.design.processor.execution import Chain
+from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
+    ResponseContentHTTP, HTTP, HTTP_GET, HTTP_POST
+from ally.support.util_io import IInputStream, readGenerator
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from io import BytesIO
+from urllib.parse import urlparse, parse_qsl
+import json
+import sys
+
+try: from time import perf_counter as clock
+except ImportError: from time import time as clock  # Python 3.2 has no performance counter
+
+# --------------------------------------------------------------------
+
+class Scenario:
+    '''
+    Container for a benchmark scenario, basically a request that is repeatedly executed.
+    '''
+    __slots__ = ('name', 'method', 'uri', 'headers', 'body', 'status')
+
+    def __init__(self, name, method, uri, headers=None, body=None, status=200):
+        '''
+        Construct the scenario.
+
+        @param name: string
+            The scenario name.
+        @param method: string
+            The HTTP method of the request.
+        @param uri: string
+            The request URI, including the parameters, relative to the server root.
+        @param headers: dictionary{string: string}|None
+            The request headers.
+        @param body: bytes|None
+            The request body.
+        @param status: integer
+            The response status expected for the request.
+        '''
+        assert isinstance(name, str), 'Invalid name %s' % name
+        assert isinstance(method, str), 'Invalid method %s' % method
+        assert isinstance(uri, str), 'Invalid uri %s' % uri
+        assert headers is None or isinstance(headers, dict), 'Invalid headers %s' % headers
+        assert body is None or isinstance(body, bytes), 'Invalid body %s' % body
+        assert isinstance(status, int), 'Invalid status %s' % status
+        self.name = name
+        self.method = method
+        self.uri = uri
+        self.headers = headers or {}
+        self.body = body
+        self.status = status
+
+class Measure:
+    '''
+    Container for the measured latencies of a scenario.
+    '''
+    __slots__ = ('scenario', 'latencies', 'elapsed', 'failures')
+
+    def __init__(self, scenario):
+        '''
+        Construct the measure.
+
+        @param scenario: Scenario
+            The measured scenario.
+        '''
+        assert isinstance(scenario, Scenario), 'Invalid scenario %s' % scenario
+        self.scenario = scenario
+        self.latencies = []
+        self.elapsed = 0.0
+        self.failures = 0
+
+    def requestsPerSecond(self):
+        '''
+        Provides the requests per second.
+
+        @return: float
+            The number of requests processed per second.
+        '''
+        if not self.elapsed: return 0.0
+        return len(self.latencies) / self.elapsed
+
+    def percentile(self, percent):
+        '''
+        Provides the latency percentile, using the nearest rank method.
+
+        @param percent: integer|float
+            The percent, between 0 and 100, to provide the latency for.
+        @return: float
+            The latency in seconds.
+        '''
+        assert isinstance(percent, (int, float)) and 0 <= percent <= 100, 'Invalid percent %s' % percent
+        if not self.latencies: return 0.0
+        latencies = sorted(self.latencies)
+        rank = max(int(round(percent / 100 * len(latencies))), 1)
+        return latencies[rank - 1]
+
+# --------------------------------------------------------------------
+
+class ClientInProcess:
+    '''
+    Client that processes the requests directly on the assembly, as the basic server does, without any socket.
+    '''
+
+    def __init__(self, assembly):
+        '''
+        Construct the client.
+
+        @param assembly: Assembly
+            The assembly used for processing the requests, usually the server assembly.
+        '''
+        assert isinstance(assembly, Assembly), 'Invalid assembly %s' % assembly
+        self.processing = assembly.create(request=RequestHTTP, requestCnt=RequestContentHTTP,
+                                          response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+
+    def request(self, method, uri, headers, body=None):
+        '''
+        Processes the request.
+
+        @param method: string
+            The HTTP method.
+        @param uri: string
+            The request URI, including the parameters.
+        @param headers: dictionary{string: string}
+            The request headers.
+        @param body: bytes|None
+            The request body.
+        @return: tuple(integer, bytes)
+            The response status and body.
+        '''
+        proc = self.processing
+        request, requestCnt = proc.acquire('request'), proc.acquire('requestCnt')
+        assert isinstance(request, RequestHTTP), 'Invalid request %s' % request
+        assert isinstance(requestCnt, RequestContentHTTP), 'Invalid request content %s' % requestCnt
+
+        url = urlparse(uri)
+        request.scheme, request.method = HTTP, method.upper()
+        request.headers = dict(headers)
+        if body is not None: request.headers['Content-Length'] = str(len(body))
+        request.uri = url.path.lstrip('/')
+        request.parameters = parse_qsl(url.query, True, False)
+        requestCnt.source = BytesIO(body or b'')
+
+        response, responseCnt = proc.acquire('response'), proc.acquire('responseCnt')
+        chain = Chain(proc)
+        chain.process(**proc.fillIn(request=request, requestCnt=requestCnt,
+                                    response=response, responseCnt=responseCnt)).doAll()
+
+        response, responseCnt = chain.arg.response, chain.arg.responseCnt
+        assert isinstance(response, ResponseHTTP), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContentHTTP), 'Invalid response content %s' % responseCnt
+
+        status, content = response.status, b''
+        if ResponseContentHTTP.source in responseCnt and responseCnt.source is not None:
+            if isinstance(responseCnt.source, IInputStream): source = readGenerator(responseCnt.source)
+            else: source = responseCnt.source
+            content = b''.join(source)
+
+        proc.release(request=request, requestCnt=requestCnt, response=response, responseCnt=responseCnt)
+        return status, content
+
+    def close(self):
+        '''
+        Closes the client.
+        '''
+
+class ClientSocket:
+    '''
+    Client that sends the requests over a persistent HTTP connection.
+    '''
+
+    def __init__(self, host, port, timeout=30):
+        '''
+        Construct the client.
+
+        @param host: string
+            The server host.
+        @param port: integer
+            The server port.
+        @param timeout: integer
+            The connection timeout in seconds.
+        '''
+        assert isinstance(host, str), 'Invalid host %s' % host
+        assert isinstance(port, int), 'Invalid port %s' % port
+        self.connection = HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method, uri, headers, body=None):
+        '''
+        @see: ClientInProcess.request
+        '''
+        self.connection.request(method, '/' + uri.lstrip('/'), body, headers)
+        response = self.connection.getresponse()
+        content = response.read()
+        if response.will_close: self.connection.close()
+        return response.status, content
+
+    def close(self):
+        '''
+        Closes the client connection.
+        '''
+        self.connection.close()
+
+# --------------------------------------------------------------------
+
+def measure(createClient, scenario, requests, concurrency=1, warmup=10):
+    '''
+    Measures the scenario by executing the request for the provided number of times.
+
+    @param createClient: callable() -> ClientInProcess|ClientSocket
+        The factory that provides a client for each of the concurrent workers.
+    @param scenario: Scenario
+        The scenario to measure.
+    @param requests: integer
+        The total number of requests to execute.
+    @param concurrency: integer
+        The number of concurrent workers executing the requests.
+    @param warmup: integer
+        The number of requests executed by each worker before the measuring starts.
+    @return: Measure
+        The scenario measure.
+    '''
+    assert callable(createClient), 'Invalid client factory %s' % createClient
+    assert isinstance(scenario, Scenario), 'Invalid scenario %s' % scenario
+    assert isinstance(requests, int) and requests > 0, 'Invalid requests %s' % requests
+    assert isinstance(concurrency, int) and concurrency > 0, 'Invalid concurrency %s' % concurrency
+    assert isinstance(warmup, int) and warmup >= 0, 'Invalid warmup %s' % warmup
+
+    result = Measure(scenario)
+    def work(count):
+        client = createClient()
+        try:
+            for _k in range(warmup): client.request(scenario.method, scenario.uri, scenario.headers, scenario.body)
+            latencies, failures = [], 0
+            for _k in range(count):
+                start = clock()
+                status, _content = client.request(scenario.method, scenario.uri, scenario.headers, scenario.body)
+                latencies.append(clock() - start)
+                if status != scenario.status: failures += 1
+            return latencies, failures
+        finally: client.close()
+
+    counts = [requests // concurrency + (1 if k < requests % concurrency else 0) for k in range(concurrency)]
+    start = clock()
+    if concurrency == 1: results = [work(counts[0])]
+    else:
+        with ThreadPoolExecutor(concurrency) as executor: results = list(executor.map(work, counts))
+    result.elapsed = clock() - start
+
+    for latencies, failures in results:
+        result.latencies.extend(latencies)
+        result.failures += failures
+    return result
+
+def report(title, measures, out=sys.stdout):
+    '''
+    Writes the measures report.
+
+    @param title: string
+        The report title.
+    @param measures: Iterable(Measure)
+        The measures to report.
+    @param out: file like object
+        The output to write the report to.
+    '''
+    assert isinstance(title, str), 'Invalid title %s' % title
+    print('=' * 100, file=out)
+    print(title, file=out)
+    print('-' * 100, file=out)
+    print('%-30s %10s %10s %12s %12s %12s %12s' % ('Scenario', 'Requests', 'Failures', 'Req/sec',
+                                                   'p50 (ms)', 'p90 (ms)', 'p99 (ms)'), file=out)
+    for result in measures:
+        assert isinstance(result, Measure), 'Invalid measure %s' % result
+        print('%-30s %10s %10s %12.1f %12.3f %12.3f %12.3f' % (result.scenario.name, len(result.latencies),
+              result.failures, result.requestsPerSecond(), result.percentile(50) * 1000,
+              result.percentile(90) * 1000, result.percentile(99) * 1000), file=out)
+    print('=' * 100, file=out)
+
+# --------------------------------------------------------------------
+
+def scenarios(root='resources/', uploadSize=1024 * 64):
+    '''
+    Provides the standard scenarios for the benchmark sample services.
+
+    @param root: string
+        The root URI of the REST resources.
+    @param uploadSize: integer
+        The size in bytes of the uploaded multipart file.
+    @return: list[Scenario]
+        The scenarios.
+    '''
+    assert isinstance(root, str), 'Invalid root %s' % root
+    assert isinstance(uploadSize, int), 'Invalid upload size %s' % uploadSize
+    articles = root + 'Benchmark/Article'
+
+    boundary = 'AllyBenchmarkBoundary'
+    upload = b''.join((('--%s\r\n' % boundary).encode(),
+                       b'Content-Disposition: form-data; name="file"; filename="upload.bin"\r\n',
+                       b'Content-Type: application/octet-stream\r\n\r\n', b'x' * uploadSize,
+                       ('\r\n--%s--\r\n' % boundary).encode()))
+    article = json.dumps({'Name': 'Benchmark article', 'Type': '1', 'Body': 'Benchmark body'}).encode('utf8')
+
+    return [
+            Scenario('GET model', HTTP_GET, articles + '/1', {'Accept': 'application/json'}),
+            Scenario('GET collection 1k', HTTP_GET, articles + '?limit=1000', {'Accept': 'application/json'}),
+            Scenario('POST JSON', HTTP_POST, articles, {'Accept': 'application/json',
+                                                        'Content-Type': 'application/json; charset=utf-8'}, article, 201),
+            Scenario('POST multipart upload', HTTP_POST, articles + '/1/Attachment',
+                     {'Accept': 'application/json', 'Content-Type': 'multipart/form-data; boundary=%s' % boundary},
+                     upload, 201),
+            Scenario('GET X-Filter', HTTP_GET, articles + '?limit=100',
+                     {'Accept': 'application/json', 'X-Filter': 'Name,Type.Name'}),
+            ]
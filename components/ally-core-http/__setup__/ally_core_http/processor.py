@@ -16,7 +16,8 @@ from ..ally_core.processor import argumentsBuild, argumentsPrepare, \
 from ..ally_core.resources import resourcesRoot
 from ..ally_http.processor import encoderPath, contentLengthDecode, \
     contentLengthEncode, methodOverride, allowEncode, headerDecodeRequest, \
-    contentTypeRequestDecode, headerEncodeResponse, contentTypeResponseEncode
+    contentTypeRequestDecode, headerEncodeResponse, contentTypeResponseEncode, \
+    conditional, allow_compression, acceptEncodingDecode, contentEncodingEncode
 from ally.container import ioc
 from ally.core.http.impl.processor.encoder import CreateEncoderWithPathHandler
 from ally.core.http.impl.processor.explain_error import ExplainErrorHandler
@@ -33,6 +34,7 @@ from ally.core.http.impl.processor.parameter import ParameterHandler
 from ally.core.http.impl.processor.parsing_multipart import \
     ParsingMultiPartHandler
 from ally.core.http.impl.processor.redirect import RedirectHandler
+from ally.core.http.impl.processor.response_cache import ResponseCacheHandler
 from ally.core.http.impl.processor.uri import URIHandler
 from ally.core.http.spec.codes import CODE_TO_STATUS, CODE_TO_TEXT
 from ally.core.spec.resources import ConverterPath
@@ -60,6 +62,29 @@ def root_uri_resources():
     '''
     return 'resources/%s'
 
+@ioc.config
+def response_cache_size():
+    '''
+    The maximum number of rendered responses to keep in cache for the GET calls that are marked with the 'cache' hint,
+    0 to disable the responses cache.
+    '''
+    return 1000
+
+@ioc.config
+def encoder_compile_models():
+    '''
+    If true the models encoding is compiled into specialized functions for each combination of properties requested
+    through filtering, if false the models are encoded generically.
+    '''
+    return True
+
+@ioc.config
+def encoder_compiled_cache_size():
+    '''
+    The maximum number of compiled models encode functions kept for a model, the least recently used ones are discarded.
+    '''
+    return 100
+
 # --------------------------------------------------------------------
 
 @ioc.entity
@@ -112,7 +137,11 @@ def parameter() -> Handler: return ParameterHandler()
 def fetcher() -> Handler: return FetcherHandler()
 
 @ioc.entity
-def createEncoderWithPath() -> Handler: return CreateEncoderWithPathHandler()
+def createEncoderWithPath() -> Handler:
+    b = CreateEncoderWithPathHandler()
+    b.compileModels = encoder_compile_models()
+    b.compiledCacheSize = encoder_compiled_cache_size()
+    return b
 
 @ioc.entity
 def parserMultiPart() -> Handler:
@@ -128,6 +157,13 @@ def redirect() -> Handler:
     b.redirectAssembly = assemblyRedirect()
     return b
 
+@ioc.entity
+def responseCache() -> Handler:
+    b = ResponseCacheHandler()
+    b.cacheSize = response_cache_size()
+    b.cachedAssembly = assemblyCachedResponse()
+    return b
+
 @ioc.entity
 def statusCodeToStatus(): return dict(CODE_TO_STATUS)
 
@@ -167,6 +203,13 @@ def assemblyRedirect() -> Assembly:
     '''
     return Assembly('Redirect')
 
+@ioc.entity
+def assemblyCachedResponse() -> Assembly:
+    '''
+    The assembly containing the handlers that will be used in delivering a cached response.
+    '''
+    return Assembly('Cached response')
+
 # --------------------------------------------------------------------
 
 @ioc.before(assemblyResources)
@@ -174,17 +217,26 @@ def updateAssemblyResources():
     assemblyResources().add(internalDevelError(), headerDecodeRequest(), encoderPath(),
                             argumentsPrepare(), uri(), encoderPathResource(), methodInvoker(), headerEncodeResponse(), redirect(),
                             contentTypeRequestDecode(), contentLengthDecode(), contentLanguageDecode(), acceptDecode(),
-                            renderer(), conversion(), createDecoder(), createEncoderWithPath(), parserMultiPart(), content(),
+                            renderer(), responseCache(), conversion(), createDecoder(), createEncoderWithPath(), parserMultiPart(), content(),
                             parameter(), fetcher(), argumentsBuild(), invoking(), renderEncoder(),
-                            status(), explainError(), contentTypeResponseEncode(),
+                            conditional(), status(), explainError(), contentTypeResponseEncode(),
                             contentLanguageEncode(), contentLengthEncode(), allowEncode())
     
     if allow_method_override(): assemblyResources().add(methodOverride(), before=methodInvoker())
+    if allow_compression():
+        assemblyResources().add(acceptEncodingDecode(), after=acceptDecode())
+        assemblyResources().add(contentEncodingEncode(), before=conditional())
 
 @ioc.before(assemblyMultiPartPopulate)
 def updateAssemblyMultiPartPopulate():
     assemblyMultiPartPopulate().add(headerDecodeRequest(), contentTypeRequestDecode(), contentDispositionDecode())
 
+@ioc.before(assemblyCachedResponse)
+def updateAssemblyCachedResponse():
+    assemblyCachedResponse().add(conditional(), status(), contentTypeResponseEncode(), contentLanguageEncode(),
+                                 contentLengthEncode(), allowEncode())
+    if allow_compression(): assemblyCachedResponse().add(contentEncodingEncode(), before=conditional())
+
 @ioc.before(assemblyRedirect)
 def updateAssemblyRedirect():
     assemblyRedirect().add(argumentsBuild(), invoking())
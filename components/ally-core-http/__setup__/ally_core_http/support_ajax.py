@@ -31,7 +31,8 @@ def headers_ajax() -> dict:
     return {
             'Access-Control-Allow-Origin':['*'],
             'Access-Control-Allow-Headers':['X-Filter', 'X-HTTP-Method-Override', 'X-Format-DateTime', 'Authorization',
-                                            'X-CAPTCHA-Challenge', 'X-CAPTCHA-Response','content-type', 'accept'],
+                                            'X-CAPTCHA-Challenge', 'X-CAPTCHA-Response','content-type', 'accept',
+                                            'If-None-Match', 'If-Modified-Since'],
             }  # TODO: remove Authorization header since that needs to be provided by the security gateway
 
 # --------------------------------------------------------------------
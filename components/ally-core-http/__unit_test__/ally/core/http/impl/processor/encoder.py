@@ -0,0 +1,133 @@
+'''
+Created on Apr 4, 2013
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the compiled model encode.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model
+from ally.api.type import Input, typeFor
+from ally.container import ioc
+from ally.core.http.impl.processor.encoder import CreateEncoderWithPathHandler, EncodeModel
+from ally.core.http.spec.transform.support_model import DataModel
+from ally.core.impl.node import NodeRoot, NodePath, NodeProperty
+from ally.core.spec.resources import ConverterPath, Path
+from ally.core.spec.transform.exploit import ResolveError
+from ally.core.spec.transform.render import RenderToObject
+from ally.http.spec.server import IEncoderPath
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Person:
+    Id = int
+    Name = str
+    Age = int
+    Hidden = str
+
+class EncoderPathTest(IEncoderPath):
+    '''
+    Encodes the path as the matches representations.
+    '''
+
+    def encode(self, path, **keyargs): return '/'.join(str(match) for match in path.matches)
+
+    def encodePattern(self, path, **keyargs): raise NotImplementedError()
+
+class ConverterFail(ConverterPath):
+    '''
+    Converter that fails for the negative integers.
+    '''
+
+    def asString(self, objValue, objType):
+        if isinstance(objValue, int) and objValue < 0: raise ValueError('Invalid value %s' % objValue)
+        return super().asString(objValue, objType)
+
+# --------------------------------------------------------------------
+
+class TestEncoder(unittest.TestCase):
+
+    def testCompiled(self):
+        root = NodeRoot()
+        persons = NodePath(root, True, 'Person')
+        byId = NodeProperty(persons, Input('id', typeFor(Person.Id)))
+        posts = NodePath(byId, True, 'Post')
+
+        person = Person()
+        person.Id, person.Name, person.Age, person.Hidden = 1, 'John', 30, 'Hidden'
+
+        results = []
+        for compileModels in (True, False):
+            handler = CreateEncoderWithPathHandler()
+            handler.compileModels = compileModels
+            ioc.initialize(handler)
+            encode = handler.encoderFor(typeFor(Person))
+            self.assertIsInstance(encode, EncodeModel)
+
+            matchId = byId.newMatch()
+            data = DataModel()
+            data.path = Path([root.newMatch(), persons.newMatch(), matchId], byId)
+            data.modelPaths[typeFor(Person)] = data.path
+            data.accessible['Post'] = Path([root.newMatch(), persons.newMatch(), matchId, posts.newMatch()], posts)
+            data.filter = {'Id', 'Name', 'Age', 'Post'}
+
+            render, converter = RenderToObject(), ConverterPath()
+            context = dict(render=render, normalizer=converter, converter=converter, converterId=converter,
+                           encoderPath=EncoderPathTest(), dataModel=data)
+            for _k in range(2):
+                render.obj = None
+                encode(value=person, **context)
+                results.append(render.obj)
+            self.assertEqual(bool(encode.factories), compileModels)
+
+            person.Age = -1
+            context.update(converter=ConverterFail())
+            self.assertRaises(ResolveError, encode, value=person, **context)
+            person.Age = 30
+
+        self.assertEqual(results[0], {'href': 'ROOT/Person/1', 'Id': '1', 'Name': 'John', 'Age': '30',
+                                      'Post': {'href': 'ROOT/Person/1/Post'}})
+        for result in results[1:]: self.assertEqual(result, results[0])
+
+    def testCompiledBounded(self):
+        root = NodeRoot()
+        persons = NodePath(root, True, 'Person')
+        byId = NodeProperty(persons, Input('id', typeFor(Person.Id)))
+
+        person = Person()
+        person.Id, person.Name, person.Age = 1, 'John', 30
+
+        handler = CreateEncoderWithPathHandler()
+        handler.compiledCacheSize = 2
+        ioc.initialize(handler)
+        encode = handler.encoderFor(typeFor(Person))
+
+        for filter in ({'Id'}, {'Id', 'Name'}, {'Id', 'Age'}, {'Id'}):
+            data = DataModel()
+            data.path = Path([root.newMatch(), persons.newMatch(), byId.newMatch()], byId)
+            data.modelPaths[typeFor(Person)] = data.path
+            data.filter = filter
+
+            render, converter = RenderToObject(), ConverterPath()
+            encode(value=person, render=render, normalizer=converter, converter=converter, converterId=converter,
+                   encoderPath=EncoderPathTest(), dataModel=data)
+            expected = {'href': 'ROOT/Person/1', 'Id': '1', 'Name': 'John', 'Age': '30'}
+            self.assertEqual(render.obj, {name: value for name, value in expected.items()
+                                          if name == 'href' or name in filter})
+            self.assertLessEqual(len(encode.factories), 2)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
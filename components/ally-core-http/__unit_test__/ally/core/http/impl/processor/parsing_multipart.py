@@ -0,0 +1,65 @@
+'''
+Created on Apr 1, 2013
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the multi part stream.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.core.http.impl.processor.parsing_multipart import DataMultiPart, StreamMultiPart, FLAG_MARK_START
+import unittest
+
+# --------------------------------------------------------------------
+
+class Source:
+
+    def __init__(self, content, size):
+        self.content, self.size = content, size
+
+    def read(self, nbytes=None):
+        data, self.content = self.content[:self.size], self.content[self.size:]
+        return data
+
+# --------------------------------------------------------------------
+
+class TestStreamMultiPart(unittest.TestCase):
+
+    def testStream(self):
+        bodies = [b'first body', b'', b'--BOUNDARY but not a mark\r\n--BOUNDAR', b'\r\n\r\n' + b'x' * 5000 + b'\r\n']
+        content = b'preamble\r\n'
+        for k, body in enumerate(bodies):
+            content += ('--BOUNDARY\r\nContent-Disposition: form-data; name="f%s"\r\n\r\n' % k).encode() + body + b'\r\n'
+        content += b'--BOUNDARY--\r\n'
+
+        for packageSize, size, nbytes in ((65536, 65536, None), (1, 1, 1), (16, 7, 100), (1024, 3, 2048)):
+            data = DataMultiPart()
+            data.packageSize = packageSize
+            ioc.initialize(data)
+
+            stream = StreamMultiPart(data, Source(content, size), 'BOUNDARY')
+            stream._readToMark()
+            parts = []
+            while stream._flag & FLAG_MARK_START:
+                headers, chunks = stream._pullHeaders(), []
+                while True:
+                    chunk = stream.read(nbytes)
+                    if not chunk: break
+                    chunks.append(chunk)
+                parts.append((headers['Content-Disposition'], b''.join(chunks)))
+
+            self.assertEqual(parts, [('form-data; name="f%s"' % k, body) for k, body in enumerate(bodies)])
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
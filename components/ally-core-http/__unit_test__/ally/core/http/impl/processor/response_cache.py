@@ -0,0 +1,143 @@
+'''
+Created on Mar 25, 2013
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the response cache handler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import service, call, INSERT
+from ally.api.type import typeFor
+from ally.container import ioc
+from ally.core.http.impl.processor.response_cache import ResponseCacheHandler
+from ally.core.impl.invoker import InvokerCall
+from ally.core.spec.resources import Invoker
+from ally.design.processor.assembly import Assembly
+from ally.design.processor.attribute import requires, defines
+from ally.design.processor.context import Context
+from ally.design.processor.execution import Chain
+from ally.design.processor.handler import HandlerProcessorProceed
+from ally.http.spec.server import IDecoderHeader
+from collections import Iterable
+import unittest
+
+# --------------------------------------------------------------------
+
+@service
+class IService:
+
+    @call(cache=True)
+    def get(self) -> str:
+        '''
+        Nothing.
+        '''
+
+    @call(method=INSERT)
+    def insert(self, value:str) -> str:
+        '''
+        Nothing.
+        '''
+
+class Service(IService):
+
+    def __init__(self):
+        self.values = iter(('first', 'second', 'third'))
+
+    def get(self):
+        return next(self.values)
+
+    def insert(self, value):
+        return value
+
+class DecoderHeader(IDecoderHeader):
+
+    def __init__(self, headers):
+        self.headers = headers
+
+    def retrieve(self, name):
+        return self.headers.get(name)
+
+    def decode(self, name):
+        raise NotImplementedError()
+
+class RequestData(Context):
+    uri = defines(str)
+    invoker = defines(Invoker)
+    decoderHeader = defines(IDecoderHeader)
+
+class ResponseData(Context):
+    isSuccess = defines(bool)
+    trace = defines(list)
+
+class ResponseContentData(Context):
+    type = defines(str)
+    charSet = defines(str)
+
+class Response(Context):
+    trace = requires(list)
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+
+class Request(Context):
+    invoker = requires(Invoker)
+
+class Render(HandlerProcessorProceed):
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        response.trace.append('render')
+        responseCnt.source = iter((request.invoker.invoke(*(('value',) * len(request.invoker.inputs))).encode(),))
+
+class Deliver(HandlerProcessorProceed):
+
+    def process(self, response:Response, **keyargs):
+        response.trace.append('deliver')
+
+# --------------------------------------------------------------------
+
+class TestResponseCache(unittest.TestCase):
+
+    def testCache(self):
+        cached = Assembly('cached')
+        cached.add(Deliver())
+
+        handler = ResponseCacheHandler()
+        handler.cachedAssembly = cached
+        ioc.initialize(handler)
+
+        assembly = Assembly('test')
+        assembly.add(handler, Render(), Deliver())
+        proc = assembly.create(request=RequestData, response=ResponseData, responseCnt=ResponseContentData)
+
+        service, implementation = typeFor(IService).service, Service()
+        get = InvokerCall(implementation, service.calls['get'])
+        insert = InvokerCall(implementation, service.calls['insert'])
+
+        def request(invoker, headers):
+            request, response, responseCnt = proc.ctx.request(), proc.ctx.response(), proc.ctx.responseCnt()
+            request.uri, request.invoker, request.decoderHeader = 'Action', invoker, DecoderHeader(headers)
+            response.trace, response.isSuccess, responseCnt.type = [], True, 'json'
+            Chain(proc).process(request=request, response=response, responseCnt=responseCnt).doAll()
+            return response.trace, b''.join(responseCnt.source)
+
+        self.assertEqual(request(get, {}), (['render', 'deliver'], b'first'))
+        self.assertEqual(request(get, {}), (['deliver'], b'first'))
+        self.assertEqual(request(get, {'X-Filter': 'Path'}), (['render', 'deliver'], b'second'))
+        self.assertEqual((handler.hits, handler.misses), (1, 2))
+
+        request(insert, {})
+        self.assertEqual(request(get, {}), (['render', 'deliver'], b'third'))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,91 @@
+'''
+Created on Mar 22, 2013
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the URI handler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model
+from ally.api.type import Input, typeFor
+from ally.container import ioc
+from ally.core.http.impl.processor.uri import URIHandler
+from ally.core.impl.node import NodeRoot, NodePath, NodeProperty
+from ally.core.spec.resources import ConverterPath
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Person:
+    Id = int
+    Name = str
+
+class ConverterPathStrict(ConverterPath):
+    '''
+    Converter that rejects the values containing a tilde.
+    '''
+
+    def asValue(self, strValue, objType):
+        if '~' in strValue: raise ValueError('Invalid value %s' % strValue)
+        return super().asValue(strValue, objType)
+
+# --------------------------------------------------------------------
+
+class TestURI(unittest.TestCase):
+
+    def testCache(self):
+        root = NodeRoot()
+        persons = NodePath(root, True, 'Person')
+        byId = NodeProperty(persons, Input('id', typeFor(Person.Id)))
+        posts = NodePath(byId, True, 'Post')
+
+        handler = URIHandler()
+        handler.resourcesRoot = root
+        handler.converterPath = ConverterPath()
+        ioc.initialize(handler)
+
+        self.assertIs(handler.findPath(['Person', '1', 'Post']).node, posts)
+        path = handler.findPath(['Person', '2', 'Post'])
+        self.assertIs(path.node, posts)
+        self.assertEqual(path.matches[2].value, 2)
+        self.assertEqual((handler.hits, handler.misses), (1, 1))
+
+        self.assertIsNone(handler.findPath(['Person', 'Some', 'Post']).node)
+        self.assertEqual((handler.hits, handler.misses), (1, 2))
+
+        byName = NodeProperty(persons, Input('name', typeFor(Person.Name)))
+        path = handler.findPath(['Person', 'Some'])
+        self.assertIs(path.node, byName)
+        self.assertEqual(path.matches[2].value, 'Some')
+        self.assertIs(handler.findPath(['Person', '3', 'Post']).node, posts)
+        self.assertEqual((handler.hits, handler.misses), (1, 4))
+
+    def testCacheNotConverted(self):
+        root = NodeRoot()
+        persons = NodePath(root, True, 'Person')
+        byName = NodeProperty(persons, Input('name', typeFor(Person.Name)))
+
+        handler = URIHandler()
+        handler.resourcesRoot = root
+        handler.converterPath = ConverterPathStrict()
+        ioc.initialize(handler)
+
+        self.assertIs(handler.findPath(['Person', 'abc']).node, byName)
+        self.assertIsNone(handler.findPath(['Person', 'a~c']).node)
+        self.assertIs(handler.findPath(['Person', 'xyz']).node, byName)
+        self.assertEqual((handler.hits, handler.misses), (2, 1))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -10,6 +10,7 @@ Provides the meta creation for encoding the response.
 '''
 
 from ally.api.operator.container import Model
+from ally.api.operator.descriptor import Property
 from ally.api.operator.type import TypeModel, TypeModelProperty
 from ally.api.type import Type, TypeReference
 from ally.container.ioc import injected
@@ -17,7 +18,7 @@ from ally.core.http.spec.transform.support_model import DataModel, NO_MODEL_PATH
     IFetcher
 from ally.core.impl.processor import encoder
 from ally.core.impl.processor.encoder import CreateEncoderHandler, EncodeObject, \
-    EncodeCollection
+    EncodeCollection, EncodeId, EncodePrimitive
 from ally.core.spec.resources import Path, Normalizer, Invoker
 from ally.core.spec.transform.exploit import handleExploitError
 from ally.core.spec.transform.render import IRender
@@ -27,7 +28,14 @@ from ally.http.spec.server import IDecoderHeader, IEncoderPath
 from ally.support.core.util_resources import pathLongName, findGetModel, \
     findGetAllAccessible
 from ally.support.util import lastCheck
+from ally.support.util_sys import getAttrAndClass
 from collections import deque, OrderedDict
+from threading import Lock
+import logging
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
 
 # --------------------------------------------------------------------
 
@@ -74,6 +82,11 @@ class CreateEncoderWithPathHandler(CreateEncoderHandler):
     # Separator used for filter names.
     valueDenied = 'denied'
     # Values used to set on the x filter attribute when the fetching is denied
+    compileModels = True
+    # Flag indicating that the models encoding should be compiled into specialized functions for the data models.
+    compiledCacheSize = 100
+    # The maximum number of compiled encode functions kept for a model, a function is compiled for each combination of
+    # properties requested by the clients through filtering, the least recently used functions are discarded.
 
     def __init__(self):
         '''
@@ -85,6 +98,9 @@ class CreateEncoderWithPathHandler(CreateEncoderHandler):
         assert isinstance(self.nameAll, str), 'Invalid filter name all %s' % self.nameAll
         assert isinstance(self.separatorNames, str), 'Invalid names separator %s' % self.separatorNames
         assert isinstance(self.valueDenied, str), 'Invalid value denied %s' % self.valueDenied
+        assert isinstance(self.compileModels, bool), 'Invalid compile models flag %s' % self.compileModels
+        assert isinstance(self.compiledCacheSize, int) and self.compiledCacheSize > 0, \
+        'Invalid compiled cache size %s' % self.compiledCacheSize
         super().__init__()
 
     def process(self, request:Request, response:Response, **keyargs):
@@ -360,7 +376,7 @@ class EncodeModel(EncodeObject):
     '''
     Exploit for model encoding.
     '''
-    __slots__ = ('encoder', 'modelType')
+    __slots__ = ('encoder', 'modelType', 'factories', 'factoriesLock', 'directs')
 
     def __init__(self, encoder, modelType, getter=None):
         '''
@@ -378,6 +394,9 @@ class EncodeModel(EncodeObject):
 
         self.encoder = encoder
         self.modelType = modelType
+        self.factories = OrderedDict()
+        self.factoriesLock = Lock()
+        self.directs = {}
 
     def __call__(self, value, render, normalizer, encoderPath, name=None, dataModel=None, fetcher=None, **data):
         assert isinstance(render, IRender), 'Invalid render %s' % render
@@ -388,6 +407,11 @@ class EncodeModel(EncodeObject):
         if dataModel is None: return super().__call__(value, render, normalizer, name, **data)
         assert isinstance(dataModel, DataModel), 'Invalid data model %s' % dataModel
 
+        if self.encoder.compileModels:
+            compiled = dataModel.compiled
+            if compiled is None: compiled = dataModel.compiled = self.compile(dataModel, normalizer)
+            if compiled: return compiled(value, render, normalizer, encoderPath, name, fetcher, data)
+
         if self.getter: value = self.getter(value)
         if value is None: return
 
@@ -432,6 +456,134 @@ class EncodeModel(EncodeObject):
 
         render.objectEnd()
 
+    def compile(self, dataModel, normalizer):
+        '''
+        Provides the compiled encode for the data model, the function source is generated based on the properties that
+        are rendered by the data model and it is cached for the same data model structure, the primitive properties are
+        rendered directly from the model values and the other properties are encoded with the property encoders.
+        
+        @param dataModel: DataModel
+            The data model to compile the encode for.
+        @param normalizer: Normalizer
+            The normalizer to use for the rendered names.
+        @return: callable(value, render, normalizer, encoderPath, name, fetcher, data)|boolean
+            The compiled encode bound to the data model, False if the encode can not be compiled.
+        '''
+        assert isinstance(dataModel, DataModel), 'Invalid data model %s' % dataModel
+        assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
+        # The encode model properties getters are obtaining the model values, this is not the case for the properties
+        # encode model which receives the property value directly.
+        if self.__class__ is not EncodeModel: return False
+        if dataModel.fetchEncode and dataModel.fetchReference: return False
+
+        filter = dataModel.filter if DataModel.filter in dataModel else None
+        datas = dataModel.datas if DataModel.datas in dataModel else None
+
+        key, names, types, encoders, dataModels = [], [], [], [], []
+        for nameProp, encodeProp in self.properties.items():
+            if filter is not None and nameProp not in filter: continue
+            if encodeProp.__class__ is EncodeId:
+                assert isinstance(encodeProp, EncodeId)
+                kind, nameRender, typeValue = 'converterId', nameProp, encodeProp.typeValue
+            elif encodeProp.__class__ is EncodePrimitive:
+                assert isinstance(encodeProp, EncodePrimitive)
+                kind, nameRender, typeValue = 'converter', normalizer.normalize(nameProp), encodeProp.typeValue
+            else: kind, nameRender, typeValue = None, nameProp, None
+            key.append((nameProp, kind))
+            names.append(nameRender)
+            types.append(typeValue)
+            encoders.append(encodeProp)
+            dataModels.append(datas.get(nameProp) if datas is not None else None)
+
+        accessible = []
+        if DataModel.accessible in dataModel:
+            nameRef = normalizer.normalize(self.encoder.nameRef)
+            for namePath, path in dataModel.accessible.items():
+                if filter is not None and namePath not in filter: continue
+                accessible.append((normalizer.normalize(namePath), nameRef, path))
+
+        path = dataModel.path if not dataModel.flag & NO_MODEL_PATH else None
+        modelPaths = dataModel.modelPaths if DataModel.modelPaths in dataModel else None
+        key = (tuple(key), self.getter is not None, modelPaths is not None, path is not None, bool(accessible))
+
+        with self.factoriesLock:
+            factory = self.factories.get(key)
+            if factory is not None: self.factories.move_to_end(key)
+        if factory is None:
+            assert log.debug('Compiling encode for %s with properties %s', self.modelType, key[0]) or True
+            factory = self._compileFactory(*key)
+            with self.factoriesLock:
+                self.factories[key] = factory
+                if len(self.factories) > self.encoder.compiledCacheSize: self.factories.popitem(last=False)
+
+        return factory(self.getter, self._updateModelPaths, modelPaths, path, normalizer.normalize(self.encoder.nameRef),
+                       normalizer.normalize(self.name), names, types, encoders, dataModels, accessible, self.directs,
+                       self._isDirect, handleExploitError)
+
+    def _compileFactory(self, properties, hasGetter, hasModelPaths, hasPath, hasAccessible):
+        '''
+        Compiles the factory that binds the encode function for the provided data model structure.
+        '''
+        src = ['def factory(getter, updateModelPaths, modelPaths, path, nameRef, nameModel, names, types, encoders, '
+               'dataModels, accessible, directs, isDirect, handleExploitError):',
+               ' def encode(value, render, normalizer, encoderPath, name, fetcher, data):']
+        if hasGetter:
+            src.append('  value = getter(value)')
+        src.append('  if value is None: return')
+        if hasModelPaths:
+            src.append('  updateModelPaths(modelPaths, value)')
+        src.append('  attrs = None')
+        if hasPath:
+            src.append('  if path and path.isValid(): attrs = {nameRef: encoderPath.encode(path)}')
+        src.append('  render.objectStart(normalizer.normalize(name) if name else nameModel, attrs)')
+
+        if any(kind for _name, kind in properties):
+            src.append('  clazz = value.__class__')
+            src.append('  direct = directs.get(clazz)')
+            src.append('  if direct is None: direct = isDirect(clazz)')
+            src.append('  values = value._ally_values if direct else None')
+            for kind in set(kind for _name, kind in properties if kind): src.append('  %s = data[%r]' % (kind, kind))
+        if any(not kind for _name, kind in properties):
+            src.append('  data.update(value=value, render=render, normalizer=normalizer, encoderPath=encoderPath)')
+            src.append('  if fetcher: data.update(fetcher=fetcher)')
+
+        for k, (nameProp, kind) in enumerate(properties):
+            if kind:
+                src.append('  try:')
+                src.append('   propValue = values.get(%r) if direct else encoders[%s].getter(value)' % (nameProp, k))
+                src.append('   if propValue is not None: render.value(names[%s], %s.asString(propValue, types[%s]))' %
+                           (k, kind, k))
+                src.append('  except: handleExploitError(encoders[%s])' % k)
+            else:
+                src.append('  try: encoders[%s](name=names[%s], dataModel=dataModels[%s], **data)' % (k, k, k))
+                src.append('  except: handleExploitError(encoders[%s])' % k)
+
+        if hasAccessible:
+            src.append('  for namePath, nameRefPath, pathAccessible in accessible:')
+            src.append('   if pathAccessible.isValid():')
+            src.append('    render.objectStart(namePath, {nameRefPath: encoderPath.encode(pathAccessible)})')
+            src.append('    render.objectEnd()')
+        src.append('  render.objectEnd()')
+        src.append(' return encode')
+
+        namespace = {}
+        exec(compile('\n'.join(src), '<encode %s>' % self.modelType, 'exec'), namespace)
+        return namespace['factory']
+
+    def _isDirect(self, clazz):
+        '''
+        Checks if the model values of the provided class can be taken directly from the model object values, this is
+        the case when all the properties of the class are provided by the API model property descriptors.
+        '''
+        direct = True
+        for nameProp in self.properties:
+            descriptor, _clazz = getAttrAndClass(clazz, nameProp)
+            if not isinstance(descriptor, Property):
+                direct = False
+                break
+        self.directs[clazz] = direct
+        return direct
+
     def _updateModelPaths(self, modelPaths, value):
         '''
         Update the provided model paths dictionary with the provided model instance value.
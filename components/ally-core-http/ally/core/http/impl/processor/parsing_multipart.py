@@ -22,8 +22,7 @@ from ally.design.processor.processor import Included
 from ally.exception import DevelError
 from ally.support.util_io import IInputStream, IClosable
 from collections import Callable
-from io import BytesIO
-import codecs
+from os.path import commonprefix
 import logging
 import re
 
@@ -37,7 +36,6 @@ log = logging.getLogger(__name__)
 FLAG_CONTENT_END = 1 << 1
 FLAG_MARK_START = 1 << 2
 FLAG_MARK_END = 1 << 3
-FLAG_HEADER_END = 1 << 4
 FLAG_CLOSED = 1 << 5
 FLAG_MARK = FLAG_MARK_START | FLAG_MARK_END
 FLAG_END = FLAG_CONTENT_END | FLAG_MARK
@@ -98,8 +96,8 @@ class DataMultiPart:
     # Characters to be removed from the multi part body end, if found.
     separatorHeader = ':'
     # Mark used to separate the header from the value, only the first occurrence is considered.
-    packageSize = 1024
-    # The maximum package size to be read in one go.
+    packageSize = 64 * 1024
+    # The minimum package size to be read in one go from the content stream.
 
     def __init__(self):
         assert isinstance(self.charSet, str), 'Invalid character set %s' % self.charSet
@@ -186,9 +184,13 @@ class ParsingMultiPartHandler(ParsingHandler, DataMultiPart):
 
 class StreamMultiPart(IInputStream, IClosable):
     '''
-    Provides the muti part stream content.
+    Provides the muti part stream content. The content is read in large packages in a buffer that is consumed based on
+    an offset, the consumed bytes are removed only when the buffer is refilled. The mark search rescans only the buffer
+    tail that can contain the beginning of a mark, the body bytes that are clear of a possible mark are provided as
+    soon as they are read.
     '''
-    __slots__ = ('_data', '_stream', '_markStart', '_markEnd', '_extraSize', '_flag', '_buffer')
+    __slots__ = ('_data', '_stream', '_mark', '_markStart', '_markEnd', '_markSize', '_holdSize', '_flag', '_buffer',
+                 '_start', '_scan', '_exhausted')
 
     def __init__(self, data, stream, boundary):
         '''
@@ -210,10 +212,15 @@ class StreamMultiPart(IInputStream, IClosable):
 
         self._markStart = bytes(data.formatMarkStart % boundary, data.charSet)
         self._markEnd = bytes(data.formatMarkEnd % boundary, data.charSet)
-        self._extraSize = max(len(self._markStart), len(self._markEnd), len(data.markHeaderEnd))
+        self._mark = commonprefix((self._markStart, self._markEnd))
+        self._markSize = max(len(self._markStart), len(self._markEnd))
+        # The body bytes that are kept in the buffer since they might be the trimmed bytes or the beginning of a mark.
+        self._holdSize = len(self._mark) - 1 + len(data.trimBodyAtEnd)
 
         self._flag = 0
         self._buffer = bytearray()
+        self._start = self._scan = 0
+        self._exhausted = False
 
     def read(self, nbytes=None):
         '''
@@ -222,21 +229,10 @@ class StreamMultiPart(IInputStream, IClosable):
         if self._flag & FLAG_CLOSED: raise ValueError('I/O operation on a closed content file')
         if self._flag & FLAG_END: return b''
 
-        if nbytes:
-            if nbytes <= self._data.packageSize:
-                return self._readToMark(nbytes)
-            else:
-                data = bytearray()
-                while True:
-                    data.extend(self._readToMark(min(nbytes - len(data), self._data.packageSize)))
-                    if len(data) >= nbytes or self._flag & FLAG_END: break
-        else:
-            data = bytearray()
-            while True:
-                data.extend(self._readToMark(self._data.packageSize))
-                if self._flag & FLAG_END: break
-
-        return bytes(data)
+        chunks = []
+        self._readToMark(nbytes or None, chunks)
+        if len(chunks) == 1: return chunks[0]
+        return b''.join(chunks)
 
     def close(self):
         '''
@@ -248,100 +244,117 @@ class StreamMultiPart(IInputStream, IClosable):
 
     def _readInBuffer(self, nbytes):
         '''
-        Reads in the instance buffer the specified number of bytes, always when reading it will read in the buffer
-        additional bytes for the mark processing. It will adjust the flags if END is encountered.
+        Reads in the instance buffer at least a package or the specified number of bytes, the consumed bytes are removed
+        from the buffer before.
+        
+        @return: boolean
+            True if content has been read, False if the content stream has no more content.
         '''
-        assert not self._flag & FLAG_CONTENT_END, 'End reached, cannot read anymore'
-        data = self._stream.read(nbytes + self._extraSize - len(self._buffer))
-        if data: self._buffer.extend(data)
-        if not self._buffer: self._flag |= FLAG_CONTENT_END
-
-    def _readToMark(self, nbytes):
+        if self._exhausted: return False
+        if self._start:
+            del self._buffer[:self._start]
+            self._scan = max(0, self._scan - self._start)
+            self._start = 0
+
+        data = self._stream.read(max(nbytes, self._data.packageSize))
+        if not data:
+            self._exhausted = True
+            return False
+        self._buffer.extend(data)
+        return True
+
+    def _searchMark(self):
         '''
-        Read the provided number of bytes or read until a mark separator is encountered (including the end separator).
-        It will adjust the flags according to the findings.
+        Search the mark in the buffer starting with the last scan position.
         
-        @return: bytes
-            The bytes read.
+        @return: tuple(integer, integer, integer)
+            The index up to which the buffer contains body bytes, the mark flag and the index after the mark, the mark
+            flag is 0 if no mark has been found.
         '''
-        assert not self._flag & FLAG_MARK, 'Already at a mark, cannot read until flag is reset'
+        buffer, mark, trim = self._buffer, self._mark, self._data.trimBodyAtEnd
+        while True:
+            index = buffer.find(mark, self._scan)
+            if index < 0:
+                if self._exhausted:
+                    self._scan = len(buffer)
+                    return len(buffer), 0, 0
+                self._scan = max(self._start, len(buffer) - len(mark) + 1)
+                return max(self._start, len(buffer) - self._holdSize), 0, 0
+
+            self._scan = index
+            if buffer.startswith(self._markStart, index): flag, end = FLAG_MARK_START, index + len(self._markStart)
+            elif buffer.startswith(self._markEnd, index): flag, end = FLAG_MARK_END, index + len(self._markEnd)
+            elif len(buffer) - index < self._markSize and not self._exhausted:
+                return max(self._start, index - len(trim)), 0, 0  # More content is needed to identify the mark
+            elif self._exhausted and self._markEnd.startswith(buffer[index:].rstrip()) and \
+                len(buffer) - index > len(mark):
+                flag, end = FLAG_MARK_END, len(buffer)  # The end mark without the new line at the content end
+            else:
+                self._scan = index + 1
+                continue
+
+            if index - len(trim) >= self._start and buffer.endswith(trim, self._start, index): index -= len(trim)
+            return index, flag, end
 
-        self._readInBuffer(nbytes)
-
-        if not self._buffer: return b''
-        indexSep = self._buffer.find(self._markStart)
-        if indexSep >= 0:
-            self._flag |= FLAG_MARK_START
-            indexBody = indexSep - len(self._data.trimBodyAtEnd)
-            if not self._buffer.endswith(self._data.trimBodyAtEnd, indexBody, indexSep): indexBody = indexSep
-            data = self._buffer[:indexBody]
-            del self._buffer[:indexSep + len(self._markStart)]
-        else:
-            nbytes = max(len(self._buffer), nbytes)
-            data = self._buffer[:nbytes]
-            del self._buffer[:nbytes]
-
-        indexEnd = data.find(self._markEnd)
-        if indexEnd >= 0:
-            self._flag |= FLAG_MARK_END
-            indexBody = indexEnd - len(self._data.trimBodyAtEnd)
-            if not data.endswith(self._data.trimBodyAtEnd, indexBody, indexEnd): indexBody = indexEnd
-            data = data[:indexBody]
-            self._buffer = data[indexEnd + len(self._markEnd):]
-
-        return data
-
-    def _readToHeader(self, nbytes):
+    def _readToMark(self, nbytes=None, chunks=None):
         '''
-        Read the provided number of bytes or read until the mark header is encountered.
+        Read the provided number of bytes or read until a mark separator is encountered (including the end separator).
         It will adjust the flags according to the findings.
         
-        @return: bytes
-            The bytes read.
+        @param nbytes: integer|None
+            The maximum number of bytes to read, None to read until the mark.
+        @param chunks: list[bytes]|None
+            The list where to place the read bytes, if None the read bytes are discarded.
+        @return: integer
+            The number of bytes read.
         '''
-        assert not self._flag & FLAG_HEADER_END, 'Already at header end, cannot read until flag is reset'
-
-        self._readInBuffer(nbytes)
-
-        if not self._buffer: return b''
-        indexHeader = self._buffer.find(self._data.markHeaderEnd)
-        if indexHeader >= 0:
-            self._flag |= FLAG_HEADER_END
-            data = self._buffer[:indexHeader]
-            del self._buffer[:indexHeader + len(self._data.markHeaderEnd)]
-        else:
-            nbytes = max(len(self._buffer), nbytes)
-            data = self._buffer[:nbytes]
-            del self._buffer[:nbytes]
+        assert not self._flag & FLAG_MARK, 'Already at a mark, cannot read until flag is reset'
 
-        return data
+        size = 0
+        while nbytes is None or size < nbytes:
+            end, flag, after = self._searchMark()
+            if end > self._start:
+                if nbytes is not None: end = min(end, self._start + nbytes - size)
+                if chunks is not None:
+                    with memoryview(self._buffer) as view: chunks.append(bytes(view[self._start:end]))
+                size += end - self._start
+                self._start = end
+            elif flag:
+                self._flag |= flag
+                self._start = self._scan = after
+                break
+            elif not self._readInBuffer((0 if nbytes is None else nbytes - size) + self._holdSize):
+                self._flag |= FLAG_CONTENT_END
+                break
+        return size
 
     def _pullHeaders(self):
         '''
-        Pull the multi part headers, it will leave the content stream attached to the header reader at the body begin.
+        Pull the multi part headers, it will leave the content stream at the body begin.
         
         @return: dictionary{string, string}
             The multi part headers.
         '''
         assert self._flag & FLAG_MARK_START, 'Not at a separator mark position, cannot process headers'
 
-        data = bytearray()
+        markHeaderEnd, newLine = self._data.markHeaderEnd, self._data.trimBodyAtEnd
         while True:
-            data.extend(self._readToHeader(self._data.packageSize))
-            if self._flag & FLAG_HEADER_END:
-                self._flag ^= FLAG_HEADER_END  # Clearing the header flag
+            if self._buffer.startswith(newLine, self._start):
+                index, end = self._start, self._start + len(newLine)  # No headers provided
                 break
-            if self._flag & FLAG_CONTENT_END: raise DevelError('No empty line after multi part header')
+            index = self._buffer.find(markHeaderEnd, self._start)
+            if index >= 0:
+                end = index + len(markHeaderEnd)
+                break
+            if not self._readInBuffer(0): raise DevelError('No empty line after multi part header')
 
-        reader = codecs.getreader(self._data.charSet)(BytesIO(data))
         headers = {}
-        while True:
-            line = reader.readline()
-            if line == '':  break
+        for line in str(self._buffer[self._start:index], self._data.charSet).splitlines():
             hindex = line.find(self._data.separatorHeader)
             if hindex < 0: raise DevelError('Invalid multi part header \'%s\'' % line)
             headers[line[:hindex]] = line[hindex + 1:].strip()
 
+        self._start = self._scan = end
         self._flag ^= FLAG_MARK_START
         return headers
 
@@ -394,10 +407,8 @@ class NextContent:
 
         if not stream._flag & (FLAG_CONTENT_END | FLAG_MARK_END):
             if not stream._flag & FLAG_MARK_START:
-                while True:
-                    stream._readToMark(self._data.packageSize)
-                    if stream._flag & FLAG_MARK_START: break
-                    if stream._flag & FLAG_END: return
+                stream._readToMark()
+                if not stream._flag & FLAG_MARK_START: return
 
             req = processing.ctx.request()
             self._nextCnt = reqCnt = self._requestCnt.__class__()
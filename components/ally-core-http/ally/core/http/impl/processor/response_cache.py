@@ -0,0 +1,196 @@
+'''
+Created on Mar 25, 2013
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the cache for the rendered responses of the GET calls that are marked with the cache hint.
+'''
+
+from ally.api.config import GET
+from ally.container.ioc import injected
+from ally.core.spec.resources import Invoker
+from ally.design.processor.assembly import Assembly
+from ally.design.processor.attribute import requires, defines, optional
+from ally.design.processor.context import Context
+from ally.design.processor.execution import Processing, Chain
+from ally.design.processor.handler import HandlerBranching
+from ally.design.processor.processor import Included
+from ally.http.spec.server import IDecoderHeader
+from ally.support.core.util_resources import invokerCallOf
+from ally.support.util_io import IInputStream
+from collections import OrderedDict, Iterable
+from threading import Lock
+import logging
+
+try: from time import monotonic as clock
+except ImportError: from time import time as clock  # Python 3.2 has no monotonic clock
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    '''
+    The request context.
+    '''
+    # ---------------------------------------------------------------- Required
+    uri = requires(str)
+    invoker = requires(Invoker)
+    decoderHeader = requires(IDecoderHeader)
+    # ---------------------------------------------------------------- Optional
+    parameters = optional(list)
+
+class Response(Context):
+    '''
+    The response context.
+    '''
+    # ---------------------------------------------------------------- Required
+    isSuccess = requires(bool)
+    # ---------------------------------------------------------------- Defined
+    language = defines(str)
+
+class ResponseContent(Context):
+    '''
+    The response content context.
+    '''
+    # ---------------------------------------------------------------- Required
+    type = requires(str)
+    # ---------------------------------------------------------------- Optional
+    charSet = optional(str)
+    # ---------------------------------------------------------------- Defined
+    source = defines(Iterable)
+    length = defines(int)
+    encoding = defines(str)
+
+# --------------------------------------------------------------------
+
+@injected
+class ResponseCacheHandler(HandlerBranching):
+    '''
+    Implementation for a processor that keeps the rendered content of the GET calls that have the cache hint. The cached
+    content is keyed on the invoker, the request URI and parameters, the response content type and character set and
+    the values of the headers that alter the rendered content. On a cache hit the remaining processors are replaced by
+    the cached response processors so no invoking, encoding or rendering takes place. The cache hint value is either
+    the number of seconds an entry is valid or True for entries that expire only when a call that is not a GET is
+    successfully made on the same service.
+    '''
+
+    hintCache = 'cache'
+    # The call hint name for the response cache.
+    nameHeaders = ['X-Filter', 'X-Format-DateTime', 'Accept-Language', 'Accept-Encoding']
+    # The request headers names that alter the rendered content, any header that provides call arguments should be
+    # added also.
+    cacheSize = 1000
+    # The maximum number of responses to keep in the cache, 0 to disable the cache.
+    cachedAssembly = Assembly
+    # The cached response processors, they need to deliver the cached content that is placed on the response.
+
+    def __init__(self):
+        assert isinstance(self.hintCache, str), 'Invalid cache hint name %s' % self.hintCache
+        assert isinstance(self.nameHeaders, (list, tuple)), 'Invalid headers names %s' % self.nameHeaders
+        assert isinstance(self.cacheSize, int), 'Invalid cache size %s' % self.cacheSize
+        assert isinstance(self.cachedAssembly, Assembly), 'Invalid cached assembly %s' % self.cachedAssembly
+        super().__init__(Included(self.cachedAssembly))
+
+        self._cache = OrderedDict()
+        self._cacheLock = Lock()
+        self.hits = self.misses = 0  # The cache counters, they are not synchronized so the values are approximate.
+
+    def process(self, chain, cached, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        '''
+        @see: HandlerBranching.process
+
+        Provides the cached response or registers the response rendered content to be cached.
+        '''
+        assert isinstance(chain, Chain), 'Invalid processors chain %s' % chain
+        assert isinstance(cached, Processing), 'Invalid processing %s' % cached
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+
+        if not self.cacheSize or response.isSuccess is False:
+            chain.proceed()
+            return
+        assert isinstance(request.invoker, Invoker), 'Invalid request invoker %s' % request.invoker
+
+        group = self.groupFor(request.invoker)
+        if request.invoker.method != GET:
+            def invalidate():
+                if response.isSuccess is not False: self.invalidate(group)
+            chain.callBack(invalidate)
+            return
+
+        expires = request.invoker.hints.get(self.hintCache)
+        if not expires:
+            chain.proceed()
+            return
+        assert expires is True or (isinstance(expires, int) and expires > 0), \
+        'Invalid cache hint value %s for invoker %s' % (expires, request.invoker)
+
+        assert isinstance(request.decoderHeader, IDecoderHeader), 'Invalid header decoder %s' % request.decoderHeader
+        if Request.parameters in request and request.parameters: parameters = tuple(request.parameters)
+        else: parameters = None
+        key = (request.invoker, request.uri, parameters, responseCnt.type, responseCnt.charSet,
+               tuple(request.decoderHeader.retrieve(name) for name in self.nameHeaders))
+
+        with self._cacheLock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry[0] is not None and entry[0] <= clock():
+                    del self._cache[key]
+                    entry = None
+                else: self._cache.move_to_end(key)
+
+        if entry is not None:
+            self.hits += 1
+            _expiresAt, _group, content, response.language, responseCnt.encoding = entry
+            responseCnt.source, responseCnt.length = (content,), len(content)
+            assert log.debug('Cached response provided for URI %s', request.uri) or True
+            chain.branch(cached)
+            return
+
+        self.misses += 1
+        def store():
+            if response.isSuccess is not True: return
+            if isinstance(responseCnt.source, IInputStream) or not isinstance(responseCnt.source, Iterable): return
+            content = b''.join(responseCnt.source)
+            responseCnt.source, responseCnt.length = (content,), len(content)
+
+            expiresAt = None if expires is True else clock() + expires
+            with self._cacheLock:
+                self._cache[key] = (expiresAt, group, content, response.language, responseCnt.encoding)
+                if len(self._cache) > self.cacheSize: self._cache.popitem(last=False)
+        chain.callBack(store)
+
+    # ----------------------------------------------------------------
+
+    def groupFor(self, invoker):
+        '''
+        Provides the invalidation group for the invoker, basically the service implementation that the invoker calls.
+
+        @param invoker: Invoker
+            The invoker to provide the group for.
+        @return: object
+            The invalidation group.
+        '''
+        invokerCall = invokerCallOf(invoker)
+        if invokerCall is None: return invoker
+        return invokerCall.implementation
+
+    def invalidate(self, group=None):
+        '''
+        Removes the cached responses of the provided invalidation group.
+
+        @param group: object|None
+            The invalidation group to remove the responses for, if None all the cached responses are removed.
+        '''
+        with self._cacheLock:
+            if group is None: self._cache.clear()
+            else:
+                for key in [key for key, entry in self._cache.items() if entry[1] is group]: del self._cache[key]
+        assert log.debug('Invalidated cached responses for %s', group) or True
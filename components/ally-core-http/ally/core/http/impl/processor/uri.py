@@ -9,15 +9,18 @@ Created on Jun 28, 2011
 Provides the URI request path handler.
 '''
 
-from ally.api.type import Scheme, Type
+from ally.api.type import Scheme, Type, typeFor
 from ally.container.ioc import injected
+from ally.core.impl.node import MatchRoot, MatchString, MatchProperty
 from ally.core.spec.resources import ConverterPath, Path, Converter, Normalizer, \
     Node
 from ally.design.processor.attribute import requires, defines, optional
 from ally.design.processor.context import Context
 from ally.design.processor.handler import HandlerProcessorProceed
 from ally.http.spec.codes import PATH_FOUND, PATH_NOT_FOUND
-from ally.support.core.util_resources import findPath
+from ally.support.core.util_resources import PathRouter
+from collections import OrderedDict
+from threading import Lock
 from urllib.parse import unquote
 import logging
 from ally.core.impl.node import NodeProperty
@@ -26,6 +29,11 @@ from ally.core.impl.node import NodeProperty
 
 log = logging.getLogger(__name__)
 
+SHAPE_INTEGER = 1
+# Marks in a URI shape a path element that is not a path node name and can be converted to an integer.
+SHAPE_STRING = 2
+# Marks in a URI shape a path element that is not a path node name and can not be converted to an integer.
+
 # --------------------------------------------------------------------
 
 class Request(Context):
@@ -95,12 +103,22 @@ class URIHandler(HandlerProcessorProceed):
     # The resources node that will be used for finding the resource path.
     converterPath = ConverterPath
     # The converter path used for handling the URL path.
+    cacheSize = 1000
+    # The maximum number of URI shapes to keep the resolved paths for, 0 to disable the cache.
 
     def __init__(self):
         assert isinstance(self.resourcesRoot, Node), 'Invalid resources node %s' % self.resourcesRoot
         assert isinstance(self.converterPath, ConverterPath), 'Invalid ConverterPath object %s' % self.converterPath
+        assert isinstance(self.cacheSize, int), 'Invalid cache size %s' % self.cacheSize
         super().__init__()
 
+        self._router = PathRouter(self.resourcesRoot, self.converterPath)
+        self._typeInteger = typeFor(int)
+        self._cache = OrderedDict()
+        self._cacheChanges = self._router.changes
+        self._cacheLock = Lock()
+        self.hits = self.misses = 0  # The cache counters, they are not synchronized so the values are approximate.
+
     def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
         '''
         @see: HandlerProcessorProceed.process
@@ -126,7 +144,7 @@ class URIHandler(HandlerProcessorProceed):
         paths = [unquote(p) for p in paths if p]
 
         if request.extension: responseCnt.type = request.extension
-        request.path = findPath(self.resourcesRoot, paths, self.converterPath)
+        request.path = self.findPath(paths)
         assert isinstance(request.path, Path), 'Invalid path %s' % request.path
         node = request.path.node
         if not node:
@@ -157,3 +175,70 @@ class URIHandler(HandlerProcessorProceed):
 
         response.code, response.status, response.isSuccess = PATH_FOUND
         response.converterId = self.converterPath
+
+    # ----------------------------------------------------------------
+
+    def findPath(self, paths):
+        '''
+        Finds the path for the provided path elements, the resolved paths are cached by the URI shape which is made of
+        the path node names and markers for the other path elements, so a request having a known shape only needs the
+        conversion of the property path elements.
+        
+        @param paths: list[string]
+            The path elements to find the path for.
+        @return: Path
+            The found path.
+        '''
+        assert isinstance(paths, list), 'Invalid paths %s' % paths
+        if not self.cacheSize: return self._router.findPath(paths)
+
+        router, converterPath = self._router, self.converterPath
+        literals, shape = router.literals, []
+        for path in paths:
+            if path in literals: shape.append(path)
+            else:
+                try: converterPath.asValue(path, self._typeInteger)
+                except ValueError: shape.append(SHAPE_STRING)
+                else: shape.append(SHAPE_INTEGER)
+        shape = tuple(shape)
+
+        with self._cacheLock:
+            if self._cacheChanges != router.changes:
+                self._cache.clear()
+                self._cacheChanges = router.changes
+            resolved = self._cache.get(shape)
+            if resolved is not None: self._cache.move_to_end(shape)
+            changes = self._cacheChanges
+
+        if resolved is not None:
+            self.hits += 1
+            node, builders = resolved
+            matches = []
+            try:
+                for builder in builders:
+                    if isinstance(builder, tuple):
+                        index, nodeProperty = builder
+                        value = converterPath.asValue(paths[index], nodeProperty.type)
+                        matches.append(MatchProperty(nodeProperty, value))
+                    else: matches.append(builder)
+            except ValueError: return router.findPath(paths)  # The router decides for the values it cannot convert
+            return Path(matches, node)
+
+        self.misses += 1
+        path = router.findPath(paths)
+        assert isinstance(path, Path), 'Invalid path %s' % path
+        if path.node is None or len(path.matches) != len(paths) + 1: return path
+
+        builders = []
+        for index, match in enumerate(path.matches, -1):
+            if isinstance(match, MatchProperty):
+                assert isinstance(match, MatchProperty)
+                builders.append((index, match.node))
+            elif isinstance(match, (MatchRoot, MatchString)): builders.append(match)
+            else: return path  # Only the known matches are cached
+
+        with self._cacheLock:
+            if changes == router.changes:
+                self._cache[shape] = (path.node, builders)
+                if len(self._cache) > self.cacheSize: self._cache.popitem(last=False)
+        return path
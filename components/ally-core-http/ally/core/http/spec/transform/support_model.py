@@ -70,6 +70,10 @@ class DataModel(Bean):
     @rtype: DataModel
     The fetch data model to be used.
     ''')
+    compiled = Callable; compiled = Attribute(compiled, bool, doc='''
+    @rtype: Callable|boolean
+    The compiled model encode bound to this data model, False if the encode can not be compiled for this data model.
+    ''')
 
 # --------------------------------------------------------------------
 
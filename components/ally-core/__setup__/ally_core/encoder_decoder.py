@@ -10,8 +10,11 @@ Provides the configurations for the processors encoders and decoders.
 '''
 
 from ally.container import ioc
+from ally.core.impl.processor.parser.cbor import ParseCBORHandler
+from ally.core.impl.processor.parser.json import ParseJSONHandler
 from ally.core.impl.processor.parser.text import ParseTextHandler
 from ally.core.impl.processor.parser.xml import ParseXMLHandler
+from ally.core.impl.processor.render.cbor import RenderCBORHandler
 from ally.core.impl.processor.render.json import RenderJSONHandler
 from ally.core.impl.processor.render.text import RenderTextHandler
 from ally.core.impl.processor.render.xml import RenderXMLHandler
@@ -65,6 +68,17 @@ def content_types_yaml() -> dict:
             'yaml':'text/yaml',
             }
 
+@ioc.config
+def content_types_cbor() -> dict:
+    '''
+    The CBOR content types, a map that contains as a key the recognized mime type and as a value the normalize mime type,
+    if none then the same key mimie type will be used for response.
+    '''
+    return {
+            'application/cbor':None,
+            'cbor':'application/cbor',
+            }
+
 # --------------------------------------------------------------------
 # Create the renders
 
@@ -102,30 +116,53 @@ def renderXML() -> Handler:
     b = RenderXMLHandler(); yield b
     b.contentTypes = content_types_xml()
 
+@ioc.entity
+def renderCBOR() -> Handler:
+    b = RenderCBORHandler(); yield b
+    b.contentTypes = content_types_cbor()
+
 # --------------------------------------------------------------------
 # Creating the parsers
 
 @ioc.entity
 def parseJSON() -> Handler:
-    import json
-    def parserJSON(content, charSet): return json.load(codecs.getreader(charSet)(content))
-
-    b = ParseTextHandler(); yield b
+    b = ParseJSONHandler(); yield b
     b.contentTypes = set(content_types_json())
-    b.parser = parserJSON
-    b.parserName = 'json'
+
+# JSON decode by using the text parser.
+# @ioc.entity
+# def parseJSON() -> Handler:
+#    import json
+#    def parserJSON(content, charSet): return json.load(codecs.getreader(charSet)(content))
+#
+#    b = ParseTextHandler(); yield b
+#    b.contentTypes = set(content_types_json())
+#    b.parser = parserJSON
+#    b.parserName = 'json'
 
 @ioc.entity
 def parseXML() -> Handler:
     b = ParseXMLHandler(); yield b
     b.contentTypes = set(content_types_xml())
 
+@ioc.entity
+def parseCBOR() -> Handler:
+    b = ParseCBORHandler(); yield b
+    b.contentTypes = set(content_types_cbor())
+
 # --------------------------------------------------------------------
 
+@ioc.before(renderingAssembly)
+def updateRenderingAssembly():
+    renderingAssembly().add(renderJSON())
+    renderingAssembly().add(renderXML())
+    renderingAssembly().add(renderCBOR())
+
 @ioc.before(assemblyParsing)
 def updateAssemblyParsing():
     assemblyParsing().add(parseJSON())
     assemblyParsing().add(parseXML())
+    assemblyParsing().add(parseCBOR())
 
 try: import yaml
 except ImportError: log.info('No YAML library available, no yaml available for output or input')
@@ -142,9 +179,7 @@ else:
         b.rendererTextObject = rendererYAML
     
     @ioc.before(renderingAssembly)
-    def updateRenderingAssembly():
-        renderingAssembly().add(renderJSON())
-        renderingAssembly().add(renderXML())
+    def updateRenderingAssemblyWithYAML():
         renderingAssembly().add(renderYAML())
 
 
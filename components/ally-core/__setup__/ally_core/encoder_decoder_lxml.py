@@ -0,0 +1,48 @@
+'''
+Created on Mar 29, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the configurations for the lxml based XML parser and renderer, the pure python ones are used if the lxml
+library is not available.
+'''
+
+from .encoder_decoder import parseXML, renderXML, content_types_xml
+from ally.container import ioc
+from ally.design.processor.handler import Handler
+import logging
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+try: from lxml import etree
+except ImportError: log.info('No lxml library available, the pure python XML parser and renderer are used')
+else:
+
+    from ally.core.impl.processor.parser.lxml import ParseLXMLHandler
+
+    # ----------------------------------------------------------------
+
+    @ioc.replace(parseXML)
+    def parseLXML() -> Handler:
+        b = ParseLXMLHandler(); yield b
+        b.contentTypes = set(content_types_xml())
+
+    if not hasattr(etree, 'xmlfile'):
+        log.info('No lxml incremental writer available, the pure python XML renderer is used')
+    else:
+
+        from ally.core.impl.processor.render.lxml import RenderLXMLHandler
+
+        # ------------------------------------------------------------
+
+        @ioc.replace(renderXML)
+        def renderLXML() -> Handler:
+            b = RenderLXMLHandler(); yield b
+            b.contentTypes = content_types_xml()
@@ -0,0 +1,58 @@
+'''
+Created on Mar 30, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the CBOR parser.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.core.impl.processor.parser.cbor import ParseCBORHandler
+from io import BytesIO
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestParseCBOR(unittest.TestCase):
+
+    def testParse(self):
+        handler = ParseCBORHandler()
+        handler.contentTypes = {'cbor'}
+        handler.bufferSize = 3
+        ioc.initialize(handler)
+
+        contents = (b'\xa1dPost\xa5bIda1dTags\x82aaabfAuthor\xf6eOrder\x02dFlag\xf5',  # Definite length
+                    b'\xbfdPost\xbfbIda1dTags\x9faaab\xfffAuthor\xf6eOrder\x02dFlag\xf5\xff\xff')  # Indefinite length
+        for content in contents:
+            values = []
+            def decoder(path, value, **data):
+                values.append(('/'.join(path), value))
+                return True
+
+            self.assertIsNone(handler.parse(decoder, {}, BytesIO(content), 'utf-8'))
+            self.assertEqual(values, [('Post/Id', '1'), ('Post/Tags', ['a', 'b']), ('Post/Author', None)])
+
+        error = handler.parse(lambda path, **data: path[-1] != 'Tags', {}, BytesIO(contents[0]), 'utf-8')
+        self.assertEqual(error, 'Invalid path \'Post/Tags\' in object')
+
+        for content in (contents[0][:-1], contents[1][:-1], contents[0] + b'\x00', b'\xa1\x01a1', b'\xa1aI\xff'):
+            self.assertEqual(handler.parse(lambda **data: True, {}, BytesIO(content), 'utf-8'), 'Bad cbor content')
+
+        # Huge lengths and counts
+        for content in (b'\xa1aI\x7b' + b'\xff' * 8, b'\xa1aI\x7b\x00\x00\x00\x01\x00\x00\x00\x00xxx',
+                        b'\xa1aI\x9b' + b'\xff' * 8, b'\xbb' + b'\xff' * 8, b'\xa1aI\x9b\x7f' + b'\xff' * 7 + b'\x01'):
+            self.assertEqual(handler.parse(lambda **data: True, {}, BytesIO(content), 'utf-8'), 'Bad cbor content')
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,54 @@
+'''
+Created on Mar 28, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the JSON parser.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.core.impl.processor.parser.json import ParseJSONHandler
+from io import BytesIO
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestParseJSON(unittest.TestCase):
+
+    def testParse(self):
+        content = '{"Post": {"Id": "1", "Content": "Some \\"quoted\\" \\u0103 text", "Order": 2, ' \
+                  '"Tags": ["a", "b"], "Author": null, "Flags": {}}}'
+
+        for charSet, bufferSize in (('utf-8', 4096), ('utf-8', 1), ('utf-16', 3)):
+            handler = ParseJSONHandler()
+            handler.contentTypes = {'json'}
+            handler.bufferSize = bufferSize
+            ioc.initialize(handler)
+
+            values = []
+            def decoder(path, value, **data):
+                values.append(('/'.join(path), value))
+                return path[-1] != 'Author'
+
+            error = handler.parse(decoder, {}, BytesIO(content.encode(charSet)), charSet)
+            self.assertEqual(error, 'Invalid path \'Post/Author\' in object')
+            self.assertEqual(values, [('Post/Id', '1'), ('Post/Content', 'Some "quoted" ă text'),
+                                      ('Post/Tags', ['a', 'b']), ('Post/Author', None)])
+
+        for content in ('{"Id": "1"', '{"Id" "1"}', '{"Id": "1"}}', '["a", ]', '{"Id": tru}'):
+            error = handler.parse(lambda **data: True, {}, BytesIO(content.encode()), 'utf-8')
+            self.assertEqual(error, 'Bad json content', content)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
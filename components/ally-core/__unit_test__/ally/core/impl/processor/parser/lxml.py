@@ -0,0 +1,63 @@
+'''
+Created on Mar 29, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the lxml XML parser.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.core.impl.processor.parser.lxml import ParseLXMLHandler
+from ally.core.impl.processor.parser.xml import ParseXMLHandler
+from io import BytesIO
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestParseLXML(unittest.TestCase):
+
+    def testParse(self):
+        content = '<Post><Id>1</Id><!-- Comment --><Content>Some &lt;quoted&gt; ă text</Content>\n' \
+                  '<Tags><Tag>a</Tag><Tag>b</Tag></Tags><Author/><Flags></Flags></Post>'
+
+        handlers = []
+        for handler in (ParseXMLHandler(), ParseLXMLHandler()):
+            handler.contentTypes = {'xml'}
+            ioc.initialize(handler)
+            handlers.append(handler)
+
+        values = []
+        def decoder(path, value, **data):
+            values.append(('/'.join(path), value))
+            return True
+        self.assertIsNone(handlers[1].parse(decoder, {}, BytesIO(content.encode()), 'utf-8'))
+        self.assertEqual(values, [('Post/Id', '1'), ('Post/Content', 'Some <quoted> ă text'), ('Post/Tags/Tag', 'a'),
+                                  ('Post/Tags/Tag', 'b'), ('Post/Author', ''), ('Post/Flags', '')])
+
+        for content in ('<Post><Id>1</Id>', '<Post>text<Id>1</Id></Post>', '<Post><Id>1</Id>text</Post>',
+                        '<Post id="1"><Id>1</Id></Post>', '<Post><Id>1</Id></Post><Post/>'):
+            errors = [handler.parse(lambda **data: True, {}, BytesIO(content.encode()), 'utf-8') for handler in handlers]
+            self.assertIsNotNone(errors[0], content)
+            self.assertIsNotNone(errors[1], content)
+
+        values = []
+        content = '<Post><Content>café</Content></Post>'.encode('ISO-8859-1')
+        self.assertIsNone(handlers[1].parse(decoder, {}, BytesIO(content), 'ISO-8859-1'))
+        self.assertEqual(values, [('Post/Content', 'café')])
+
+        error = handlers[1].parse(lambda **data: False, {}, BytesIO(b'<Post>\n<Id>1</Id></Post>'), 'utf-8')
+        self.assertEqual(error, 'Invalid path \'Post/Id\' at line 2')
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
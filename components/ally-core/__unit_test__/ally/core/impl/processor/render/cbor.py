@@ -0,0 +1,57 @@
+'''
+Created on Mar 30, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the CBOR renderer.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.impl.processor.render.cbor import RenderCBOR
+from io import BytesIO
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestRenderCBOR(unittest.TestCase):
+
+    def testRender(self):
+        for bufferSize in (4096, 1):
+            output = BytesIO()
+            render = RenderCBOR(output, bufferSize=bufferSize)
+
+            render.collectionStart('PostList', {'total': '2'})
+            render.objectStart('Post', {'href': 'Post/1'})
+            render.value('Id', '1')
+            render.objectStart('Author')
+            render.objectEnd()
+            render.objectEnd()
+            render.value('Post', 'x' * 30)
+            render.collectionEnd()
+
+            self.assertEqual(output.getvalue(), b'\xbfetotala2hPostList\x9f\xbfdhreffPost/1bIda1fAuthor\xbf\xff\xff'
+                             b'x\x1exxxxxxxxxxxxxxxxxxxxxxxxxxxxxx\xff\xff')
+
+    def testNamesBounded(self):
+        output, names = BytesIO(), {}
+        render = RenderCBOR(output, names, namesSize=2)
+
+        render.objectStart('Map')
+        for k in range(3): render.value('K%s' % k, str(k))
+        render.objectEnd()
+
+        self.assertEqual(len(names), 2)
+        self.assertEqual(output.getvalue(), b'\xbfbK0a0bK1a1bK2a2\xff')
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,61 @@
+'''
+Created on Mar 22, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the JSON renderer.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.impl.processor.render.json import RenderJSON
+from codecs import getincrementalencoder
+from io import BytesIO
+import json
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestRenderJSON(unittest.TestCase):
+
+    def testRender(self):
+        for charSet, bufferSize in (('utf-8', 4096), ('utf-8', 1), ('utf-16', 10)):
+            output = BytesIO()
+            render = RenderJSON(output, getincrementalencoder(charSet)('backslashreplace'), bufferSize=bufferSize)
+
+            render.collectionStart('PostList', {'total': '2'})
+            for k in range(2):
+                render.objectStart('Post', {'href': 'Post/%s' % k})
+                render.value('Id', str(k))
+                render.value('Content', 'Some "quoted" ă text')
+                render.objectStart('Author')
+                render.objectEnd()
+                render.objectEnd()
+            render.collectionEnd()
+
+            posts = [{'href': 'Post/%s' % k, 'Id': str(k), 'Content': 'Some "quoted" ă text', 'Author': {}}
+                     for k in range(2)]
+            self.assertEqual(json.loads(output.getvalue().decode(charSet)), {'total': '2', 'PostList': posts})
+
+    def testNamesBounded(self):
+        output, names = BytesIO(), {}
+        render = RenderJSON(output, getincrementalencoder('utf-8')('strict'), names, namesSize=2)
+
+        render.objectStart('Map')
+        for k in range(5): render.value('Key%s' % k, str(k))
+        render.objectEnd()
+
+        self.assertEqual(len(names), 2)
+        self.assertEqual(json.loads(output.getvalue().decode('utf-8')), {'Key%s' % k: str(k) for k in range(5)})
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
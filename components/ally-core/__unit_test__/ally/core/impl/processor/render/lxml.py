@@ -0,0 +1,60 @@
+'''
+Created on Mar 29, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the lxml XML renderer.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.core.impl.processor.render.lxml import RenderLXMLHandler
+from ally.core.impl.processor.render.xml import RenderXMLHandler
+from io import BytesIO
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestRenderLXML(unittest.TestCase):
+
+    def testRender(self):
+        for charSet in ('utf-8', 'ascii'):
+            contents = []
+            for handler in (RenderXMLHandler(), RenderLXMLHandler()):
+                handler.contentTypes = {'xml': None}
+                ioc.initialize(handler)
+
+                output = BytesIO()
+                render = handler.renderFactory(charSet, output)
+                render.collectionStart('PostList', {'total': '2'})
+                for k in range(2):
+                    render.objectStart('Post', {'href': 'Post/%s' % k})
+                    render.value('Id', str(k))
+                    render.value('Content', 'Some <quoted> & ă text')
+                    render.objectStart('Author')
+                    render.objectEnd()
+                    render.objectEnd()
+                render.value('Total', '2')
+                render.collectionEnd()
+                contents.append(output.getvalue().split(b'\n', 1)[1])  # The declaration is not compared
+
+            self.assertEqual(contents[0], contents[1])
+
+        output = BytesIO()
+        render = handler.renderFactory('utf-8', output)
+        render.objectStart('Post', {'href': 'Post/1'})
+        render.objectEnd()
+        self.assertTrue(output.getvalue().endswith(b'\n<Post href="Post/1"/>'))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
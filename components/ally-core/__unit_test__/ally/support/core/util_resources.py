@@ -0,0 +1,60 @@
+'''
+Created on Mar 22, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the resources utilities.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model
+from ally.api.type import Input, typeFor
+from ally.core.impl.node import NodeRoot, NodePath, NodeProperty
+from ally.core.spec.resources import ConverterPath
+from ally.support.core.util_resources import PathRouter, findPath
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Article:
+    Id = int
+    Name = str
+
+# --------------------------------------------------------------------
+
+class TestRouter(unittest.TestCase):
+
+    def testFindPath(self):
+        converterPath = ConverterPath()
+        root = NodeRoot()
+        router = PathRouter(root, converterPath)
+
+        articles = NodePath(root, True, 'Article')
+        byId = NodeProperty(articles, Input('id', typeFor(Article.Id)))
+        byName = NodeProperty(articles, Input('name', typeFor(Article.Name)))
+        NodePath(byId, True, 'Comment')
+        NodePath(articles, False, 'Count')
+
+        for paths in (['Article'], ['Article', '1'], ['Article', 'Count'], ['Article', 'Some'], ['Article', '1', 'Comment'],
+                      ['Article', 'Some', 'Comment'], ['Unknown'], []):
+            expected, path = findPath(root, paths, converterPath), router.findPath(paths)
+            self.assertIs(path.node, expected.node)
+            self.assertEqual([str(match) for match in path.matches], [str(match) for match in expected.matches])
+
+        self.assertIs(router.findPath(['Article', '1']).node, byId)
+        self.assertIs(router.findPath(['Article', 'Some']).node, byName)
+        self.assertIsNone(router.findPath(['Article', 'Some', 'Comment']).node)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
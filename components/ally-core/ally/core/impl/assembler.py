@@ -38,6 +38,7 @@ class AssembleBase(IAssembler):
     hintModelDomain = 'domain'
     hintCallWebName = 'webName'
     hintCallReplaceFor = 'replaceFor'
+    hintCallCache = 'cache'
 
     def __init__(self):
         '''
@@ -47,6 +48,7 @@ class AssembleBase(IAssembler):
         assert isinstance(self.hintCallWebName, str), 'Invalid hint name for call web name %s' % self.hintCallWebName
         assert isinstance(self.hintCallReplaceFor, str), \
         'Invalid hint name for call replace %s' % self.hintCallReplaceFor
+        assert isinstance(self.hintCallCache, str), 'Invalid hint name for call cache %s' % self.hintCallCache
 
         self.modelHints = {
         self.hintModelDomain: '(string) The domain where the model is registered'
@@ -59,6 +61,10 @@ class AssembleBase(IAssembler):
         self.hintCallReplaceFor: '(service API class) Used whenever a service call has the same signature with '\
         'another service call and thus require to use the same web address, this allows to explicitly dictate what'\
         'call has priority over another call by providing the class to which the call should be replaced.',
+
+        self.hintCallCache: '(integer|boolean) Used on GET calls whose rendered response can be cached, provide the '\
+        'number of seconds a cached response is valid or True to keep the cached response until a call that is not a '\
+        'GET is successfully made on the same service.',
         }
 
     def knownModelHints(self):
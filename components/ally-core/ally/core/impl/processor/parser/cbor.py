@@ -0,0 +1,296 @@
+'''
+Created on Mar 30, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the CBOR (Concise Binary Object Representation) parser processor handler.
+'''
+
+from .base import ParseBaseHandler
+from ally.container.ioc import injected
+from ally.support.util_io import IInputStream
+from collections import deque
+from struct import unpack
+import sys
+
+# --------------------------------------------------------------------
+
+MAJOR_UNSIGNED, MAJOR_NEGATIVE, MAJOR_BYTES, MAJOR_TEXT, MAJOR_ARRAY, MAJOR_MAP, MAJOR_TAG, MAJOR_SIMPLE = range(8)
+# The CBOR major types.
+INFO_INDEFINITE = 31
+# The additional information for the indefinite length items and for the break.
+
+# --------------------------------------------------------------------
+
+@injected
+class ParseCBORHandler(ParseBaseHandler):
+    '''
+    Provides the CBOR parsing, the content is decoded incrementally while read and the values are provided directly to
+    the decoder, the maps are not constructed except for the ones contained in arrays. Both the definite and indefinite
+    length items are accepted.
+    @see: ParseBaseHandler
+    '''
+
+    bufferSize = 64 * 1024
+    # The buffer size used in reading the content.
+
+    def __init__(self):
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        super().__init__()
+
+    def parse(self, decoder, data, source, charSet):
+        '''
+        @see: ParseBaseHandler.parse
+        '''
+        assert callable(decoder), 'Invalid decoder %s' % decoder
+        assert isinstance(data, dict), 'Invalid data %s' % data
+        assert isinstance(source, IInputStream), 'Invalid stream %s' % source
+
+        parse = Parse(Reader(source, self.bufferSize), decoder, data)
+        try: parse.parse()
+        except ValueError: return 'Bad cbor content'
+        except ParseError as e:
+            assert isinstance(e, ParseError)
+            return str(e)
+
+# --------------------------------------------------------------------
+
+class ParseError(Exception):
+    '''
+    Error raised whenever the decoder does not accept a CBOR value.
+    '''
+
+class Reader:
+    '''
+    Provides the CBOR items heads and content from the content stream, the content is read in chunks.
+    '''
+    __slots__ = ('source', 'bufferSize', 'buffer', 'index')
+
+    def __init__(self, source, bufferSize):
+        '''
+        Construct the reader.
+
+        @param source: IInputStream
+            The stream to read the CBOR content from.
+        @param bufferSize: integer
+            The buffer size used in reading the content.
+        '''
+        assert isinstance(source, IInputStream), 'Invalid stream %s' % source
+        assert isinstance(bufferSize, int), 'Invalid buffer size %s' % bufferSize
+
+        self.source = source
+        self.bufferSize = bufferSize
+        self.buffer = b''
+        self.index = 0
+
+    def head(self):
+        '''
+        Reads the next item head.
+
+        @return: tuple(integer, integer, integer|float|None)
+            The major type, the additional information and the argument, the argument is None for indefinite length items
+            and the break, for floats is the float value.
+        @raise ValueError:
+            In case of bad CBOR content.
+        '''
+        if self.index < len(self.buffer):
+            byte = self.buffer[self.index]
+            self.index += 1
+        else: byte = self.read(1)[0]
+
+        major, info = byte >> 5, byte & 0x1f
+        if info < 24: return major, info, info
+        if info == INFO_INDEFINITE:
+            if major in (MAJOR_UNSIGNED, MAJOR_NEGATIVE, MAJOR_TAG): raise ValueError('Invalid indefinite length')
+            return major, info, None
+        if info > 27: raise ValueError('Invalid additional information %s' % info)
+
+        if major == MAJOR_SIMPLE:
+            if info == 24: return major, self.read(1)[0], None
+            if info == 25: return major, info, decodeHalf(self.read(2))
+            if info == 26: return major, info, unpack('>f', self.read(4))[0]
+            return major, info, unpack('>d', self.read(8))[0]
+
+        if info == 24: return major, info, self.read(1)[0]
+        if info == 25: return major, info, unpack('>H', self.read(2))[0]
+        if info == 26: return major, info, unpack('>I', self.read(4))[0]
+        argument = unpack('>Q', self.read(8))[0]
+        if major in (MAJOR_BYTES, MAJOR_TEXT, MAJOR_ARRAY, MAJOR_MAP) and argument > sys.maxsize:
+            raise ValueError('Invalid length %s' % argument)
+        return major, info, argument
+
+    def read(self, count):
+        '''
+        Reads the provided number of bytes.
+
+        @param count: integer
+            The number of bytes to read, the content is read in chunks of buffer size so a large count fails only
+            when the content ends.
+        @return: bytes
+            The read bytes.
+        @raise ValueError:
+            In case there is no more content.
+        '''
+        end = self.index + count
+        if end <= len(self.buffer):
+            data = self.buffer[self.index:end]
+            self.index = end
+            return data
+
+        chunks, missing = [self.buffer[self.index:]], end - len(self.buffer)
+        while missing > 0:
+            chunk = self.source.read(self.bufferSize)
+            if not chunk: raise ValueError('Unexpected end of content')
+            chunks.append(chunk)
+            missing -= len(chunk)
+
+        self.buffer = b''.join(chunks)
+        self.index = count
+        return self.buffer[:count]
+
+    def isEnd(self):
+        '''
+        Checks if there is no more content.
+
+        @return: boolean
+            True if there is no more content, False otherwise.
+        '''
+        if self.index < len(self.buffer): return False
+        self.buffer, self.index = self.source.read(self.bufferSize), 0
+        return not self.buffer
+
+class Parse:
+    '''
+    Parser that provides the CBOR values to the decoder.
+    '''
+    __slots__ = ('reader', 'decoder', 'data', 'path')
+
+    def __init__(self, reader, decoder, data):
+        '''
+        Construct the parser.
+
+        @param reader: Reader
+            The reader that provides the CBOR items.
+        @param decoder: Callable
+            The decoder used in the parsing process.
+        @param data: dictionary{string, object}
+            The data used for the decoder.
+        '''
+        assert isinstance(reader, Reader), 'Invalid reader %s' % reader
+        assert callable(decoder), 'Invalid decoder %s' % decoder
+        assert isinstance(data, dict), 'Invalid data %s' % data
+
+        self.reader = reader
+        self.decoder = decoder
+        self.data = data
+        self.path = deque()
+
+    def parse(self):
+        '''
+        Parse the CBOR content.
+
+        @raise ValueError:
+            In case of bad CBOR content.
+        @raise ParseError:
+            In case the decoder does not accept a value.
+        '''
+        self.parseValue(self.reader.head())
+        if not self.reader.isEnd(): raise ValueError('Extra data')
+
+    def parseValue(self, head):
+        '''
+        Parse the value for the provided item head, only the text, null and array values are provided to the decoder.
+        '''
+        major, _info, argument = head
+        while major == MAJOR_TAG: major, _info, argument = head = self.reader.head()
+
+        if major == MAJOR_MAP:
+            count = argument
+            while count is None or count > 0:
+                head = self.reader.head()
+                if count is None:
+                    if isBreak(head): return
+                else: count -= 1
+
+                key = self.buildValue(head)
+                if not isinstance(key, str): raise ValueError('Expected text key')
+
+                self.path.append(key)
+                self.parseValue(self.reader.head())
+                self.path.pop()
+            return
+
+        value = self.buildValue(head)
+        if value is None or isinstance(value, (str, list)):
+            if not self.decoder(path=deque(self.path), value=value, **self.data):
+                raise ParseError('Invalid path \'%s\' in object' % '/'.join(self.path))
+
+    def buildValue(self, head):
+        '''
+        Builds the value for the provided item head.
+        '''
+        major, info, argument = head
+        if major == MAJOR_UNSIGNED: return argument
+        if major == MAJOR_NEGATIVE: return -1 - argument
+        if major == MAJOR_BYTES or major == MAJOR_TEXT:
+            if argument is not None: value = self.reader.read(argument)
+            else:
+                chunks = []
+                while True:
+                    chunk = self.reader.head()
+                    if isBreak(chunk): break
+                    if chunk[0] != major or chunk[2] is None: raise ValueError('Invalid string chunk')
+                    chunks.append(self.reader.read(chunk[2]))
+                value = b''.join(chunks)
+            if major == MAJOR_TEXT: return value.decode('utf-8')
+            return value
+        if major == MAJOR_ARRAY:
+            value = []
+            if argument is None:
+                while True:
+                    head = self.reader.head()
+                    if isBreak(head): return value
+                    value.append(self.buildValue(head))
+            for _k in range(argument): value.append(self.buildValue(self.reader.head()))
+            return value
+        if major == MAJOR_MAP:
+            value = {}
+            count = argument
+            while count is None or count > 0:
+                head = self.reader.head()
+                if count is None:
+                    if isBreak(head): return value
+                else: count -= 1
+                key = self.buildValue(head)
+                try: value[key] = self.buildValue(self.reader.head())
+                except TypeError: raise ValueError('Invalid key %s' % key)
+            return value
+        if major == MAJOR_TAG: return self.buildValue(self.reader.head())
+
+        if info == 20: return False
+        if info == 21: return True
+        if info == 22 or info == 23: return None
+        if 25 <= info <= 27: return argument
+        raise ValueError('Unexpected simple value %s' % info)
+
+# --------------------------------------------------------------------
+
+def isBreak(head):
+    '''
+    Checks if the item head is a break.
+    '''
+    return head[0] == MAJOR_SIMPLE and head[1] == INFO_INDEFINITE
+
+def decodeHalf(data):
+    '''
+    Decodes the half precision float.
+    '''
+    half = unpack('>H', data)[0]
+    exponent, mantissa = (half >> 10) & 0x1f, half & 0x3ff
+    if exponent == 0: value = mantissa * 2 ** -24
+    elif exponent == 0x1f: value = float('nan') if mantissa else float('inf')
+    else: value = (mantissa + 1024) * 2 ** (exponent - 25)
+    return -value if half & 0x8000 else value
@@ -0,0 +1,251 @@
+'''
+Created on Mar 28, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the JSON streaming parser processor handler.
+'''
+
+from .base import ParseBaseHandler
+from ally.container.ioc import injected
+from ally.support.util_io import IInputStream
+from collections import deque
+from json.decoder import scanstring, WHITESPACE
+from json.scanner import NUMBER_RE
+import codecs
+
+# --------------------------------------------------------------------
+
+@injected
+class ParseJSONHandler(ParseBaseHandler):
+    '''
+    Provides the JSON parsing, the content is tokenized incrementally while read and the values are provided directly
+    to the decoder, the JSON objects are not constructed except for the values of the JSON arrays.
+    @see: ParseBaseHandler
+    '''
+
+    bufferSize = 64 * 1024
+    # The buffer size used in reading the content.
+
+    def __init__(self):
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        super().__init__()
+
+    def parse(self, decoder, data, source, charSet):
+        '''
+        @see: ParseBaseHandler.parse
+        '''
+        assert callable(decoder), 'Invalid decoder %s' % decoder
+        assert isinstance(data, dict), 'Invalid data %s' % data
+        assert isinstance(source, IInputStream), 'Invalid stream %s' % source
+        assert isinstance(charSet, str), 'Invalid character set %s' % charSet
+
+        parse = Parse(Tokenizer(source, charSet, self.bufferSize), decoder, data)
+        try: parse.parse()
+        except ValueError: return 'Bad json content'
+        except ParseError as e:
+            assert isinstance(e, ParseError)
+            return str(e)
+
+# --------------------------------------------------------------------
+
+class ParseError(Exception):
+    '''
+    Error raised whenever the decoder does not accept a JSON value.
+    '''
+
+class Tokenizer:
+    '''
+    Provides the JSON tokens from the content stream, the content is read and decoded in chunks.
+    '''
+    __slots__ = ('source', 'decoder', 'bufferSize', 'buffer', 'index', 'finalized')
+
+    def __init__(self, source, charSet, bufferSize):
+        '''
+        Construct the tokenizer.
+
+        @param source: IInputStream
+            The stream to read the JSON content from.
+        @param charSet: string
+            The character set of the content.
+        @param bufferSize: integer
+            The buffer size used in reading the content.
+        '''
+        assert isinstance(source, IInputStream), 'Invalid stream %s' % source
+        assert isinstance(bufferSize, int), 'Invalid buffer size %s' % bufferSize
+
+        self.source = source
+        self.decoder = codecs.getincrementaldecoder(charSet)()
+        self.bufferSize = bufferSize
+        self.buffer = ''
+        self.index = 0
+        self.finalized = False
+
+    def next(self):
+        '''
+        Provides the next token.
+
+        @return: tuple(string, object)|None
+            The token as a tuple containing the punctuation character and None or an empty string and the JSON value,
+            None if there is no more content.
+        @raise ValueError:
+            In case of bad JSON content.
+        '''
+        while True:
+            self.index = WHITESPACE.match(self.buffer, self.index).end()
+            if self.index < len(self.buffer): break
+            if not self.read(): return None
+
+        char = self.buffer[self.index]
+        if char in '{}[]:,':
+            self.index += 1
+            return char, None
+
+        if char == '"':
+            while True:
+                try: value, self.index = scanstring(self.buffer, self.index + 1, True)
+                except ValueError:
+                    if not self.read(): raise
+                else: return '', value
+
+        while True:
+            match = NUMBER_RE.match(self.buffer, self.index)
+            if match is None:
+                if len(self.buffer) - self.index < 5 and self.read(): continue
+                break
+            # A number that is close to the buffer end might continue with a fraction or exponent.
+            if len(self.buffer) - match.end() < 3 and self.read(): continue
+            integer, fraction, exponent = match.groups()
+            self.index = match.end()
+            if fraction or exponent: return '', float(integer + (fraction or '') + (exponent or ''))
+            return '', int(integer)
+
+        for literal, value in (('null', None), ('true', True), ('false', False)):
+            if self.buffer.startswith(literal, self.index):
+                self.index += len(literal)
+                return '', value
+
+        raise ValueError('Invalid JSON content at \'%s\'' % self.buffer[self.index:self.index + 10])
+
+    def read(self):
+        '''
+        Reads the next chunk of content into the buffer, the already tokenized content is removed from the buffer.
+
+        @return: boolean
+            True if content has been read, False if there is no more content.
+        '''
+        while not self.finalized:
+            data = self.source.read(self.bufferSize)
+            if data: text = self.decoder.decode(data)
+            else:
+                text = self.decoder.decode(b'', True)
+                self.finalized = True
+            if text:
+                self.buffer = self.buffer[self.index:] + text
+                self.index = 0
+                return True
+        return False
+
+class Parse:
+    '''
+    Parser that provides the JSON values to the decoder.
+    '''
+    __slots__ = ('tokenizer', 'decoder', 'data', 'path')
+
+    def __init__(self, tokenizer, decoder, data):
+        '''
+        Construct the parser.
+
+        @param tokenizer: Tokenizer
+            The tokenizer that provides the JSON tokens.
+        @param decoder: Callable
+            The decoder used in the parsing process.
+        @param data: dictionary{string, object}
+            The data used for the decoder.
+        '''
+        assert isinstance(tokenizer, Tokenizer), 'Invalid tokenizer %s' % tokenizer
+        assert callable(decoder), 'Invalid decoder %s' % decoder
+        assert isinstance(data, dict), 'Invalid data %s' % data
+
+        self.tokenizer = tokenizer
+        self.decoder = decoder
+        self.data = data
+        self.path = deque()
+
+    def parse(self):
+        '''
+        Parse the JSON content.
+
+        @raise ValueError:
+            In case of bad JSON content.
+        @raise ParseError:
+            In case the decoder does not accept a value.
+        '''
+        self.parseValue(self.expect())
+        if self.tokenizer.next() is not None: raise ValueError('Extra data')
+
+    def parseValue(self, token):
+        '''
+        Parse the value for the provided token, only the string, null and array values are provided to the decoder.
+        '''
+        kind, value = token
+        if kind == '{':
+            kind, key = self.expect()
+            if kind == '}': return
+            while True:
+                if kind != '' or not isinstance(key, str): raise ValueError('Expected property name')
+                if self.expect()[0] != ':': raise ValueError('Expected \':\'')
+
+                self.path.append(key)
+                self.parseValue(self.expect())
+                self.path.pop()
+
+                kind, _value = self.expect()
+                if kind == '}': return
+                if kind != ',': raise ValueError('Expected \',\' or \'}\'')
+                kind, key = self.expect()
+
+        if kind == '[': value = self.buildValue(token)
+        elif kind != '': raise ValueError('Unexpected \'%s\'' % kind)
+        if value is None or isinstance(value, (str, list)):
+            if not self.decoder(path=deque(self.path), value=value, **self.data):
+                raise ParseError('Invalid path \'%s\' in object' % '/'.join(self.path))
+
+    def buildValue(self, token):
+        '''
+        Builds the value for the provided token.
+        '''
+        kind, value = token
+        if kind == '': return value
+        if kind == '[':
+            value, token = [], self.expect()
+            if token[0] == ']': return value
+            while True:
+                value.append(self.buildValue(token))
+                kind, _value = self.expect()
+                if kind == ']': return value
+                if kind != ',': raise ValueError('Expected \',\' or \']\'')
+                token = self.expect()
+        if kind == '{':
+            value, (kind, key) = {}, self.expect()
+            if kind == '}': return value
+            while True:
+                if kind != '' or not isinstance(key, str): raise ValueError('Expected property name')
+                if self.expect()[0] != ':': raise ValueError('Expected \':\'')
+                value[key] = self.buildValue(self.expect())
+                kind, _value = self.expect()
+                if kind == '}': return value
+                if kind != ',': raise ValueError('Expected \',\' or \'}\'')
+                kind, key = self.expect()
+        raise ValueError('Unexpected \'%s\'' % kind)
+
+    def expect(self):
+        '''
+        Provides the next token, the content is expected to have more tokens.
+        '''
+        token = self.tokenizer.next()
+        if token is None: raise ValueError('Unexpected end of content')
+        return token
@@ -0,0 +1,70 @@
+'''
+Created on Mar 29, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the XML parser processor handler based on the lxml iterative parsing.
+'''
+
+from .base import ParseBaseHandler
+from ally.container.ioc import injected
+from ally.support.util_io import IInputStream
+from collections import deque
+from lxml.etree import iterparse, XMLSyntaxError
+
+# --------------------------------------------------------------------
+
+@injected
+class ParseLXMLHandler(ParseBaseHandler):
+    '''
+    Provides the XML parsing with the lxml iterative parsing, the parsed elements are cleared as soon as they are
+    processed so the document tree is never kept in memory.
+    @see: ParseBaseHandler
+    '''
+
+    def parse(self, decoder, data, source, charSet):
+        '''
+        @see: ParseBaseHandler.parse
+        '''
+        assert callable(decoder), 'Invalid decoder %s' % decoder
+        assert isinstance(data, dict), 'Invalid data %s' % data
+        assert isinstance(source, IInputStream), 'Invalid stream %s' % source
+        assert isinstance(charSet, str), 'Invalid character set %s' % charSet
+
+        path = deque()
+        try:
+            for event, element in iterparse(source, events=('start', 'end'), encoding=charSet, remove_comments=True,
+                                             remove_pis=True, resolve_entities=False):
+                if event == 'start':
+                    if element.attrib: return 'No attributes accepted for \'%s\' at line %s' % \
+                        ('/'.join(path), element.sourceline)
+
+                    parent = element.getparent()
+                    if parent is not None:
+                        previous = element.getprevious()
+                        if previous is None: content = parent.text
+                        else:
+                            content = previous.tail
+                            del parent[0]  # The previous element is processed
+                        if content and content.strip():
+                            return 'Invalid value \'%s\' for element \'%s\' at line %s' % \
+                                (content.strip(), parent.tag, element.sourceline)
+                    path.append(element.tag)
+                    continue
+
+                if len(element):
+                    content = element[-1].tail
+                    if content and content.strip():
+                        return 'Invalid value \'%s\' for element \'%s\' at line %s' % \
+                            (content.strip(), element.tag, element.sourceline)
+                    del element[0]  # The last element is processed
+                elif not decoder(path=deque(path), value=element.text or '', **data):
+                    return 'Invalid path \'%s\' at line %s' % ('/'.join(path), element.sourceline)
+                else: element.text = None
+                path.pop()
+        except XMLSyntaxError as e:
+            assert isinstance(e, XMLSyntaxError)
+            return 'Bad XML content at line %s and column %s' % e.position
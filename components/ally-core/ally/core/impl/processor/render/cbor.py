@@ -0,0 +1,217 @@
+'''
+Created on Mar 30, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the CBOR (Concise Binary Object Representation) encoder processor handler.
+'''
+
+from .base import RenderBaseHandler
+from ally.container.ioc import injected
+from ally.core.spec.transform.render import IRender
+from ally.support.util_io import IOutputStream
+from struct import pack
+
+# --------------------------------------------------------------------
+
+MAJOR_TEXT = 0x60
+# The CBOR major type for UTF-8 text strings.
+MAP_START = b'\xbf'
+# The CBOR start of a map with indefinite length.
+ARRAY_START = b'\x9f'
+# The CBOR start of an array with indefinite length.
+BREAK = b'\xff'
+# The CBOR end of a map or array with indefinite length.
+
+# --------------------------------------------------------------------
+
+@injected
+class RenderCBORHandler(RenderBaseHandler):
+    '''
+    Provides the CBOR encoding, the character set is not used since the CBOR text strings are always UTF-8.
+    @see: RenderBaseHandler
+    '''
+
+    bufferSize = 4096
+    # The number of bytes collected by the renderer before writing them to the output, should be in concordance
+    # with the response chuncks size and the server socket buffer.
+    namesSize = 1000
+    # The maximum number of encoded names shared between the renders, once reached the other names are encoded every
+    # time, this bounds the cache for the names that are keys of the rendered dictionaries.
+
+    def __init__(self):
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        assert isinstance(self.namesSize, int), 'Invalid names size %s' % self.namesSize
+        super().__init__()
+
+        self._names = {}
+
+    def renderFactory(self, charSet, output):
+        '''
+        @see: RenderBaseHandler.renderFactory
+        '''
+        assert isinstance(output, IOutputStream), 'Invalid content output stream %s' % output
+
+        return RenderCBOR(output, self._names, self.bufferSize, self.namesSize)
+
+# --------------------------------------------------------------------
+
+class RenderCBOR(IRender):
+    '''
+    Renderer for CBOR, the objects and collections are rendered as indefinite length maps and arrays so each event is
+    encoded as it occurs, the structure is the same as for JSON. The content is collected in a buffer that is written to
+    the output whenever the buffer size is exceeded or the root object ends.
+    '''
+    __slots__ = ('output', 'names', 'bufferSize', 'namesSize', 'buffer', 'isObject')
+
+    def __init__(self, output, names=None, bufferSize=4096, namesSize=1000):
+        '''
+        Construct the CBOR renderer.
+
+        @param output: IOutputStream
+            The output stream to write the CBOR to.
+        @param names: dictionary{string: bytes}|None
+            The cache of encoded names that can be shared between renders.
+        @param bufferSize: integer
+            The number of bytes to collect before writing to the output.
+        @param namesSize: integer
+            The maximum number of encoded names to cache.
+        '''
+        assert isinstance(output, IOutputStream), 'Invalid output stream %s' % output
+        assert names is None or isinstance(names, dict), 'Invalid names %s' % names
+        assert isinstance(bufferSize, int), 'Invalid buffer size %s' % bufferSize
+        assert isinstance(namesSize, int), 'Invalid names size %s' % namesSize
+
+        self.output = output
+        self.names = {} if names is None else names
+        self.bufferSize = bufferSize
+        self.namesSize = namesSize
+        self.buffer = bytearray()
+        self.isObject = []
+
+    def value(self, name, value):
+        '''
+        @see: IRender.value
+        '''
+        assert self.isObject, 'No container for value'
+        assert isinstance(name, str), 'Invalid name %s' % name
+        assert isinstance(value, str), 'Invalid value %s' % value
+
+        buffer = self.buffer
+        if self.isObject[-1]: buffer += self.names.get(name) or self.nameToken(name)
+        content = value.encode('utf-8', 'replace')
+        if len(content) < 24: buffer.append(MAJOR_TEXT | len(content))
+        else: buffer += encodeHead(MAJOR_TEXT, len(content))
+        buffer += content
+
+    def objectStart(self, name, attributes=None):
+        '''
+        @see: IRender.objectStart
+        '''
+        self.openObject(name, attributes)
+        self.isObject.append(True)
+
+    def objectEnd(self):
+        '''
+        @see: IRender.objectEnd
+        '''
+        assert self.isObject, 'No object to end'
+        isObject = self.isObject.pop()
+        assert isObject, 'No object to end'
+
+        self.buffer += BREAK
+        self.closeObject()
+
+    def collectionStart(self, name, attributes=None):
+        '''
+        @see: IRender.collectionStart
+        '''
+        self.openObject(name, attributes)
+        self.buffer += self.names.get(name) or self.nameToken(name)
+        self.buffer += ARRAY_START
+        self.isObject.append(False)
+
+    def collectionEnd(self):
+        '''
+        @see: IRender.collectionEnd
+        '''
+        assert self.isObject, 'No collection to end'
+        isObject = self.isObject.pop()
+        assert not isObject, 'No collection to end'
+
+        self.buffer += BREAK
+        self.buffer += BREAK
+        self.closeObject()
+
+    # ----------------------------------------------------------------
+
+    def nameToken(self, name):
+        '''
+        Provides the encoded name for an object entry.
+        '''
+        token = self.names.get(name)
+        if token is None:
+            token = encodeText(name)
+            if len(self.names) < self.namesSize: self.names[name] = token
+        return token
+
+    def openObject(self, name, attributes=None):
+        '''
+        Used to open a CBOR map.
+        '''
+        assert isinstance(name, str), 'Invalid name %s' % name
+        assert attributes is None or isinstance(attributes, dict), 'Invalid attributes %s' % attributes
+
+        buffer = self.buffer
+        if self.isObject and self.isObject[-1]: buffer += self.names.get(name) or self.nameToken(name)
+        buffer += MAP_START
+        if attributes:
+            for attrName, attrValue in attributes.items():
+                assert isinstance(attrName, str), 'Invalid attribute name %s' % attrName
+                assert isinstance(attrValue, str), 'Invalid attribute value %s' % attrValue
+
+                buffer += self.names.get(attrName) or self.nameToken(attrName)
+                buffer += encodeText(attrValue)
+
+    def closeObject(self):
+        '''
+        Used after a CBOR map is closed in order to write the buffer to the output if is the case.
+        '''
+        if self.isObject and len(self.buffer) < self.bufferSize: return
+
+        if self.buffer: self.output.write(bytes(self.buffer))
+        self.buffer = bytearray()
+
+# --------------------------------------------------------------------
+
+def encodeHead(major, length):
+    '''
+    Encodes the CBOR head for the major type and length.
+
+    @param major: integer
+        The major type, already shifted in the high bits.
+    @param length: integer
+        The length or value to be encoded in the head.
+    @return: bytes
+        The encoded head.
+    '''
+    if length < 24: return bytes((major | length,))
+    if length < 0x100: return bytes((major | 24, length))
+    if length < 0x10000: return pack('>BH', major | 25, length)
+    if length < 0x100000000: return pack('>BI', major | 26, length)
+    return pack('>BQ', major | 27, length)
+
+def encodeText(text):
+    '''
+    Encodes the text as a CBOR text string.
+
+    @param text: string
+        The text to encode.
+    @return: bytes
+        The encoded text.
+    '''
+    content = text.encode('utf-8', 'replace')
+    return encodeHead(MAJOR_TEXT, len(content)) + content
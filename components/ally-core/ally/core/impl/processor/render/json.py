@@ -13,8 +13,7 @@ from .base import RenderBaseHandler
 from ally.container.ioc import injected
 from ally.core.spec.transform.render import IRender
 from ally.support.util_io import IOutputStream
-from codecs import getwriter
-from collections import deque
+from codecs import getincrementalencoder
 from json.encoder import encode_basestring
 
 # --------------------------------------------------------------------
@@ -28,11 +27,21 @@ class RenderJSONHandler(RenderBaseHandler):
 
     encodingError = 'backslashreplace'
     # The encoding error resolving.
+    bufferSize = 4096
+    # The number of characters collected by the renderer before writing them to the output, should be in concordance
+    # with the response chuncks size and the server socket buffer.
+    namesSize = 1000
+    # The maximum number of encoded names shared between the renders, once reached the other names are encoded every
+    # time, this bounds the cache for the names that are keys of the rendered dictionaries.
 
     def __init__(self):
         assert isinstance(self.encodingError, str), 'Invalid string %s' % self.encodingError
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        assert isinstance(self.namesSize, int), 'Invalid names size %s' % self.namesSize
         super().__init__()
 
+        self._names = {}
+
     def renderFactory(self, charSet, output):
         '''
         @see: RenderBaseHandler.renderFactory
@@ -40,27 +49,48 @@ class RenderJSONHandler(RenderBaseHandler):
         assert isinstance(charSet, str), 'Invalid char set %s' % charSet
         assert isinstance(output, IOutputStream), 'Invalid content output stream %s' % output
 
-        return RenderJSON(getwriter(charSet)(output, self.encodingError))
+        return RenderJSON(output, getincrementalencoder(charSet)(self.encodingError), self._names, self.bufferSize,
+                          self.namesSize)
 
 # --------------------------------------------------------------------
 
 class RenderJSON(IRender):
     '''
-    Renderer for JSON.
+    Renderer for JSON, the JSON text is collected in a buffer that is encoded and written to the output whenever the
+    buffer size is exceeded or the root object ends.
     '''
-    __slots__ = ('out', 'isObject', 'isFirst')
+    __slots__ = ('output', 'encoder', 'names', 'bufferSize', 'namesSize', 'buffer', 'size', 'isObject', 'isFirst')
 
-    def __init__(self, out):
+    def __init__(self, output, encoder, names=None, bufferSize=4096, namesSize=1000):
         '''
-        Construct the text object renderer.
+        Construct the JSON renderer.
         
-        @param out: file writer
-            The writer to place the JSON.
-        '''
-        assert out, 'Invalid JSON output stream %s' % out
-
-        self.out = out
-        self.isObject = deque()
+        @param output: IOutputStream
+            The output stream to write the JSON to.
+        @param encoder: IncrementalEncoder
+            The encoder used for converting the JSON text to bytes.
+        @param names: dictionary{string: tuple(string, string)}|None
+            The cache of encoded names tokens that can be shared between renders, as a value the name token for the
+            first entry in an object and the name token for the next entries.
+        @param bufferSize: integer
+            The number of characters to collect before writing to the output.
+        @param namesSize: integer
+            The maximum number of names tokens to cache.
+        '''
+        assert isinstance(output, IOutputStream), 'Invalid output stream %s' % output
+        assert encoder is not None, 'Invalid encoder %s' % encoder
+        assert names is None or isinstance(names, dict), 'Invalid names %s' % names
+        assert isinstance(bufferSize, int), 'Invalid buffer size %s' % bufferSize
+        assert isinstance(namesSize, int), 'Invalid names size %s' % namesSize
+
+        self.output = output
+        self.encoder = encoder
+        self.names = {} if names is None else names
+        self.bufferSize = bufferSize
+        self.namesSize = namesSize
+        self.buffer = []
+        self.size = 0
+        self.isObject = []
         self.isFirst = True
 
     def value(self, name, value):
@@ -70,82 +100,100 @@ class RenderJSON(IRender):
         assert self.isObject, 'No container for value'
         assert isinstance(name, str), 'Invalid name %s' % name
         assert isinstance(value, str), 'Invalid value %s' % value
-        out = self.out
 
-        if self.isFirst: self.isFirst = False
-        else: out.write(',')
-        if self.isObject[0]:
-            out.write(encode_basestring(name))
-            out.write(':')
-            out.write(encode_basestring(value))
-        else: out.write(encode_basestring(value))
+        if self.isObject[-1]: self.buffer.append(self.nameToken(name))
+        elif self.isFirst: self.isFirst = False
+        else: self.buffer.append(',')
+        self.buffer.append(encode_basestring(value))
+        self.size += len(name) + len(value)
 
     def objectStart(self, name, attributes=None):
         '''
         @see: IRender.objectStart
         '''
         self.openObject(name, attributes)
-        self.isObject.appendleft(True)
+        self.isObject.append(True)
 
     def objectEnd(self):
         '''
         @see: IRender.objectEnd
         '''
         assert self.isObject, 'No object to end'
-        isObject = self.isObject.popleft()
+        isObject = self.isObject.pop()
         assert isObject, 'No object to end'
 
-        self.out.write('}')
+        self.isFirst = False
+        self.buffer.append('}')
+        self.closeObject()
 
     def collectionStart(self, name, attributes=None):
         '''
         @see: IRender.collectionStart
         '''
         assert isinstance(name, str), 'Invalid name %s' % name
-        out = self.out
 
         self.openObject(name, attributes)
-        if not self.isFirst: out.write(',')
-        out.write(encode_basestring(name))
-        out.write(':[')
+        self.buffer.append(self.nameToken(name))
+        self.buffer.append('[')
         self.isFirst = True
-        self.isObject.appendleft(False)
+        self.isObject.append(False)
 
     def collectionEnd(self):
         '''
         @see: IRender.collectionEnd
         '''
         assert self.isObject, 'No collection to end'
-        isObject = self.isObject.popleft()
+        isObject = self.isObject.pop()
         assert not isObject, 'No collection to end'
 
-        self.out.write(']}')
+        self.isFirst = False
+        self.buffer.append(']}')
+        self.closeObject()
 
     # ----------------------------------------------------------------
 
+    def nameToken(self, name):
+        '''
+        Provides the name token for an object entry, this also handles the entries separator.
+        '''
+        tokens = self.names.get(name)
+        if tokens is None:
+            token = '%s:' % encode_basestring(name)
+            tokens = (token, ',%s' % token)
+            if len(self.names) < self.namesSize: self.names[name] = tokens
+        if self.isFirst:
+            self.isFirst = False
+            return tokens[0]
+        return tokens[1]
+
     def openObject(self, name, attributes=None):
         '''
         Used to open a JSON object.
         '''
         assert isinstance(name, str), 'Invalid name %s' % name
         assert attributes is None or isinstance(attributes, dict), 'Invalid attributes %s' % attributes
-        out = self.out
+        buffer = self.buffer
 
-        if not self.isFirst: out.write(',')
+        if self.isObject and self.isObject[-1]: buffer.append(self.nameToken(name))
+        elif not self.isFirst: buffer.append(',')
 
-        if self.isObject and self.isObject[0]:
-            out.write(encode_basestring(name))
-            out.write(':')
-
-        out.write('{')
+        buffer.append('{')
         self.isFirst = True
         if attributes:
             for attrName, attrValue in attributes.items():
                 assert isinstance(attrName, str), 'Invalid attribute name %s' % attrName
                 assert isinstance(attrValue, str), 'Invalid attribute value %s' % attrValue
 
-                if self.isFirst: self.isFirst = False
-                else: out.write(',')
-                out.write(encode_basestring(attrName))
-                out.write(':')
-                out.write(encode_basestring(attrValue))
+                buffer.append(self.nameToken(attrName))
+                buffer.append(encode_basestring(attrValue))
+
+    def closeObject(self):
+        '''
+        Used after a JSON object is closed in order to write the buffer to the output if is the case.
+        '''
+        if self.isObject and self.size < self.bufferSize: return
+
+        content = self.encoder.encode(''.join(self.buffer), not self.isObject)
+        if content: self.output.write(content)
+        self.buffer = []
+        self.size = 0
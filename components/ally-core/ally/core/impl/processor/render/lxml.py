@@ -0,0 +1,132 @@
+'''
+Created on Mar 29, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the XML encoder processor handler based on the lxml incremental writer.
+'''
+
+from .base import RenderBaseHandler
+from ally.container.ioc import injected
+from ally.core.spec.transform.render import IRender
+from ally.support.util_io import IOutputStream
+from collections import deque
+from lxml.etree import xmlfile, Element, SubElement
+
+# --------------------------------------------------------------------
+
+@injected
+class RenderLXMLHandler(RenderBaseHandler):
+    '''
+    Provides the XML encoding with the lxml incremental writer.
+    @see: RenderBaseHandler
+    '''
+
+    def renderFactory(self, charSet, output):
+        '''
+        @see: RenderBaseHandler.renderFactory
+        '''
+        assert isinstance(charSet, str), 'Invalid char set %s' % charSet
+        assert isinstance(output, IOutputStream), 'Invalid content output stream %s' % output
+
+        return RenderLXML(xmlfile(output, encoding=charSet))
+
+# --------------------------------------------------------------------
+
+class RenderLXML(IRender):
+    '''
+    Renderer for xml with the lxml incremental writer, the characters that cannot be encoded are written as character
+    references. The root element is written incrementally, the elements inside the root element are built as element
+    trees and written as soon as they are completed.
+    '''
+    __slots__ = ('xmlfile', 'xml', 'root', 'processing')
+
+    def __init__(self, xmlfile):
+        '''
+        Construct the XML object renderer.
+
+        @param xmlfile: lxml.etree.xmlfile
+            The lxml incremental file writer used to render the xml.
+        '''
+        assert xmlfile is not None, 'A xml file writer is required'
+
+        self.xmlfile = xmlfile
+        self.xml = None
+        self.root = None
+        self.processing = deque()
+
+    def value(self, name, value):
+        '''
+        @see: IRender.value
+        '''
+        if len(self.processing) > 1: SubElement(self.processing[-1], name).text = value
+        else:
+            element = Element(name)
+            element.text = value
+            self.openRoot().write(element)
+
+    def objectStart(self, name, attributes=None):
+        '''
+        @see: IRender.objectStart
+        '''
+        self.openElement(name, attributes)
+
+    def objectEnd(self):
+        '''
+        @see: IRender.objectEnd
+        '''
+        assert self.processing, 'No object to end'
+        self.closeElement()
+
+    def collectionStart(self, name, attributes=None):
+        '''
+        @see: IRender.collectionStart
+        '''
+        self.openElement(name, attributes)
+
+    def collectionEnd(self):
+        '''
+        @see: IRender.collectionEnd
+        '''
+        assert self.processing, 'No collection to end'
+        self.closeElement()
+
+    # ----------------------------------------------------------------
+
+    def openElement(self, name, attributes):
+        '''
+        Opens an element, the document is started if there is no other element opened.
+        '''
+        if not self.processing:
+            self.xml = self.xmlfile.__enter__()
+            self.xml.write_declaration()
+            self.processing.append(Element(name, attributes))
+        elif len(self.processing) == 1: self.processing.append(Element(name, attributes))
+        else: self.processing.append(SubElement(self.processing[-1], name, attributes))
+
+    def closeElement(self):
+        '''
+        Closes the last opened element, the document is closed if there are no other elements opened.
+        '''
+        element = self.processing.pop()
+        if len(self.processing) == 1: self.openRoot().write(element)
+        elif not self.processing:
+            if self.root is None: self.xml.write(element)
+            else: self.root.__exit__(None, None, None)
+            self.xmlfile.__exit__(None, None, None)  # Flushes the document content
+
+    def openRoot(self):
+        '''
+        Opens the root element for writing the elements contained.
+
+        @return: object
+            The lxml incremental writer.
+        '''
+        if self.root is None:
+            root = self.processing[0]
+            self.root = self.xml.element(root.tag, root.attrib)
+            self.root.__enter__()
+        return self.xml
@@ -16,7 +16,7 @@ from ally.api.type import typeFor, Input
 from ally.core.impl.invoker import InvokerRestructuring, InvokerCall
 from ally.core.impl.node import NodePath, NodeProperty, MatchProperty
 from ally.core.spec.resources import Match, Node, Path, ConverterPath, \
-    IResourcesRegister, Invoker, PathExtended
+    IResourcesRegister, Invoker, PathExtended, INodeChildListener
 from ally.support.util import immut
 from collections import deque, Iterable
 
@@ -135,6 +135,128 @@ def findPath(node, paths, converterPath):
 
     return Path(matches)
 
+class PathRouter(INodeChildListener):
+    '''
+    Provides the compiled routing index for a resource node tree, for each node the path children are indexed by their
+    normalized name and the property children are kept in typed slots, so finding a path does not depend on the number
+    of children a node has. The index is kept up to date by listening to the children added in the tree structure.
+    '''
+
+    def __init__(self, root, converterPath):
+        '''
+        Construct the router.
+        
+        @param root: Node
+            The root node of the tree to route.
+        @param converterPath: ConverterPath
+            The converter path used in handling the path elements.
+        @ivar changes: integer
+            The number of structure updates of the router, it changes whenever a node is added to the tree.
+        @ivar literals: frozenset(string)
+            The normalized names of all the path nodes in the tree.
+        '''
+        assert isinstance(root, Node), 'Invalid root node %s' % root
+        assert isinstance(converterPath, ConverterPath), 'Invalid converter path %s' % converterPath
+        self.root = root
+        self.converterPath = converterPath
+        self.changes = 0
+        self.literals = frozenset()
+        self._indexes = {}
+        self._update(root)
+        # The structure listeners are kept as weak references so the router needs to be kept by the user.
+        root.addStructureListener(self)
+
+    def onChildAdded(self, node, child):
+        '''
+        @see: INodeChildListener.onChildAdded
+        '''
+        self._update(child, node)
+
+    def findPath(self, paths):
+        '''
+        Finds the resource node for the provided request path, the result is the same as for the "findPath" function.
+        
+        @param paths: deque[string]|Iterable[string]
+            A deque of string path elements identifying a resource to be searched for, this list will be consumed 
+            of every path element that was successfully identified.
+        @return: Path
+            The path leading to the node that provides the resource if the Path has no node it means that the paths
+            have been recognized only to certain point.
+        '''
+        if not isinstance(paths, deque):
+            assert isinstance(paths, Iterable), 'Invalid iterable paths %s' % paths
+            paths = deque(paths)
+        assert isinstance(paths, deque), 'Invalid paths %s' % paths
+
+        node = self.root
+        if len(paths) == 0: return Path([], node)
+
+        matches, indexes, converterPath = [], self._indexes, self.converterPath
+        found = pushMatch(matches, node.tryMatch(converterPath, paths))
+        while found and len(paths) > 0:
+            found = False
+            literals, typed, others = indexes[node]
+            child = literals.get(paths[0])
+            if child is not None:
+                del paths[0]
+                matches.append(child.newMatch())
+                node, found = child, True
+                continue
+
+            for child, typ in typed:
+                try: value = converterPath.asValue(paths[0], typ)
+                except ValueError: continue
+                del paths[0]
+                matches.append(MatchProperty(child, value))
+                node, found = child, True
+                break
+            else:
+                for child in others:
+                    if pushMatch(matches, child.tryMatch(converterPath, paths)):
+                        node, found = child, True
+                        break
+
+        if len(paths) == 0: return Path(matches, node)
+
+        return Path(matches)
+
+    # ----------------------------------------------------------------
+
+    def _update(self, node, parent=None):
+        '''
+        Updates the indexes for the provided node structure and parent node.
+        '''
+        indexes = dict(self._indexes)  # We replace the indexes in order not to disturb a concurrent routing.
+        literals = set(self.literals)
+        for k in iterateNodes(node):
+            indexes[k] = self._indexFor(k)
+            if isinstance(k, NodePath): literals.add(self.converterPath.normalize(k.name))
+        if parent is not None: indexes[parent] = self._indexFor(parent)
+        self._indexes, self.literals = indexes, frozenset(literals)
+        self.changes += 1
+
+    def _indexFor(self, node):
+        '''
+        Provides the index for the node children.
+        
+        @return: tuple(dictionary{string: NodePath}, tuple(tuple(NodeProperty, Type)), tuple(Node))
+            The path children indexed by normalized name, the property children with the type to convert the path
+            element to and the children that can only be matched by themselves, all in the children order.
+        '''
+        assert isinstance(node, Node), 'Invalid node %s' % node
+        literals, typed, others = {}, [], []
+        for child in node.children:
+            if isinstance(child, NodePath) and not others and not typed:
+                assert isinstance(child, NodePath)
+                literals.setdefault(self.converterPath.normalize(child.name), child)
+            elif isinstance(child, NodeProperty) and not others:
+                assert isinstance(child, NodeProperty)
+                typed.append((child, child.type))
+            else: others.append(child)
+        return literals, tuple(typed), tuple(others)
+
+# --------------------------------------------------------------------
+
 def findGetModel(fromPath, typeModel):
     '''
     Finds the path for the first Node that provides a get for the name. The search is made based
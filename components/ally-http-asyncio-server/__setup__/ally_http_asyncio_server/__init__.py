@@ -0,0 +1,19 @@
+'''
+Created on Mar 18, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Contains setup and configuration files for the HTTP asyncio server.
+'''
+
+from .. import ally_http
+
+# --------------------------------------------------------------------
+
+NAME = 'ally HTTP asyncio server'
+GROUP = ally_http.GROUP
+VERSION = '1.0'
+DESCRIPTION = 'Provides the HTTP asyncio server'
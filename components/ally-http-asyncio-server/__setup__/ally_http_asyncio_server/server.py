@@ -0,0 +1,80 @@
+'''
+Created on Mar 18, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Runs the asyncio web server.
+'''
+
+from ..ally_http import server_type, server_version, server_host, server_port
+from ..ally_http.server import assemblyServer
+from ally.container import ioc
+from threading import Thread
+
+# --------------------------------------------------------------------
+
+SERVER_ASYNCIO = 'asyncio'
+# The asyncio server name
+
+# --------------------------------------------------------------------
+
+ioc.doc(server_type, '''
+    "asyncio" - server made based on the asyncio package, the connections are handled by an event loop and the requests
+                are processed in a pool of threads, fast and reliable
+''')
+
+@ioc.config
+def asyncio_keep_alive_timeout() -> float:
+    '''
+    The number of seconds an idle persistent (keep alive) connection is kept open waiting for the next request by the
+    asyncio server
+    '''
+    return 15.0
+
+@ioc.config
+def asyncio_keep_alive_max() -> int:
+    '''
+    The maximum number of requests served on a persistent (keep alive) connection by the asyncio server, 1 disables
+    persistent connections
+    '''
+    return 100
+
+@ioc.config
+def asyncio_read_timeout() -> float:
+    '''
+    The number of seconds the asyncio server waits for the request content data, if no data is received in this time
+    the request fails and the connection is closed, if 0 then the wait is indefinitely
+    '''
+    return 30.0
+
+@ioc.config
+def asyncio_execution_pool_size() -> int:
+    '''The number of threads used by the asyncio server for executing the requests processing'''
+    return 20
+
+# --------------------------------------------------------------------
+
+@ioc.entity
+def serverAsyncio():
+    from ally.http.server import server_asyncio
+    b = server_asyncio.AsyncioServer()
+    b.serverVersion = server_version()
+    b.serverHost = server_host()
+    b.serverPort = server_port()
+    b.assembly = assemblyServer()
+    b.keepAliveTimeout = asyncio_keep_alive_timeout()
+    b.keepAliveMax = asyncio_keep_alive_max()
+    b.readTimeout = asyncio_read_timeout()
+    b.executorSize = asyncio_execution_pool_size()
+    return b
+
+# --------------------------------------------------------------------
+
+@ioc.start
+def runServer():
+    if server_type() == SERVER_ASYNCIO:
+        from ally.http.server import server_asyncio
+        Thread(name='HTTP server thread', target=server_asyncio.run, args=(serverAsyncio(),)).start()
@@ -1,10 +1,10 @@
 '''
 Created on Jul 8, 2011
 
-@package: ally core http
+@package: ally http
 @copyright: 2012 Sourcefabric o.p.s.
 @license: http://www.gnu.org/licenses/gpl-3.0.txt
 @author: Gabriel Nistor
 
-In this package are found the modules that provide server support for the ally REST framework.
+In this package are found the modules that provide server support for the ally HTTP framework.
 '''
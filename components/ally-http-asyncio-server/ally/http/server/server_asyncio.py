@@ -0,0 +1,414 @@
+'''
+Created on Mar 18, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the asyncio web server, the connections are read and written by the asyncio event loop and the processing
+chains are executed in a pool of threads.
+'''
+
+from ally.container.ioc import injected
+from ally.design.processor.assembly import Assembly
+from ally.design.processor.execution import Chain, Processing
+from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
+    ResponseContentHTTP, HTTP
+from ally.support.util_io import IInputStream, IClosable, readGenerator, fileRegion
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from email.utils import formatdate
+from http.client import responses
+from urllib.parse import urlparse, parse_qsl
+import asyncio
+import logging
+import time
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+class StreamContent(IInputStream, IClosable):
+    '''
+    Provides the request content stream, the content is read by the processing threads directly from the connection
+    stream reader, the stream reader buffer limit provides the flow control for the connection.
+    '''
+    __slots__ = ('_reader', '_loop', '_remaining', '_timeout', '_timedOut', '_closed')
+
+    def __init__(self, reader, loop, length, timeout):
+        '''
+        Construct the content stream.
+
+        @param reader: asyncio.StreamReader
+            The stream reader of the connection.
+        @param loop: asyncio.AbstractEventLoop
+            The event loop that runs the stream reader.
+        @param length: integer
+            The number of content bytes.
+        @param timeout: float
+            The number of seconds to wait for the content data when reading, if 0 then wait indefinitely.
+        '''
+        assert isinstance(reader, asyncio.StreamReader), 'Invalid reader %s' % reader
+        assert isinstance(loop, asyncio.AbstractEventLoop), 'Invalid loop %s' % loop
+        assert isinstance(length, int), 'Invalid length %s' % length
+        assert isinstance(timeout, float) and timeout >= 0, 'Invalid timeout %s' % timeout
+        self._reader = reader
+        self._loop = loop
+        self._remaining = length
+        self._timeout = timeout or None
+        self._timedOut = False
+        self._closed = False
+
+    remaining = property(lambda self: self._remaining, doc='''
+    @rtype: integer
+    The number of content bytes that have not been read.
+    ''')
+    timedOut = property(lambda self: self._timedOut, doc='''
+    @rtype: boolean
+    True if the content data has not been received in time, the connection cannot be used anymore.
+    ''')
+
+    def read(self, nbytes=None):
+        '''
+        @see: IInputStream.read
+        '''
+        if self._closed: raise ValueError('I/O operation on a closed content stream')
+        if self._timedOut: raise IOError('The request content has timed out')
+        if self._remaining == 0: return b''
+
+        if nbytes is None or nbytes < 0 or nbytes >= self._remaining:
+            coroutine = self._reader.readexactly(self._remaining)
+        else: coroutine = self._reader.read(nbytes)
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try: data = future.result(self._timeout)
+        except asyncio.IncompleteReadError as e: data = e.partial
+        except TimeoutError:
+            future.cancel()
+            self._timedOut = True
+            raise IOError('The request content has timed out')
+
+        if data: self._remaining -= len(data)
+        else: self._remaining = 0  # The connection has been closed
+        return data
+
+    def close(self):
+        '''
+        @see: IClosable.close
+        '''
+        self._closed = True
+
+# --------------------------------------------------------------------
+
+@injected
+class AsyncioServer:
+    '''
+    The asyncio server handling the connections.
+    '''
+
+    serverVersion = str
+    # The server version name
+    serverHost = str
+    # The server address host
+    serverPort = int
+    # The server port
+    assembly = Assembly
+    # The assembly used for resolving the requests
+
+    bufferSize = 64 * 1024
+    # The number of bytes collected from the response source before writing them to the connection.
+    maximumRequestSize = 100 * 1024
+    # The maximum request header size, 100 kilobytes, also the connection read buffer limit.
+    maximumDiscardSize = 1024 * 1024
+    # The maximum size of unread request content that is discarded in order to keep the connection alive.
+    keepAliveTimeout = 15.0
+    # The number of seconds an idle persistent connection is kept open while waiting for the next request.
+    keepAliveMax = 100
+    # The maximum number of requests served on a persistent connection, 1 disables the persistent connections.
+    readTimeout = 30.0
+    # The number of seconds to wait for the request content data, if no data is received in this time the request
+    # content read fails and the connection is closed, if 0 then wait indefinitely.
+    executorSize = 20
+    # The number of threads used for executing the processing chains.
+    sendFile = hasattr(asyncio.AbstractEventLoop, 'sendfile')
+    # Flag indicating that the file system files content is sent using the event loop sendfile (os.sendfile).
+
+    def __init__(self):
+        '''
+        Construct the server.
+        '''
+        assert isinstance(self.serverVersion, str), 'Invalid server version %s' % self.serverVersion
+        assert isinstance(self.serverHost, str), 'Invalid server host %s' % self.serverHost
+        assert isinstance(self.serverPort, int), 'Invalid server port %s' % self.serverPort
+        assert isinstance(self.assembly, Assembly), 'Invalid assembly %s' % self.assembly
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        assert isinstance(self.maximumRequestSize, int), 'Invalid maximum request size %s' % self.maximumRequestSize
+        assert isinstance(self.maximumDiscardSize, int), 'Invalid maximum discard size %s' % self.maximumDiscardSize
+        assert isinstance(self.keepAliveTimeout, float), 'Invalid keep alive timeout %s' % self.keepAliveTimeout
+        assert isinstance(self.keepAliveMax, int) and self.keepAliveMax > 0, \
+        'Invalid keep alive maximum requests %s' % self.keepAliveMax
+        assert isinstance(self.readTimeout, float), 'Invalid read timeout %s' % self.readTimeout
+        assert isinstance(self.executorSize, int) and self.executorSize > 0, 'Invalid executor size %s' % self.executorSize
+        assert isinstance(self.sendFile, bool), 'Invalid send file flag %s' % self.sendFile
+
+        self.processing = self.assembly.create(request=RequestHTTP, requestCnt=RequestContentHTTP,
+                                               response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+        self._loop = None
+        self._executor = None
+        self._dateTime, self._date = 0, None
+
+    def serve_forever(self):
+        '''
+        Runs the event loop and servers the connections.
+        '''
+        self._loop = loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._executor = ThreadPoolExecutor(self.executorSize)
+
+        server = loop.run_until_complete(asyncio.start_server(self._serve, self.serverHost, self.serverPort,
+                                                              limit=self.maximumRequestSize, backlog=1024,
+                                                              reuse_address=True))
+        try: loop.run_forever()
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            self._executor.shutdown(False)
+            loop.close()
+
+    def stop(self):
+        '''
+        Stops the event loop, can be called from any thread.
+        '''
+        if self._loop is not None: self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ----------------------------------------------------------------
+
+    async def _serve(self, reader, writer):
+        '''
+        Serves the requests on a connection.
+        '''
+        requests = 0
+        try:
+            while True:
+                try: head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.keepAliveTimeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError): break
+                except asyncio.LimitOverrunError:
+                    writer.write(self._head('HTTP/1.0', 400, 'Request to long', {'Content-Length': '0'}, False))
+                    await writer.drain()
+                    break
+
+                requests += 1
+                keepAlive = await self._respond(reader, writer, head, requests < self.keepAliveMax)
+                if not keepAlive: break
+        except ConnectionError: assert log.debug('Connection lost', exc_info=True) or True
+        except: log.exception('A problem occurred in the server')
+        finally: writer.close()
+
+    async def _respond(self, reader, writer, head, keepAlive):
+        '''
+        Responds to the request that has the provided head.
+
+        @return: boolean
+            True if the connection should be kept alive, False otherwise.
+        '''
+        parsed = parseHead(head)
+        if parsed is None:
+            writer.write(self._head('HTTP/1.0', 400, 'Bad request', {'Content-Length': '0'}, False))
+            await writer.drain()
+            return False
+        method, path, version, headers, lowered = parsed
+
+        connection = lowered.get('connection', '').lower()
+        if version == 'HTTP/1.1': keepAlive = keepAlive and connection != 'close'
+        else: keepAlive = keepAlive and connection == 'keep-alive'
+
+        if 'transfer-encoding' in lowered:
+            writer.write(self._head(version, 411, 'Length required', {'Content-Length': '0'}, False))
+            await writer.drain()
+            return False
+        try: length = int(lowered.get('content-length', 0))
+        except ValueError: length = -1
+        if length < 0:
+            writer.write(self._head(version, 400, 'Invalid content length', {'Content-Length': '0'}, False))
+            await writer.drain()
+            return False
+
+        loop, content = self._loop, StreamContent(reader, self._loop, length, self.readTimeout)
+        address = writer.get_extra_info('peername')
+        status, text, headers, source, contexts = await loop.run_in_executor(self._executor, self._process,
+                                                                             address[0] if address else None, method,
+                                                                             path, headers, content)
+
+        if content.timedOut: keepAlive = False  # The client stopped sending the content
+        elif content.remaining:
+            if content.remaining > self.maximumDiscardSize: keepAlive = False
+            else:
+                try: await asyncio.wait_for(reader.readexactly(content.remaining), self.readTimeout or None)
+                except asyncio.TimeoutError: keepAlive = False
+
+        chunked = False
+        if keepAlive and not any(name.lower() == 'content-length' for name in headers):
+            if source is None:
+                if status >= 200 and status not in (204, 304): headers['Content-Length'] = '0'
+            elif version == 'HTTP/1.1':
+                headers['Transfer-Encoding'] = 'chunked'
+                chunked = True
+            else: keepAlive = False
+
+        writer.write(self._head(version, status, text, headers, keepAlive))
+        if isinstance(source, IInputStream):
+            # Only the file system files are provided as streams by the processing.
+            if chunked: source = readGenerator(source, self.bufferSize)
+            else:
+                fd, offset, count = fileRegion(source)
+                with source, open(fd, 'rb', closefd=False) as file:
+                    await loop.sendfile(writer.transport, file, offset, count)
+                source = None
+        if source is not None:
+            source = iter(source)
+            while True:
+                chunks = await loop.run_in_executor(self._executor, pull, source, self.bufferSize)
+                if not chunks: break
+                if chunked:
+                    size = sum(len(chunk) for chunk in chunks)
+                    writer.writelines((('%X\r\n' % size).encode(), *chunks, b'\r\n'))
+                else: writer.writelines(chunks)
+                await writer.drain()
+            if chunked: writer.write(b'0\r\n\r\n')
+        await writer.drain()
+        # The response has been fully written so the request contexts can be reused.
+        self.processing.release(**contexts)
+        return keepAlive
+
+    def _process(self, clientIP, method, path, headers, content):
+        '''
+        Process the request, this is executed in the processing threads.
+
+        @return: tuple(integer, string|None, dictionary{string: string}, Iterable|IInputStream|None, dictionary{string: Object})
+            The response status, text, headers, content source and the context objects used in processing, the content
+            source is provided as a stream only for the file system files that can be sent with sendfile.
+        '''
+        proc = self.processing
+        assert isinstance(proc, Processing), 'Invalid processing %s' % proc
+
+        request, requestCnt = proc.acquire('request'), proc.acquire('requestCnt')
+        assert isinstance(request, RequestHTTP), 'Invalid request %s' % request
+        assert isinstance(requestCnt, RequestContentHTTP), 'Invalid request content %s' % requestCnt
+
+        if RequestHTTP.clientIP in request: request.clientIP = clientIP
+        url = urlparse(path)
+        request.scheme, request.method = HTTP, method.upper()
+        request.headers = headers
+        request.uri = url.path.lstrip('/')
+        request.parameters = parse_qsl(url.query, True, False)
+
+        requestCnt.source = content
+
+        response, responseCnt = proc.acquire('response'), proc.acquire('responseCnt')
+        chain = Chain(proc)
+        chain.process(**proc.fillIn(request=request, requestCnt=requestCnt,
+                                    response=response, responseCnt=responseCnt)).doAll()
+        contexts = dict(request=request, requestCnt=requestCnt, response=response, responseCnt=responseCnt)
+
+        response, responseCnt = chain.arg.response, chain.arg.responseCnt
+        assert isinstance(response, ResponseHTTP), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContentHTTP), 'Invalid response content %s' % responseCnt
+
+        assert isinstance(response.status, int), 'Invalid response status code %s' % response.status
+        if ResponseHTTP.text in response and response.text: text = response.text
+        elif ResponseHTTP.code in response and response.code: text = response.code
+        else: text = None
+
+        if ResponseHTTP.headers in response and response.headers is not None: headers = dict(response.headers)
+        else: headers = {}
+
+        if ResponseContentHTTP.source in responseCnt and responseCnt.source is not None:
+            if self.sendFile and fileRegion(responseCnt.source) is not None: source = responseCnt.source
+            elif isinstance(responseCnt.source, IInputStream):
+                source = readGenerator(responseCnt.source, self.bufferSize)
+            else: source = responseCnt.source
+        else: source = None
+
+        return response.status, text, headers, source, contexts
+
+    def _head(self, version, status, text, headers, keepAlive):
+        '''
+        Provides the response head bytes.
+        '''
+        now = int(time.time())
+        if now != self._dateTime: self._dateTime, self._date = now, formatdate(now, usegmt=True)
+
+        lines = ['%s %s %s' % (version if version == 'HTTP/1.0' else 'HTTP/1.1', status, text or responses.get(status, '')),
+                 'Server: %s' % self.serverVersion, 'Date: %s' % self._date]
+        lines.extend('%s: %s' % item for item in headers.items())
+        if not keepAlive: lines.append('Connection: close')
+        elif version == 'HTTP/1.0': lines.append('Connection: keep-alive')
+        lines.append('\r\n')
+        return '\r\n'.join(lines).encode('latin-1')
+
+# --------------------------------------------------------------------
+
+def parseHead(head):
+    '''
+    Parses the request head.
+
+    @param head: bytes
+        The request head, including the terminating empty line.
+    @return: tuple(string, string, string, dictionary{string: string}, dictionary{string: string})|None
+        The method, path, version, the headers and the headers with lower case names, None if the head is invalid.
+    '''
+    lines = head.decode('latin-1').split('\r\n')
+    try: method, path, version = lines[0].split(' ')
+    except ValueError: return
+    if not version.startswith('HTTP/'): return
+
+    headers, lowered = {}, {}
+    for line in lines[1:]:
+        if not line: continue
+        name, sep, value = line.partition(':')
+        if not sep: return
+        name, value = name.strip(), value.strip()
+        if name in headers: value = '%s, %s' % (headers[name], value)
+        headers[name] = lowered[name.lower()] = value
+    return method, path, version, headers, lowered
+
+def pull(source, size):
+    '''
+    Pulls chunks from the source iterator until the provided size is reached.
+
+    @param source: Iterator(bytes)
+        The source to pull from.
+    @param size: integer
+        The number of bytes to collect.
+    @return: list[bytes]
+        The collected chunks, empty if the source is exhausted.
+    '''
+    chunks, total = [], 0
+    for chunk in source:
+        if not chunk: continue
+        chunks.append(chunk)
+        total += len(chunk)
+        if total >= size: break
+    return chunks
+
+def run(server):
+    '''
+    Run the asyncio server.
+
+    @param server: AsyncioServer
+        The asyncio server to run.
+    '''
+    assert isinstance(server, AsyncioServer), 'Invalid server %s' % server
+
+    try:
+        log.info('=' * 50 + ' Started Asyncio HTTP server...')
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info('=' * 50 + ' ^C received, shutting down server')
+        server.stop()
+    except:
+        log.exception('=' * 50 + ' The server has stooped')
+        try: server.stop()
+        except: pass
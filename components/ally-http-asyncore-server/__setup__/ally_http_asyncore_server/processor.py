@@ -17,6 +17,22 @@ from os import path
 # --------------------------------------------------------------------
 # Creating the processors used in handling the request
 
+@ioc.config
+def stream_requests_buffer_size():
+    '''
+    The maximum size in bytes of the request content kept in memory while the content is streamed to the processing, the
+    content is streamed only if the server processing is executed in threads, if 0 the request content is not streamed
+    '''
+    return 256 * 1024
+
+@ioc.config
+def stream_requests_read_timeout():
+    '''
+    The time in seconds to wait for the streamed request content data, if no data is received in this time the request
+    fails and the connection is closed, if 0 then the wait is indefinitely
+    '''
+    return 30.0
+
 @ioc.config
 def dump_requests_size():
     '''The minimum size of the request length to be dumped on the file system in bytes'''
@@ -32,6 +48,8 @@ def dump_requests_path():
 @ioc.entity
 def asyncoreContent() -> Handler:
     b = AsyncoreContentHandler()
+    b.streamBufferSize = stream_requests_buffer_size()
+    b.streamReadTimeout = stream_requests_read_timeout()
     b.dumpRequestsSize = dump_requests_size()
     b.dumpRequestsPath = dump_requests_path()
     return b
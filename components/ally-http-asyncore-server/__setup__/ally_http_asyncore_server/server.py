@@ -13,6 +13,7 @@ from ..ally_http import server_type, server_version, server_host, server_port
 from ..ally_http.server import assemblyServer
 from ally.container import ioc
 from ally.http.server import server_asyncore
+from multiprocessing import cpu_count
 from threading import Thread
 
 # --------------------------------------------------------------------
@@ -25,10 +26,42 @@ SERVER_ASYNCORE = 'asyncore'
 @ioc.replace(server_type)
 def server_type_asyncore():
     '''
-    "%s" - server made based on asyncore package, fast (runs on a single CPU) and reliable.
+    "%s" - server made based on asyncore package, fast (runs on a single CPU unless multiple workers are configured) and
+    reliable.
     ''' % SERVER_ASYNCORE
     return SERVER_ASYNCORE
 
+@ioc.config
+def server_keep_alive_timeout() -> float:
+    '''The number of seconds an idle persistent (keep alive) connection is kept open waiting for the next request'''
+    return 15.0
+
+@ioc.config
+def server_keep_alive_max() -> int:
+    '''The maximum number of requests served on a persistent (keep alive) connection, 1 disables persistent connections'''
+    return 100
+
+@ioc.config
+def server_workers() -> int:
+    '''
+    The number of worker processes that serve the requests using the same listening socket, if 1 then the requests are
+    served in the application process and if 0 then a worker is used for each available CPU.
+    '''
+    return 1
+
+@ioc.config
+def server_execution_pool_size() -> int:
+    '''
+    The number of threads used for executing the requests processing, if 0 then the processing is done in the server
+    loop thread, this means that a slow request will delay all the other requests.
+    '''
+    return 0
+
+@ioc.config
+def server_execution_queue_size() -> int:
+    '''The maximum number of requests waiting for a processing thread, if exceeded the requests are rejected as busy'''
+    return 1000
+
 # --------------------------------------------------------------------
 
 @ioc.entity
@@ -42,6 +75,11 @@ def serverAsyncore():
     b.serverPort = server_port()
     b.requestHandlerFactory = serverAsyncoreRequestHandler()
     b.assembly = assemblyServer()
+    b.keepAliveTimeout = server_keep_alive_timeout()
+    b.keepAliveMax = server_keep_alive_max()
+    b.workers = server_workers() or cpu_count()
+    b.executorSize = server_execution_pool_size()
+    b.executorQueue = server_execution_queue_size()
     return b
 
 # --------------------------------------------------------------------
@@ -0,0 +1,106 @@
+'''
+Created on Nov 1, 2012
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the asyncore streamed content reader.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.design.processor.assembly import Assembly
+from ally.design.processor.attribute import defines
+from ally.design.processor.context import Context
+from ally.design.processor.execution import Chain
+from ally.design.processor.handler import HandlerProcessorProceed
+from ally.http.impl.processor.asyncore_content import ReaderInStream, RequestContent
+from collections import Callable
+from threading import Thread
+import time
+import unittest
+
+# --------------------------------------------------------------------
+
+class RequestContentData(Context):
+    length = defines(int)
+    contentWakeup = defines(Callable)
+
+class Consume(HandlerProcessorProceed):
+
+    def process(self, requestCnt:RequestContent, **keyargs):
+        pass
+
+# --------------------------------------------------------------------
+
+class TestReaderInStream(unittest.TestCase):
+
+    def setUp(self):
+        assembly = Assembly('test')
+        assembly.add(Consume())
+        self.proc = assembly.create(requestCnt=RequestContentData)
+        self.wakeups = []
+
+    def reader(self, limit=10, timeout=0):
+        requestCnt = self.proc.ctx.requestCnt()
+        requestCnt.length, requestCnt.contentWakeup = None, lambda: self.wakeups.append(True)
+        return ReaderInStream(limit, timeout, Chain(self.proc), requestCnt), requestCnt
+
+    def testRead(self):
+        reader, requestCnt = self.reader()
+
+        self.assertIsInstance(reader(b'abcdef'), Chain)
+        self.assertIs(requestCnt.source, reader)
+        self.assertIsNone(reader(b'ghij'))
+        self.assertFalse(reader.accepts())
+
+        self.assertEqual(reader.read(4), b'abcd')
+        self.assertEqual(self.wakeups, [True])
+        self.assertTrue(reader.accepts())
+        self.assertEqual(reader.read(4), b'efgh')
+        reader(b'')
+        self.assertIsNone(requestCnt.contentReader)
+        self.assertEqual(reader.read(), b'ij')
+        self.assertEqual(reader.read(4), b'')
+
+    def testReadWaits(self):
+        reader, _requestCnt = self.reader(timeout=5)
+        reader(b'ab')
+
+        def push():
+            time.sleep(0.1)
+            reader(b'cd')
+            reader(b'')
+        thread = Thread(target=push)
+        thread.start()
+        self.assertEqual(reader.read(), b'abcd')
+        thread.join()
+
+    def testAborted(self):
+        reader, _requestCnt = self.reader()
+        reader(b'ab')
+        reader(None)
+        self.assertRaises(IOError, reader.read, 2)
+
+    def testTimeout(self):
+        reader, _requestCnt = self.reader(timeout=0.1)
+        reader(b'ab')
+        self.assertEqual(reader.read(2), b'ab')
+
+        start = time.time()
+        self.assertRaises(IOError, reader.read, 2)
+        self.assertLess(time.time() - start, 5)
+
+        reader(b'cd')
+        self.assertRaises(IOError, reader.read, 2)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -10,16 +10,17 @@ Provides the asyncore handling of content.
 '''
 
 from ally.container.ioc import injected
-from ally.design.processor.attribute import defines, requires
+from ally.design.processor.attribute import defines, requires, optional
 from ally.design.processor.context import Context
 from ally.design.processor.execution import Chain
 from ally.design.processor.handler import HandlerProcessor
 from ally.http.spec.server import HTTP_POST, HTTP_PUT
 from ally.support.util_io import IInputStream
 from ally.zip.util_zip import normOSPath
-from collections import Callable
+from collections import Callable, deque
 from genericpath import isdir
 from io import BytesIO
+from threading import Condition
 import os
 import time
 
@@ -38,8 +39,11 @@ class RequestContent(Context):
     '''
     # ---------------------------------------------------------------- Required
     length = requires(int)
+    # ---------------------------------------------------------------- Optional
+    contentWakeup = optional(Callable)
     # ---------------------------------------------------------------- Defined
     contentReader = defines(Callable)
+    contentAccepts = defines(Callable)
     source = defines(IInputStream)
 
 class Response(Context):
@@ -54,18 +58,29 @@ class Response(Context):
 @injected
 class AsyncoreContentHandler(HandlerProcessor):
     '''
-    Provides asyncore content handling, basically this handler buffers up the async data received in order to be
-    used by the other handlers.
+    Provides asyncore content handling, if the server executes the chains in worker threads the async data received is
+    streamed to the other handlers, otherwise this handler buffers up the async data received in order to be used by the
+    other handlers.
     '''
     contentMethods = {HTTP_POST, HTTP_PUT}
     # The methods that have content.
 
+    streamBufferSize = 256 * 1024
+    # The maximum size of the request content kept in memory while streamed, the reading of the content is paused when
+    # exceeded, if 0 then the content is not streamed.
+    streamReadTimeout = 30.0
+    # The time in seconds to wait for request content data while streamed, if no data is received in this time the
+    # content read fails and the connection is closed, if 0 then wait indefinitely.
+
     dumpRequestsSize = 1024 * 1024
     # The minimum size of the request length to be dumped on the file system.
     dumpRequestsPath = str
     # The path where the requests are dumped when they are to big to keep in memory.
     
     def __init__(self):
+        assert isinstance(self.streamBufferSize, int), 'Invalid stream buffer size %s' % self.streamBufferSize
+        assert isinstance(self.streamReadTimeout, (int, float)), \
+        'Invalid stream read timeout %s' % self.streamReadTimeout
         assert isinstance(self.dumpRequestsSize, int), 'Invalid dump size %s' % self.dumpRequestsSize
         assert isinstance(self.dumpRequestsPath, str), 'Invalid dump path %s' % self.dumpRequestsPath
         self.dumpRequestsPath = normOSPath(self.dumpRequestsPath)
@@ -91,9 +106,14 @@ class AsyncoreContentHandler(HandlerProcessor):
         if response.isSuccess is False: return  # Skip in case the response is in error
         
         if request.method in self.contentMethods:
-            if requestCnt.length is not None:
-                if requestCnt.length == 0: return
-                
+            if requestCnt.length == 0: return
+            
+            if self.streamBufferSize and RequestContent.contentWakeup in requestCnt and \
+            requestCnt.contentWakeup is not None:
+                reader = ReaderInStream(self.streamBufferSize, self.streamReadTimeout, chain, requestCnt)
+                requestCnt.contentReader = reader
+                requestCnt.contentAccepts = reader.accepts
+            elif requestCnt.length is not None:
                 if requestCnt.length > self.dumpRequestsSize:
                     requestCnt.contentReader = ReaderInFile(self._path(), chain, requestCnt)
                 else:
@@ -212,3 +232,103 @@ class ReaderInFile:
             self._chain.callBack(lambda: os.remove(self._path))
             self._chain.callBack(lambda: self._requestCnt.source.close())
             return self._chain
+
+class ReaderInStream(IInputStream):
+    '''
+    Provides the reader that streams the content, the data pushed by the asyncore loop is kept in a bounded queue from
+    which is read by the chain that is executed in a worker thread.
+    '''
+    __slots__ = ('_limit', '_timeout', '_chain', '_requestCnt', '_wakeup', '_condition', '_chunks', '_size', '_started',
+                 '_finished', '_aborted')
+    
+    def __init__(self, limit, timeout, chain, requestCnt):
+        '''
+        Construct the reader.
+        
+        @param limit: integer
+            The maximum size of the content kept in memory, after this limit the reader does not accept data anymore
+            until the content is read.
+        @param timeout: integer|float
+            The time in seconds to wait for data when reading, after this the read fails, if 0 then wait indefinitely.
+        @param chain: Chain
+            The chain that is used for further processing.
+        @param requestCnt: RequestContent
+            The request content to use the reader with.
+        '''
+        assert isinstance(limit, int) and limit > 0, 'Invalid limit %s' % limit
+        assert isinstance(timeout, (int, float)) and timeout >= 0, 'Invalid timeout %s' % timeout
+        assert isinstance(chain, Chain), 'Invalid chain %s' % chain
+        assert isinstance(requestCnt, RequestContent), 'Invalid request content %s' % requestCnt
+        assert callable(requestCnt.contentWakeup), 'Invalid wake up %s' % requestCnt.contentWakeup
+        self._limit = limit
+        self._timeout = timeout or None
+        self._chain = chain
+        self._requestCnt = requestCnt
+        self._wakeup = requestCnt.contentWakeup
+
+        self._condition = Condition()
+        self._chunks = deque()
+        self._size = 0
+        self._started = False
+        self._finished = False
+        self._aborted = False
+        
+    def __call__(self, data):
+        '''
+        Push data into the reader, called in the asyncore loop.
+        '''
+        if self._finished: return
+        with self._condition:
+            if data is None: self._finished = self._aborted = True
+            elif data == b'': self._finished = True
+            else:
+                self._chunks.append(bytes(data))
+                self._size += len(data)
+            self._condition.notify()
+        
+        if self._finished: self._requestCnt.contentReader = None
+        if not self._started and not self._aborted:
+            self._started = True
+            self._requestCnt.source = self
+            return self._chain
+    
+    def accepts(self):
+        '''
+        Checks if the reader accepts more data, called in the asyncore loop.
+        '''
+        return self._size < self._limit
+    
+    def read(self, nbytes=None):
+        '''
+        @see: IInputStream.read
+        '''
+        if nbytes is None or nbytes < 0:
+            chunks = []
+            while True:
+                chunk = self.read(self._limit)
+                if not chunk: return b''.join(chunks)
+                chunks.append(chunk)
+        
+        with self._condition:
+            while True:
+                if self._aborted: raise IOError('The request content has been aborted')
+                if self._chunks and nbytes: break
+                if self._finished or not nbytes: return b''
+                if not self._condition.wait(self._timeout):
+                    self._finished = self._aborted = True  # The data received from now on is discarded
+                    raise IOError('The request content has timed out')
+            
+            paused = self._size >= self._limit
+            chunks, size = [], 0
+            while self._chunks and size < nbytes:
+                chunk = self._chunks.popleft()
+                if size + len(chunk) > nbytes:
+                    self._chunks.appendleft(chunk[nbytes - size:])
+                    chunk = chunk[:nbytes - size]
+                chunks.append(chunk)
+                size += len(chunk)
+            self._size -= size
+        
+        if paused and self._size < self._limit: self._wakeup()  # The reading of the content can be resumed
+        if len(chunks) == 1: return chunks[0]
+        return b''.join(chunks)
@@ -11,18 +11,23 @@ Provides the asyncore web server based on the python build in http server and as
 
 from ally.container.ioc import injected
 from ally.design.processor.assembly import Assembly
-from ally.design.processor.attribute import optional
+from ally.design.processor.attribute import optional, definesIf
 from ally.design.processor.execution import Chain, Processing
 from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
     ResponseContentHTTP, HTTP
-from ally.support.util_io import IInputStream, readGenerator
-from asyncore import dispatcher, loop
+from ally.support.util_io import IInputStream, readGenerator, fileRegion
+from asyncore import dispatcher, file_dispatcher, loop
 from collections import Callable, deque
 from http.server import BaseHTTPRequestHandler
 from io import BytesIO
+from multiprocessing import Process
+from queue import Queue, Full
+from threading import Thread
 from urllib.parse import urlparse, parse_qsl
 import logging
+import os
 import socket
+import time
 
 # --------------------------------------------------------------------
 
@@ -32,6 +37,8 @@ log = logging.getLogger(__name__)
 WRITE_BYTES = 1
 WRITE_ITER = 2
 WRITE_CLOSE = 3
+WRITE_NEXT = 4
+WRITE_FILE = 5
 
 # --------------------------------------------------------------------
 
@@ -43,7 +50,20 @@ class RequestContentHTTPAsyncore(RequestContentHTTP):
     contentReader = optional(Callable, doc='''
     @rtype: Callable
     The content reader callable used for pushing data from the asyncore read. Once the reader is finalized it will
-    return a chain that is used for further request processing.
+    return a chain that is used for further request processing. If the reader returns the chain while the content reader
+    is still set then the content is streamed, the chain is executed while the data is still pushed into the reader, in
+    this case None is pushed if the connection is closed before the content is completed.
+    ''')
+    contentAccepts = optional(Callable, doc='''
+    @rtype: Callable
+    The callable used for checking if the content reader accepts more data, if it returns False the reading from the
+    connection is paused until the server loop is woken up.
+    ''')
+    # ---------------------------------------------------------------- Defined
+    contentWakeup = definesIf(Callable, doc='''
+    @rtype: Callable|None
+    The callable used for waking up the server loop in order to resume the reading of the content, available only if
+    the chains are executed in worker threads, so only then the content can be streamed.
     ''')
 
 # --------------------------------------------------------------------
@@ -53,14 +73,20 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
     Request handler implementation based on @see: async_chat and @see: BaseHTTPRequestHandler.
     The async chat request handler. It relays for the HTTP processing on the @see: BaseHTTPRequestHandler,
     and uses the async_chat to asynchronous communication.
+    The handler supports persistent connections, after a response is fully written the handler will return to the
+    request stage and process the next request (including pipelined requests) on the same connection.
     '''
     
+    protocol_version = 'HTTP/1.1'
+    # The protocol version, required in order to have persistent connections.
     bufferSize = 10 * 1024
     # The buffer size used for reading and writing.
     maximumRequestSize = 100 * 1024
     # The maximum request size, 100 kilobytes
     requestTerminator = b'\r\n\r\n'
     # Terminator that signals the http request is complete 
+    sendFile = hasattr(os, 'sendfile')
+    # Flag indicating that the file system files content is sent using os.sendfile, not available in Python 3.2
 
     def __init__(self, request, address, server):
         '''
@@ -84,11 +110,20 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         self.server_version = server.serverVersion
         self.request_version = 'HTTP/1.1'
         self.requestline = 0
+        self.close_connection = True
         
         self._stage = 1
+        self._requests = 0
+        self._pending = None
+        self._lastActivity = time.time()
+        self._contexts = None
+
         self.rfile = BytesIO()
         self._readCarry = None
         self._reader = None
+        self._accepts = None
+        self._streaming = False
+        self._contentRemaining = None
 
         self.wfile = BytesIO()
         self._writeq = deque()
@@ -104,18 +139,25 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             log.exception('Exception occurred while reading the content from \'%s\'' % self.connection)
             self.close()
             return
+        self._lastActivity = time.time()
         self.handle_data(data)
     
     def handle_error(self):
         log.exception('A problem occurred in the server')
+
+    def close(self):
+        '''
+        @see: dispatcher.close
+        '''
+        if self._streaming and self._reader is not None: self._reader(None)  # The streamed content is aborted
+        super().close()
     
     def end_headers(self):
         '''
         @see: BaseHTTPRequestHandler.end_headers
         '''
         super().end_headers()
-        self._writeq.append((WRITE_BYTES, memoryview(self.wfile.getvalue())))
-        self.wfile = None
+        self._flush()
 
     def log_message(self, format, *args):
         '''
@@ -128,15 +170,58 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         
     # ----------------------------------------------------------------
     
+    def isIdle(self, now):
+        '''
+        Checks if the handler is waiting for a request for longer then the server keep alive timeout.
+
+        @param now: float
+            The current time.
+        @return: boolean
+            True if the handler is idle and should be closed, False otherwise.
+        '''
+        return self._stage == 1 and now - self._lastActivity > self.server.keepAliveTimeout
+
+    # ----------------------------------------------------------------
+
     def _next(self, stage):
         '''
         Proceed to next stage.
         '''
         assert isinstance(stage, int), 'Invalid stage %s' % stage
+        self._stage = stage
         self.readable = getattr(self, '_%s_readable' % stage, None)
         self.handle_data = getattr(self, '_%s_handle_data' % stage, None)
         self.writable = getattr(self, '_%s_writable' % stage, None)
         self.handle_write = getattr(self, '_%s_handle_write' % stage, None)
+
+    def _flush(self):
+        '''
+        Flushes the content of the write file into the write queue.
+        '''
+        data = self.wfile.getvalue()
+        if data: self._writeq.append((WRITE_BYTES, memoryview(data)))
+        self.wfile = BytesIO()
+
+    def _reset(self):
+        '''
+        Resets the handler in order to process the next request on the same connection.
+        '''
+        self.rfile = BytesIO()
+        self._readCarry = None
+        self._reader = None
+        self._accepts = None
+        self._streaming = False
+        self._contentRemaining = None
+        self._lastActivity = time.time()
+        if self._contexts is not None:
+            # The response has been fully written so the request contexts can be reused.
+            self.server.processing.release(**self._contexts)
+            self._contexts = None
+
+        self._next(1)
+        if self._pending is not None:
+            data, self._pending = self._pending, None
+            self.handle_data(data)
           
     # ----------------------------------------------------------------
     
@@ -150,7 +235,9 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         '''
         Handle the data as being part of the request.
         '''
-        if self._readCarry is not None: data = self._readCarry + data
+        if self._readCarry is not None:
+            data = self._readCarry + data
+            self._readCarry = None
         index = data.find(self.requestTerminator)
         requestTerminatorLen = len(self.requestTerminator)
         
@@ -159,20 +246,32 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             self.rfile.write(data[:index])
             self.rfile.seek(0)
             self.raw_requestline = self.rfile.readline()
-            self.parse_request()
+            if not self.parse_request():
+                # The error response has already been provided
+                self._flush()
+                self._writeq.append((WRITE_CLOSE, None))
+                self._next(3)
+                return
             self.rfile = None
+
+            self._contentRemaining = None
+            if 'Transfer-Encoding' not in self.headers:
+                try: self._contentRemaining = int(self.headers.get('Content-Length', 0))
+                except ValueError: pass
             
+            # The data after the request header is either content or the next pipelined request.
+            if index < len(data): self._pending = data[index:]
             self._process(self.command or '')
-            
-            if index < len(data) and self.handle_data: self.handle_data(data[index:])
         else:
             self._readCarry = data[-requestTerminatorLen:]
             self.rfile.write(data[:-requestTerminatorLen])
             
             if self.rfile.tell() > self.maximumRequestSize:
                 self.send_response(400, 'Request to long')
+                self.send_header('Connection', 'close')
                 self.end_headers()
-                self.close()
+                self._writeq.append((WRITE_CLOSE, None))
+                self._next(3)
                 
     def _1_writable(self):
         '''
@@ -186,19 +285,44 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         '''
         @see: dispatcher.readable
         '''
-        return self._reader is not None
+        if self._reader is None: return False
+        return self._accepts is None or self._accepts()
     
     def _2_handle_data(self, data):
         '''
         Handle the data as being part of the request.
         '''
         assert self._reader is not None, 'No reader available'
+        if self._contentRemaining is not None:
+            if len(data) > self._contentRemaining:
+                # The extra data belongs to the next pipelined request
+                self._pending = data[self._contentRemaining:]
+                data = data[:self._contentRemaining]
+            self._contentRemaining -= len(data)
+
         chain = self._reader(data)
+        if chain is None and self._contentRemaining == 0 and not self._streaming: chain = self._reader(b'')
         if chain is not None:
             assert isinstance(chain, Chain), 'Invalid chain %s' % chain
+            requestCnt = self._contexts['requestCnt']
+            if RequestContentHTTPAsyncore.contentReader in requestCnt and requestCnt.contentReader is not None:
+                # The content is streamed so we keep on reading while the chain is executed
+                self._streaming = True
+                self._execute(chain.doAll, self._streamed, False)
+            else:
+                self._reader = None
+                self._execute(chain.doAll, lambda chain: self._next(3))  # Now we proceed to write stage
+
+        if self._streaming and self._contentRemaining == 0 and self._reader is not None:
+            self._reader(b'')
             self._reader = None
-            self._next(3)  # Now we proceed to write stage
-            chain.doAll()
+
+    def _streamed(self, chain):
+        '''
+        Called when the execution of a chain with streamed content is done.
+        '''
+        self._reader = None  # The content left unread is discarded, the connection is not kept alive
+        self._next(3)  # Now we proceed to write stage
             
     def _2_writable(self):
         '''
@@ -227,8 +351,11 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         assert self._writeq, 'Nothing to write'
         
         what, content = self._writeq[0]
-        assert what in (WRITE_ITER, WRITE_BYTES, WRITE_CLOSE), 'Invalid what %s' % what
-        if what == WRITE_ITER:
+        assert what in (WRITE_ITER, WRITE_BYTES, WRITE_CLOSE, WRITE_NEXT, WRITE_FILE), 'Invalid what %s' % what
+        if what == WRITE_FILE:
+            self._writeFile(*content)
+            return
+        elif what == WRITE_ITER:
             try: data = memoryview(next(content))
             except StopIteration:
                 del self._writeq[0]
@@ -237,6 +364,10 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         elif what == WRITE_CLOSE:
             self.close()
             return
+        elif what == WRITE_NEXT:
+            del self._writeq[0]
+            self._reset()
+            return
         
         dataLen = len(data)
         try:
@@ -251,6 +382,44 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             elif what == WRITE_BYTES: self._writeq[0] = (WRITE_BYTES, data[sent:])
         else:
             if what == WRITE_BYTES: del self._writeq[0]
+
+    def _writeFile(self, source, fd, offset, remaining):
+        '''
+        Writes the file region using os.sendfile, the region that is left to be sent is kept in the write queue.
+        '''
+        if remaining:
+            try: sent = os.sendfile(self.socket.fileno(), fd, offset, remaining)
+            except (BlockingIOError, InterruptedError): return
+            except OSError:
+                log.exception('Exception occurred while sending the file to the connection \'%s\'' % self.connection)
+                source.close()
+                self.close()
+                return
+            if sent == 0:
+                # The file has been truncated so the promised content length cannot be fulfilled anymore.
+                log.error('Unexpected end of file while sending to the connection \'%s\'' % self.connection)
+                source.close()
+                self.close()
+                return
+            if sent < remaining:
+                self._writeq[0] = (WRITE_FILE, (source, fd, offset + sent, remaining - sent))
+                return
+        source.close()
+        del self._writeq[0]
+        
+    # ----------------------------------------------------------------
+
+    def _4_readable(self):
+        '''
+        @see: dispatcher.readable
+        '''
+        return False
+
+    def _4_writable(self):
+        '''
+        @see: dispatcher.writable
+        '''
+        return False
         
     # ----------------------------------------------------------------
     
@@ -259,11 +428,14 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         proc = self.server.processing
         assert isinstance(proc, Processing), 'Invalid processing %s' % proc
         
-        request, requestCnt = proc.ctx.request(), proc.ctx.requestCnt()
+        self._requests += 1
+        request, requestCnt = proc.acquire('request'), proc.acquire('requestCnt')
         assert isinstance(request, RequestHTTP), 'Invalid request %s' % request
         assert isinstance(requestCnt, RequestContentHTTP), 'Invalid request content %s' % requestCnt
         
         if RequestHTTP.clientIP in request: request.clientIP = self.client_address[0]
+        if RequestContentHTTPAsyncore.contentWakeup in requestCnt:
+            if self.server.executor is not None: requestCnt.contentWakeup = self.server.executor.wakeup
         url = urlparse(self.path)
         request.scheme, request.method = HTTP, method.upper()
         request.headers = dict(self.headers)
@@ -272,42 +444,105 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         
         requestCnt.source = self.rfile
         
+        response, responseCnt = proc.acquire('response'), proc.acquire('responseCnt')
         chain = Chain(proc)
-        chain.process(**proc.fillIn(request=request, requestCnt=requestCnt,
-                                    response=proc.ctx.response(), responseCnt=proc.ctx.responseCnt()))
+        chain.process(**proc.fillIn(request=request, requestCnt=requestCnt, response=response, responseCnt=responseCnt))
+        self._contexts = dict(request=request, requestCnt=requestCnt, response=response, responseCnt=responseCnt)
         
         def respond():
             response, responseCnt = chain.arg.response, chain.arg.responseCnt
             assert isinstance(response, ResponseHTTP), 'Invalid response %s' % response
             assert isinstance(responseCnt, ResponseContentHTTP), 'Invalid response content %s' % responseCnt
     
-            if ResponseHTTP.headers in response and response.headers is not None:
-                for name, value in response.headers.items(): self.send_header(name, value)
-    
             assert isinstance(response.status, int), 'Invalid response status code %s' % response.status
             if ResponseHTTP.text in response and response.text: text = response.text
             elif ResponseHTTP.code in response and response.code: text = response.code
             else: text = None
             self.send_response(response.status, text)
-            self.end_headers()
+
+            if ResponseHTTP.headers in response and response.headers is not None: headers = response.headers
+            else: headers = {}
+            for name, value in headers.items(): self.send_header(name, value)
     
+            region = None
             if ResponseContentHTTP.source in responseCnt and responseCnt.source is not None:
-                if isinstance(responseCnt.source, IInputStream): source = readGenerator(responseCnt.source, self.bufferSize)
+                if self.sendFile: region = fileRegion(responseCnt.source)
+                if region is not None: source = responseCnt.source
+                elif isinstance(responseCnt.source, IInputStream):
+                    source = readGenerator(responseCnt.source, self.bufferSize)
                 else: source = responseCnt.source
-                self._writeq.append((WRITE_ITER, iter(source)))
+            else: source = None
                 
-            self._writeq.append((WRITE_CLOSE, None))
+            # The connection is kept alive only if the request content has been fully consumed.
+            keepAlive = not self.close_connection and self._contentRemaining == 0 and \
+            self._requests < self.server.keepAliveMax
+            if keepAlive and not any(name.lower() == 'content-length' for name in headers):
+                if source is None:
+                    if response.status >= 200 and response.status not in (204, 304): self.send_header('Content-Length', '0')
+                elif self.request_version == 'HTTP/1.1':
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    if region is not None: source, region = readGenerator(source, self.bufferSize), None
+                    source = chunked(source)
+                else: keepAlive = False
+
+            if not keepAlive: self.send_header('Connection', 'close')
+            elif self.request_version != 'HTTP/1.1': self.send_header('Connection', 'keep-alive')
+            self.end_headers()
+
+            if region is not None: self._writeq.append((WRITE_FILE, (source,) + region))
+            elif source is not None: self._writeq.append((WRITE_ITER, iter(source)))
+            if keepAlive and not self.close_connection: self._writeq.append((WRITE_NEXT, None))
+            else: self._writeq.append((WRITE_CLOSE, None))
             
         chain.callBack(respond)
         
-        while True:
-            if not chain.do():
+        def proceed():
+            while True:
+                if not chain.do(): return False
+                if RequestContentHTTPAsyncore.contentReader in requestCnt and requestCnt.contentReader is not None:
+                    return True
+                
+        def proceeded(readContent):
+            if not readContent:
                 self._next(3)  # Now we proceed to write stage
-                break
-            if RequestContentHTTPAsyncore.contentReader in requestCnt and requestCnt.contentReader is not None:
-                self._next(2)  # Now we proceed to read stage
-                self._reader = requestCnt.contentReader
-                break
+                return
+            
+            self._next(2)  # Now we proceed to read stage
+            self._reader = requestCnt.contentReader
+            if RequestContentHTTPAsyncore.contentAccepts in requestCnt: self._accepts = requestCnt.contentAccepts
+            if self._pending is not None or self._contentRemaining == 0:
+                data, self._pending = self._pending or b'', None
+                self._2_handle_data(data)
+        
+        self._execute(proceed, proceeded)
+        
+    def _execute(self, call, done, wait=True):
+        '''
+        Executes the provided processing call, if the server has an executor then the call is performed in a worker thread
+        and the handler waits without reading or writing until the done call back is invoked in the asyncore loop.
+        
+        @param call: callable()
+            The processing call to execute.
+        @param done: callable(object)
+            The call back that receives the result of the processing call.
+        @param wait: boolean
+            If False the handler keeps the current stage while the call is executed in a worker thread.
+        '''
+        executor = self.server.executor
+        if executor is None:
+            done(call())
+            return
+        
+        assert isinstance(executor, Executor), 'Invalid executor %s' % executor
+        if wait: self._next(4)  # Now we wait for the execution
+        if not executor.submit(call, done, self.close):
+            log.warning('The execution queue is full, cannot process the request from %s', self.client_address)
+            self.send_response(503, 'Server busy')
+            self.send_header('Connection', 'close')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            self._writeq.append((WRITE_CLOSE, None))
+            self._next(3)
 
 # --------------------------------------------------------------------
 
@@ -331,6 +566,20 @@ class AsyncServer(dispatcher):
     
     timeout = 10.0
     # The timeout for select loop.
+    keepAliveTimeout = 15.0
+    # The number of seconds an idle persistent connection is kept open while waiting for the next request.
+    keepAliveMax = 100
+    # The maximum number of requests served on a persistent connection, 1 disables the persistent connections.
+    workers = 1
+    # The number of worker processes that accept connections on the shared listening socket, if 1 then the connections
+    # are served by the current process.
+    superviseInterval = 1.0
+    # The number of seconds between the checks for dead worker processes.
+    executorSize = 0
+    # The number of threads used for executing the processing chains, if 0 then the processing chains are executed in
+    # the asyncore loop.
+    executorQueue = 1000
+    # The maximum number of processing chains waiting for execution, if the queue is full the requests are rejected.
 
     def __init__(self):
         '''
@@ -342,29 +591,40 @@ class AsyncServer(dispatcher):
         assert callable(self.requestHandlerFactory), 'Invalid request handler factory %s' % self.requestHandlerFactory
         assert isinstance(self.assembly, Assembly), 'Invalid assembly %s' % self.assembly
         assert isinstance(self.timeout, float), 'Invalid timeout %s' % self.timeout
+        assert isinstance(self.keepAliveTimeout, float), 'Invalid keep alive timeout %s' % self.keepAliveTimeout
+        assert isinstance(self.keepAliveMax, int) and self.keepAliveMax > 0, \
+        'Invalid keep alive maximum requests %s' % self.keepAliveMax
+        assert isinstance(self.workers, int) and self.workers > 0, 'Invalid workers %s' % self.workers
+        assert isinstance(self.superviseInterval, float), 'Invalid supervise interval %s' % self.superviseInterval
+        assert isinstance(self.executorSize, int) and self.executorSize >= 0, 'Invalid executor size %s' % self.executorSize
+        assert isinstance(self.executorQueue, int) and self.executorQueue > 0, \
+        'Invalid executor queue %s' % self.executorQueue
         self.map = {}
         dispatcher.__init__(self, map=self.map)
 
-        self.processing = self.assembly.create(request=RequestHTTP, requestCnt=RequestContentHTTPAsyncore,
-                                               response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+        # The processing and executor are created by the process that serves the connections.
+        self.processing = None
+        self.executor = None
         
         self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
         self.set_reuse_addr()
         self.bind((self.serverHost, self.serverPort))
         self.listen(1024)  # lower this to 5 if your OS complains
 
+        self._idleCheck = 0
+
     def handle_accept(self):
         '''
         @see: dispatcher.handle_accept
         '''
         try:
-            request, address = self.accept()
+            accepted = self.accept()
         except socket.error:
             log.exception('A problem occurred while waiting connections')
             return
-        except TypeError:
-            log.exception('A EWOULDBLOCK problem occurred while waiting connections')
-            return
+        # If there are multiple workers the connection might have been accepted by an other worker
+        if accepted is None: return
+        request, address = accepted
         # creates an instance of the handler class to handle the request/response
         # on the incoming connection
         self.requestHandlerFactory(request, address, self)
@@ -373,17 +633,199 @@ class AsyncServer(dispatcher):
         '''
         Loops and servers the connections.
         '''
-        loop(self.timeout, map=self.map)
+        self.prepare()
+        timeout = min(self.timeout, self.keepAliveTimeout)
+        while self.map:
+            loop(timeout, map=self.map, count=1)
+            self.closeIdle()
             
     def serve_limited(self, count):
         '''
         For profiling purposes.
         Loops the provided amount of times and servers the connections.
         '''
+        self.prepare()
         loop(self.timeout, True, self.map, count)
 
+    def serve_workers(self):
+        '''
+        Starts the worker processes that serve the connections accepted on the shared listening socket and supervises
+        them, the workers that have died are restarted.
+        '''
+        workers = [self._startWorker(k) for k in range(self.workers)]
+        try:
+            while True:
+                time.sleep(self.superviseInterval)
+                for k, worker in enumerate(workers):
+                    assert isinstance(worker, Process), 'Invalid worker %s' % worker
+                    if worker.is_alive(): continue
+                    log.error('The worker \'%s\' has stopped with exit code %s, restarting', worker.name, worker.exitcode)
+                    workers[k] = self._startWorker(k)
+        finally:
+            for worker in workers:
+                if worker.is_alive(): worker.terminate()
+            for worker in workers: worker.join()
+
+    def prepare(self):
+        '''
+        Prepares the server for serving the connections in the current process, basically creates the processing based
+        on the server assembly and the executor if is the case.
+        '''
+        if self.processing is None:
+            self.processing = self.assembly.create(request=RequestHTTP, requestCnt=RequestContentHTTPAsyncore,
+                                                   response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+        if self.executor is None and self.executorSize > 0:
+            self.executor = Executor(self.executorSize, self.executorQueue, self.map)
+
+    def closeIdle(self):
+        '''
+        Closes the persistent connections that are idle for longer then the keep alive timeout, the check is performed
+        at most once a second.
+        '''
+        now = time.time()
+        if now < self._idleCheck: return
+        self._idleCheck = now + 1
+
+        for handler in list(self.map.values()):
+            if handler is not self and isinstance(handler, RequestHandler) and handler.isIdle(now):
+                assert log.debug('Closing idle connection %s', handler.client_address) or True
+                handler.close()
+
+    # ----------------------------------------------------------------
+
+    def _startWorker(self, index):
+        '''
+        Starts a worker process that serves the connections.
+
+        @param index: integer
+            The index of the worker.
+        @return: Process
+            The started worker process.
+        '''
+        worker = Process(name='HTTP server worker %s' % index, target=self._work)
+        worker.daemon = True
+        worker.start()
+        return worker
+
+    def _work(self):
+        '''
+        The worker process target.
+        '''
+        try: self.serve_forever()
+        except KeyboardInterrupt: pass
+        except:
+            log.exception('The worker has stopped')
+            raise
+
+class Executor(file_dispatcher):
+    '''
+    Provides the execution of calls in a bounded pool of threads, the results of the calls are posted back into the
+    asyncore loop through a wake up pipe.
+    '''
+    
+    def __init__(self, size, queue, map):
+        '''
+        Construct the executor.
+        
+        @param size: integer
+            The number of threads that execute the calls.
+        @param queue: integer
+            The maximum number of calls waiting for execution.
+        @param map: dictionary{integer: dispatcher}
+            The asyncore map to register the wake up pipe with.
+        '''
+        assert isinstance(size, int) and size > 0, 'Invalid size %s' % size
+        assert isinstance(queue, int) and queue > 0, 'Invalid queue %s' % queue
+        assert isinstance(map, dict), 'Invalid map %s' % map
+        
+        read, self._wakeup = os.pipe()
+        file_dispatcher.__init__(self, read, map=map)
+        os.close(read)  # The file dispatcher uses a duplicate of the descriptor
+        
+        self._calls = Queue(queue)
+        self._done = deque()
+        for k in range(size):
+            thread = Thread(name='HTTP execution thread %s' % k, target=self._work)
+            thread.daemon = True
+            thread.start()
+        
+    def submit(self, call, done, failed):
+        '''
+        Submits the call for execution.
+        
+        @param call: callable()
+            The call to execute in a worker thread.
+        @param done: callable(object)
+            The call back invoked in the asyncore loop with the call result.
+        @param failed: callable()
+            The call back invoked in the asyncore loop if the call has raised an exception.
+        @return: boolean
+            True if the call has been submitted, False if the execution queue is full.
+        '''
+        assert callable(call), 'Invalid call %s' % call
+        assert callable(done), 'Invalid done call back %s' % done
+        assert callable(failed), 'Invalid failed call back %s' % failed
+        try: self._calls.put_nowait((call, done, failed))
+        except Full: return False
+        return True
+
+    def wakeup(self):
+        '''
+        Wakes up the asyncore loop, can be called from any thread.
+        '''
+        os.write(self._wakeup, b'x')
+    
+    def readable(self):
+        '''
+        @see: dispatcher.readable
+        '''
+        return True
+    
+    def writable(self):
+        '''
+        @see: dispatcher.writable
+        '''
+        return False
+    
+    def handle_read(self):
+        '''
+        @see: dispatcher.handle_read
+        '''
+        self.recv(1024)
+        while self._done:
+            callBack, args = self._done.popleft()
+            callBack(*args)
+            
+    def handle_error(self):
+        log.exception('A problem occurred in the execution call backs')
+    
+    # ----------------------------------------------------------------
+    
+    def _work(self):
+        '''
+        The worker thread target.
+        '''
+        while True:
+            call, done, failed = self._calls.get()
+            try: self._done.append((done, (call(),)))
+            except:
+                log.exception('A problem occurred while executing %s', call)
+                self._done.append((failed, ()))
+            os.write(self._wakeup, b'x')
+
 # --------------------------------------------------------------------
 
+def chunked(source):
+    '''
+    Provides a generator that encodes the provided source using the HTTP chunked transfer encoding.
+
+    @param source: Iterable(bytes)
+        The source to be chunked.
+    '''
+    for data in source:
+        if data: yield b''.join((('%X\r\n' % len(data)).encode(), data, b'\r\n'))
+    yield b'0\r\n\r\n'
+
 def run(server):
     '''
     Run the asyncore server.
@@ -394,8 +836,12 @@ def run(server):
     assert isinstance(server, AsyncServer), 'Invalid server %s' % server
         
     try:
-        log.info('=' * 50 + ' Started Async HTTP server...')
-        server.serve_forever()
+        if server.workers > 1:
+            log.info('=' * 50 + ' Started Async HTTP server with %s workers...' % server.workers)
+            server.serve_workers()
+        else:
+            log.info('=' * 50 + ' Started Async HTTP server...')
+            server.serve_forever()
     except KeyboardInterrupt:
         log.info('=' * 50 + ' ^C received, shutting down server')
         server.close()
@@ -403,4 +849,3 @@ def run(server):
         log.exception('=' * 50 + ' The server has stooped')
         try: server.close()
         except: pass
-        
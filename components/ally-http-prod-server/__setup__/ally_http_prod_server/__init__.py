@@ -1,20 +1,19 @@
 '''
 Created on Jul 15, 2011
 
-@package: ally core http
+@package: ally http
 @copyright: 2012 Sourcefabric o.p.s.
 @license: http://www.gnu.org/licenses/gpl-3.0.txt
 @author: Gabriel Nistor
 
-Contains setup and configuration files for the HTTP REST server.
+Contains setup and configuration files for the HTTP production server.
 '''
 
-from __setup__ import ally_api
-from ally.container import ioc
+from .. import ally_http
 
 # --------------------------------------------------------------------
 
 NAME = 'ally HTTP production server'
-GROUP = ally_api.GROUP
+GROUP = ally_http.GROUP
 VERSION = '1.0'
 DESCRIPTION = 'Provides the HTTP production server'
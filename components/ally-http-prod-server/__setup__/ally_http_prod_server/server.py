@@ -0,0 +1,75 @@
+'''
+Created on Nov 23, 2011
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Runs the production web server.
+'''
+
+from ..ally_http import server_type, server_version, server_host, server_port
+from ..ally_http.server import assemblyServer
+from ally.container import ioc
+from ally.http.server import server_production
+from multiprocessing import cpu_count
+from threading import Thread
+
+# --------------------------------------------------------------------
+
+SERVER_PRODUCTION = 'production'
+# The production server name
+
+# --------------------------------------------------------------------
+
+ioc.doc(server_type, '''
+    "production" - server made based on the python build in http server that runs a worker process for each CPU, the
+                   worker processes share the server port (requires the SO_REUSEPORT socket option)
+''')
+
+@ioc.config
+def processes_pool_size() -> int:
+    '''
+    The number of worker processes to use, if 0 then the number of processes will be the number of available CPUs
+    on the machine.
+    '''
+    return 0
+
+@ioc.config
+def processes_thread_size() -> int:
+    '''The number of threads per worker process to use'''
+    return 20
+
+@ioc.config
+def processes_shutdown_timeout() -> float:
+    '''
+    The number of seconds to wait for the worker processes to finalize the requests in progress when the server is
+    shutting down
+    '''
+    return 10.0
+
+# --------------------------------------------------------------------
+
+@ioc.entity
+def serverProductionRequestHandler(): return server_production.ProductionRequestHandler
+
+@ioc.entity
+def serverProduction():
+    b = server_production.ProductionServer()
+    b.serverVersion = server_version()
+    b.serverHost = server_host()
+    b.serverPort = server_port()
+    b.requestHandlerFactory = serverProductionRequestHandler()
+    b.assembly = assemblyServer()
+    b.processes = processes_pool_size() or cpu_count()
+    b.threads = processes_thread_size()
+    b.shutdownTimeout = processes_shutdown_timeout()
+    return b
+
+# --------------------------------------------------------------------
+
+@ioc.start
+def runServer():
+    if server_type() == SERVER_PRODUCTION:
+        Thread(name='HTTP server thread', target=server_production.run, args=(serverProduction(),)).start()
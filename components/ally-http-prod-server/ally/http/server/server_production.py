@@ -0,0 +1,245 @@
+'''
+Created on Jul 8, 2011
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the production web server based on the python build in http server that runs on multiple processors, each
+worker process binds its own listening socket on the same port (SO_REUSEPORT) and serves the accepted connections
+using a pool of threads.
+'''
+
+from ally.container.ioc import injected
+from ally.design.processor.assembly import Assembly
+from ally.http.server.server_basic import RequestHandler
+from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
+    ResponseContentHTTP
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from multiprocessing import Process, Event
+from threading import Thread
+import logging
+import socket
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+class ProductionRequestHandler(RequestHandler):
+    '''
+    @see: RequestHandler
+    The request handler used by the production worker servers.
+    '''
+
+    def __init__(self, request, address, server):
+        '''
+        @see: RequestHandler.__init__
+        '''
+        assert isinstance(address, tuple), 'Invalid address %s' % address
+        assert isinstance(server, WorkerServer), 'Invalid server %s' % server
+        self.server_version = server.serverVersion  # Needs to be before the __init__
+        BaseHTTPRequestHandler.__init__(self, request, address, server)
+
+class WorkerServer(HTTPServer):
+    '''
+    @see: HTTPServer
+    The server that runs in a worker process, the listening socket is bound with SO_REUSEPORT so that the kernel
+    distributes the connections between the worker processes and the requests are handled by a pool of threads.
+    '''
+
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, address, requestHandlerFactory, serverVersion, processing, threads):
+        '''
+        Construct the worker server.
+
+        @param address: tuple(string, integer)
+            The address to bind to.
+        @param requestHandlerFactory: callable(socket, tuple, WorkerServer)
+            The factory that provides the request handlers.
+        @param serverVersion: string
+            The server version name.
+        @param processing: Processing
+            The processing used for resolving the requests.
+        @param threads: integer
+            The number of threads that handle the requests.
+        '''
+        assert isinstance(serverVersion, str), 'Invalid server version %s' % serverVersion
+        assert isinstance(threads, int) and threads > 0, 'Invalid threads %s' % threads
+        super().__init__(address, requestHandlerFactory)
+
+        self.serverVersion = serverVersion
+        self.processing = processing
+        self._pool = ThreadPoolExecutor(threads)
+
+    def server_bind(self):
+        '''
+        @see: HTTPServer.server_bind
+        '''
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, address):
+        '''
+        @see: HTTPServer.process_request
+        '''
+        self._pool.submit(self._process, request, address)
+
+    def server_close(self):
+        '''
+        @see: HTTPServer.server_close
+        Closes the listening socket and waits for the requests in progress to finalize.
+        '''
+        super().server_close()
+        self._pool.shutdown(True)
+
+    # ----------------------------------------------------------------
+
+    def _process(self, request, address):
+        '''
+        Process the request in a pool thread.
+        '''
+        try: self.finish_request(request, address)
+        except: self.handle_error(request, address)
+        finally: self.shutdown_request(request)
+
+    def handle_error(self, request, address):
+        '''
+        @see: HTTPServer.handle_error
+        '''
+        log.exception('A problem occurred while processing the request from %s', address)
+
+# --------------------------------------------------------------------
+
+@injected
+class ProductionServer:
+    '''
+    The production server that manages the worker processes.
+    '''
+
+    serverVersion = str
+    # The server version name
+    serverHost = str
+    # The server address host
+    serverPort = int
+    # The server port
+    requestHandlerFactory = ProductionRequestHandler
+    # The factory that provides request handlers, takes as arguments the request socket, client address and the worker
+    # server.
+    assembly = Assembly
+    # The assembly used for resolving the requests
+    processes = int
+    # The number of worker processes.
+    threads = 20
+    # The number of threads per worker process.
+    superviseInterval = 1.0
+    # The number of seconds between the checks for dead worker processes.
+    shutdownTimeout = 10.0
+    # The number of seconds the worker processes are waited to finalize the requests in progress before terminating them.
+
+    def __init__(self):
+        '''
+        Construct the server.
+        '''
+        assert isinstance(self.serverVersion, str), 'Invalid server version %s' % self.serverVersion
+        assert isinstance(self.serverHost, str), 'Invalid server host %s' % self.serverHost
+        assert isinstance(self.serverPort, int), 'Invalid server port %s' % self.serverPort
+        assert callable(self.requestHandlerFactory), 'Invalid request handler factory %s' % self.requestHandlerFactory
+        assert isinstance(self.assembly, Assembly), 'Invalid assembly %s' % self.assembly
+        assert isinstance(self.processes, int) and self.processes > 0, 'Invalid processes %s' % self.processes
+        assert isinstance(self.threads, int) and self.threads > 0, 'Invalid threads %s' % self.threads
+        assert isinstance(self.superviseInterval, float), 'Invalid supervise interval %s' % self.superviseInterval
+        assert isinstance(self.shutdownTimeout, float), 'Invalid shutdown timeout %s' % self.shutdownTimeout
+        if not hasattr(socket, 'SO_REUSEPORT'): raise OSError('The SO_REUSEPORT socket option is not supported')
+
+        self._stopped = Event()
+        self._workers = []
+
+    def serve_forever(self):
+        '''
+        Starts the worker processes and supervises them, a worker process that died is restarted.
+        '''
+        self._workers = [self._startWorker(k) for k in range(self.processes)]
+        try:
+            while not self._stopped.wait(self.superviseInterval):
+                for k, worker in enumerate(self._workers):
+                    if not worker.is_alive():
+                        log.error('Worker %s has stopped with exit code %s, restarting', worker.name, worker.exitcode)
+                        self._workers[k] = self._startWorker(k)
+        finally: self.server_close()
+
+    def stop(self):
+        '''
+        Stops the supervising and the worker processes, can be called from any thread.
+        '''
+        self._stopped.set()
+
+    def server_close(self):
+        '''
+        Gracefully stops the worker processes, the requests in progress are allowed to finalize.
+        '''
+        self._stopped.set()
+        for worker in self._workers:
+            worker.join(self.shutdownTimeout)
+            if worker.is_alive():
+                log.warning('Worker %s did not stop in time, terminating', worker.name)
+                worker.terminate()
+                worker.join()
+
+    # ----------------------------------------------------------------
+
+    def _startWorker(self, index):
+        '''
+        Starts a new worker process.
+        '''
+        worker = Process(name='HTTP worker %s' % index, target=self._work)
+        worker.daemon = True
+        worker.start()
+        return worker
+
+    def _work(self):
+        '''
+        Runs the worker server in the worker process.
+        '''
+        processing = self.assembly.create(request=RequestHTTP, requestCnt=RequestContentHTTP,
+                                          response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+        server = WorkerServer((self.serverHost, self.serverPort), self.requestHandlerFactory, self.serverVersion,
+                              processing, self.threads)
+
+        def watch():
+            self._stopped.wait()
+            server.shutdown()
+        watcher = Thread(name='HTTP worker stop watcher', target=watch)
+        watcher.daemon = True
+        watcher.start()
+
+        try: server.serve_forever()
+        except KeyboardInterrupt: pass
+        finally: server.server_close()
+
+# --------------------------------------------------------------------
+
+def run(server):
+    '''
+    Run the production server.
+
+    @param server: ProductionServer
+        The server to run.
+    '''
+    assert isinstance(server, ProductionServer), 'Invalid server %s' % server
+
+    try:
+        log.info('=' * 50 + ' Started HTTP production server...')
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info('=' * 50 + ' ^C received, shutting down server')
+        server.server_close()
+    except:
+        log.exception('=' * 50 + ' The server has stooped')
+        try: server.server_close()
+        except: pass
@@ -1,7 +1,7 @@
 '''
 Created on June 14, 2012
 
-@package: ally core http
+@package: ally http
 @copyright: 2012 Sourcefabric o.p.s.
 @license: http://www.gnu.org/licenses/gpl-3.0.txt
 @author: Gabriel Nistor
@@ -17,7 +17,7 @@ setup(
     name='ally_http_prod_server',
     version='1.0',
     packages=find_packages(),
-    install_requires=['ally_core_http >= 1.0'],
+    install_requires=['ally_http >= 1.0'],
     platforms=['all'],
     test_suite='test',
     zip_safe=True,
@@ -26,8 +26,8 @@ setup(
     author='Gabriel Nistor',
     author_email='gabriel.nistor@sourcefabric.org',
     description='Ally framework - HTTP server that is suited for production environments',
-    long_description='Provides a server extension that runs on multiple processors',
+    long_description='Provides a server extension that runs worker processes sharing the server port',
     license='GPL v3',
-    keywords='Ally REST framework',
+    keywords='Ally HTTP framework',
     url='http://www.sourcefabric.org/en/superdesk/',  # project home page
 )
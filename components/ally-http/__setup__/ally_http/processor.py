@@ -12,6 +12,7 @@ Provides the configurations for the processors used in handling the request.
 from ally.container import ioc
 from ally.design.processor.assembly import Assembly
 from ally.design.processor.handler import Handler
+from ally.http.impl.processor.conditional import ConditionalHandler
 from ally.http.impl.processor.deliver_code import DeliverCodeHandler
 from ally.http.impl.processor.header import HeaderDecodeRequestHandler, \
     HeaderDecodeResponseHandler, HeaderEncodeResponseHandler, \
@@ -19,6 +20,8 @@ from ally.http.impl.processor.header import HeaderDecodeRequestHandler, \
 from ally.http.impl.processor.headers.accept import AcceptRequestDecodeHandler, \
     AcceptRequestEncodeHandler
 from ally.http.impl.processor.headers.allow import AllowEncodeHandler
+from ally.http.impl.processor.headers.content_encoding import \
+    AcceptEncodingDecodeHandler, ContentEncodingEncodeHandler
 from ally.http.impl.processor.headers.content_length import \
     ContentLengthDecodeHandler, ContentLengthEncodeHandler
 from ally.http.impl.processor.headers.content_type import \
@@ -26,6 +29,7 @@ from ally.http.impl.processor.headers.content_type import \
     ContentTypeResponseDecodeHandler
 from ally.http.impl.processor.internal_error import InternalErrorHandler
 from ally.http.impl.processor.method_override import MethodOverrideHandler
+from ally.http.impl.processor.partial import PartialContentHandler
 from ally.http.impl.processor.path_encoder import EncoderPathHandler
 from ally.http.spec.codes import PATH_NOT_FOUND
 
@@ -37,6 +41,11 @@ def read_from_params():
     '''If true will also read header values that are provided as query parameters'''
     return True
 
+@ioc.config
+def allow_compression():
+    '''If true the response content will be compressed with an encoding accepted by the request'''
+    return True
+
 # --------------------------------------------------------------------
 
 @ioc.entity
@@ -78,6 +87,12 @@ def contentLengthDecode() -> Handler: return ContentLengthDecodeHandler()
 @ioc.entity
 def contentLengthEncode() -> Handler: return ContentLengthEncodeHandler()
 
+@ioc.entity
+def acceptEncodingDecode() -> Handler: return AcceptEncodingDecodeHandler()
+
+@ioc.entity
+def contentEncodingEncode() -> Handler: return ContentEncodingEncodeHandler()
+
 @ioc.entity
 def methodOverride() -> Handler: return MethodOverrideHandler()
 
@@ -87,6 +102,12 @@ def encoderPath() -> Handler: return EncoderPathHandler()
 @ioc.entity
 def allowEncode() -> Handler: return AllowEncodeHandler()
 
+@ioc.entity
+def conditional() -> Handler: return ConditionalHandler()
+
+@ioc.entity
+def partialContent() -> Handler: return PartialContentHandler()
+
 @ioc.entity
 def deliverNotFound() -> Handler:
     b = DeliverCodeHandler()
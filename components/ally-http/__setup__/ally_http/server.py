@@ -13,6 +13,7 @@ from . import server_type, server_version, server_host, server_port
 from .processor import assemblyNotFound
 from ally.container import ioc
 from ally.design.processor.assembly import Assembly
+from ally.design.processor import instrument
 from ally.design.processor.handler import Handler
 from ally.http.impl.processor.router_by_path import RoutingByPathHandler
 from ally.http.server import server_basic
@@ -20,6 +21,16 @@ from threading import Thread
 
 # --------------------------------------------------------------------
 
+@ioc.config
+def server_instrumentation() -> bool:
+    '''
+    Flag indicating that the processors calls should be instrumented, for each processor the calls count and the
+    execution times are collected, use this only when investigating the performance since it slows down the processing
+    '''
+    return False
+
+# --------------------------------------------------------------------
+
 @ioc.entity
 def assemblyServer() -> Assembly:
     '''
@@ -55,6 +66,10 @@ def notFoundRouter() -> Handler:
 def updateAssemblyServer():
     assemblyServer().add(notFoundRouter())
 
+@ioc.before(assemblyServer)
+def enableInstrumentation():
+    if server_instrumentation(): instrument.enable()
+
 # --------------------------------------------------------------------
 
 @ioc.start
@@ -0,0 +1,66 @@
+'''
+Created on Mar 26, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the conditional handler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.http.impl.processor.conditional import ConditionalHandler
+from ally.http.impl.processor.header import DecoderHeader, HeaderConfigurations
+from email.utils import formatdate
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestConditional(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = ConditionalHandler()
+        ioc.initialize(self.handler)
+        self.configuration = HeaderConfigurations()
+
+    def decoder(self, **headers):
+        return DecoderHeader(self.configuration, {name.replace('_', '-'): value for name, value in headers.items()})
+
+    def testNoConditions(self):
+        self.assertFalse(self.handler.isNotModified(self.decoder(), '"abc"', 1000))
+
+    def testIfNoneMatch(self):
+        isNotModified = self.handler.isNotModified
+
+        self.assertTrue(isNotModified(self.decoder(If_None_Match='"abc"'), '"abc"', None))
+        self.assertTrue(isNotModified(self.decoder(If_None_Match='"xyz", "abc"'), '"abc"', None))
+        self.assertTrue(isNotModified(self.decoder(If_None_Match='W/"abc"'), '"abc"', None))
+        self.assertTrue(isNotModified(self.decoder(If_None_Match='*'), '"abc"', None))
+        self.assertFalse(isNotModified(self.decoder(If_None_Match='"xyz"'), '"abc"', None))
+        self.assertFalse(isNotModified(self.decoder(If_None_Match='abc'), '"abc"', None))
+        self.assertFalse(isNotModified(self.decoder(If_None_Match='*'), None, None))
+
+    def testIfNoneMatchIgnoresModifiedSince(self):
+        decoder = self.decoder(If_None_Match='"xyz"', If_Modified_Since=formatdate(2000, usegmt=True))
+        self.assertFalse(self.handler.isNotModified(decoder, '"abc"', 1000))
+
+    def testIfModifiedSince(self):
+        isNotModified = self.handler.isNotModified
+
+        self.assertTrue(isNotModified(self.decoder(If_Modified_Since=formatdate(1000, usegmt=True)), None, 1000))
+        self.assertTrue(isNotModified(self.decoder(If_Modified_Since=formatdate(2000, usegmt=True)), None, 1000))
+        self.assertFalse(isNotModified(self.decoder(If_Modified_Since=formatdate(500, usegmt=True)), None, 1000))
+        self.assertFalse(isNotModified(self.decoder(If_Modified_Since=formatdate(2000, usegmt=True)), None, None))
+        self.assertFalse(isNotModified(self.decoder(If_Modified_Since='not a date'), None, 1000))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
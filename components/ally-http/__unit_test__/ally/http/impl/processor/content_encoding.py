@@ -0,0 +1,115 @@
+'''
+Created on Mar 27, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the content encoding handlers.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.design.processor.assembly import Assembly
+from ally.design.processor.attribute import defines, optional
+from ally.design.processor.context import Context
+from ally.design.processor.execution import Chain
+from ally.http.impl.processor.header import DecoderHeader, HeaderConfigurations
+from ally.http.impl.processor.headers.content_encoding import AcceptEncodingDecodeHandler, StreamCompressed, \
+    ENCODING_WBITS, ENCODING_GZIP, ENCODING_DEFLATE
+from ally.http.spec.server import IDecoderHeader
+from io import BytesIO
+import unittest
+import zlib
+
+# --------------------------------------------------------------------
+
+class RequestData(Context):
+    decoderHeader = defines(IDecoderHeader)
+    accEncodings = optional(list)
+
+# --------------------------------------------------------------------
+
+class TestAcceptEncoding(unittest.TestCase):
+
+    def setUp(self):
+        handler = AcceptEncodingDecodeHandler()
+        ioc.initialize(handler)
+
+        assembly = Assembly('test')
+        assembly.add(handler)
+        self.proc = assembly.create(request=RequestData)
+        self.configuration = HeaderConfigurations()
+
+    def decode(self, value):
+        request = self.proc.ctx.request()
+        headers = {} if value is None else {'Accept-Encoding': value}
+        request.decoderHeader = DecoderHeader(self.configuration, headers)
+        Chain(self.proc).process(request=request).doAll()
+        if RequestData.accEncodings in request: return request.accEncodings
+
+    def testNoHeader(self):
+        self.assertIsNone(self.decode(None))
+
+    def testQuality(self):
+        self.assertEqual(self.decode('gzip, deflate'), ['gzip', 'deflate'])
+        self.assertEqual(self.decode('gzip;q=0.5, deflate'), ['deflate', 'gzip'])
+        self.assertEqual(self.decode('GZIP;q=0.2, deflate;q=0.8, identity;q=0.5'), ['deflate', 'identity', 'gzip'])
+
+    def testRejected(self):
+        self.assertEqual(self.decode('gzip;q=0, deflate'), ['deflate'])
+        self.assertEqual(self.decode('gzip;q=high, deflate;q=0.1'), ['deflate'])
+
+# --------------------------------------------------------------------
+
+class Closable(BytesIO):
+
+    closedSource = False
+
+    def close(self):
+        self.closedSource = True
+        super().close()
+
+class TestStreamCompressed(unittest.TestCase):
+
+    content = b''.join(('line %s of the content\n' % k).encode() for k in range(500))
+
+    def compressor(self, encoding):
+        return zlib.compressobj(6, zlib.DEFLATED, ENCODING_WBITS[encoding])
+
+    def testIterable(self):
+        chunks = [self.content[k:k + 1000] for k in range(0, len(self.content), 1000)]
+        stream = StreamCompressed(chunks, self.compressor(ENCODING_DEFLATE), 100)
+        data = stream.read()
+        self.assertEqual(zlib.decompress(data), self.content)
+        self.assertEqual(stream.read(), b'')
+
+    def testStreamChunks(self):
+        source = Closable(self.content)
+        stream = StreamCompressed(source, self.compressor(ENCODING_GZIP), 256)
+        data = bytearray()
+        while True:
+            chunk = stream.read(50)
+            self.assertLessEqual(len(chunk), 50)
+            if not chunk: break
+            data.extend(chunk)
+        self.assertTrue(source.closedSource)
+        self.assertEqual(zlib.decompress(bytes(data), ENCODING_WBITS[ENCODING_GZIP]), self.content)
+
+    def testClose(self):
+        source = Closable(self.content)
+        with StreamCompressed(source, self.compressor(ENCODING_GZIP), 256) as stream:
+            stream.read(10)
+        self.assertTrue(source.closedSource)
+        self.assertRaises(ValueError, stream.read)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,164 @@
+'''
+Created on Apr 2, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the partial content handler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.design.processor.assembly import Assembly
+from ally.design.processor.attribute import defines
+from ally.design.processor.context import Context
+from ally.design.processor.execution import Chain
+from ally.http.impl.processor.header import DecoderHeader, EncoderHeader, HeaderConfigurations
+from ally.http.impl.processor.partial import PartialContentHandler
+from ally.http.spec.codes import PATH_FOUND, PARTIAL_CONTENT, RANGE_NOT_SATISFIABLE
+from ally.http.spec.server import IDecoderHeader, IEncoderHeader, HTTP_GET
+from ally.support.util_io import IInputStream
+from collections import Iterable
+from email.utils import formatdate
+from io import BytesIO
+import unittest
+
+# --------------------------------------------------------------------
+
+class RequestData(Context):
+    method = defines(str)
+    decoderHeader = defines(IDecoderHeader)
+
+class ResponseData(Context):
+    encoderHeader = defines(IEncoderHeader)
+    code = defines(str)
+    status = defines(int)
+    isSuccess = defines(bool)
+
+class ResponseContentData(Context):
+    lastModified = defines(int)
+    eTag = defines(str)
+    source = defines(IInputStream, Iterable)
+    length = defines(int)
+    type = defines(str)
+
+# --------------------------------------------------------------------
+
+class TestPartialContent(unittest.TestCase):
+
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.handler = PartialContentHandler()
+        self.handler.bufferSize = 100
+        ioc.initialize(self.handler)
+
+        assembly = Assembly('test')
+        assembly.add(self.handler)
+        self.proc = assembly.create(request=RequestData, response=ResponseData, responseCnt=ResponseContentData)
+        self.configuration = HeaderConfigurations()
+
+    def process(self, headers, eTag=None, lastModified=None):
+        request, response = self.proc.ctx.request(), self.proc.ctx.response()
+        responseCnt = self.proc.ctx.responseCnt()
+        request.method, request.decoderHeader = HTTP_GET, DecoderHeader(self.configuration, headers)
+        response.encoderHeader = EncoderHeader(self.configuration)
+        response.code, response.status, response.isSuccess = PATH_FOUND
+        responseCnt.source, responseCnt.length, responseCnt.type = BytesIO(self.content), len(self.content), 'text/plain'
+        responseCnt.eTag, responseCnt.lastModified = eTag, lastModified
+        Chain(self.proc).process(request=request, response=response, responseCnt=responseCnt).doAll()
+        return response, responseCnt
+
+    def testParseRanges(self):
+        parseRanges = self.handler.parseRanges
+
+        self.assertEqual(parseRanges('bytes=0-99', 1000), [(0, 99)])
+        self.assertEqual(parseRanges('bytes=900-', 1000), [(900, 999)])
+        self.assertEqual(parseRanges('bytes=-100', 1000), [(900, 999)])
+        self.assertEqual(parseRanges('bytes=-2000', 1000), [(0, 999)])
+        self.assertEqual(parseRanges('bytes=990-2000', 1000), [(990, 999)])
+        self.assertEqual(parseRanges('bytes=500-599, 0-99', 1000), [(0, 99), (500, 599)])
+        self.assertEqual(parseRanges('bytes=0-99, 50-149, 150-199', 1000), [(0, 199)])
+        self.assertEqual(parseRanges('Bytes = 0-9', 1000), [(0, 9)])
+
+    def testParseRangesUnsatisfiable(self):
+        self.assertEqual(self.handler.parseRanges('bytes=1000-', 1000), [])
+        self.assertEqual(self.handler.parseRanges('bytes=-0', 1000), [])
+
+    def testParseRangesInvalid(self):
+        parseRanges = self.handler.parseRanges
+
+        self.assertIsNone(parseRanges('items=0-9', 1000))
+        self.assertIsNone(parseRanges('bytes=9-0', 1000))
+        self.assertIsNone(parseRanges('bytes=a-9', 1000))
+        self.assertIsNone(parseRanges('bytes=-', 1000))
+        self.assertIsNone(parseRanges('bytes=10', 1000))
+
+    def testIsUnchanged(self):
+        lastModified = 1364900000
+        responseCnt = self.proc.ctx.responseCnt()
+        responseCnt.eTag, responseCnt.lastModified = '"abc"', lastModified
+
+        def isUnchanged(value):
+            headers = {} if value is None else {'If-Range': value}
+            return self.handler.isUnchanged(DecoderHeader(self.configuration, headers), responseCnt)
+
+        self.assertTrue(isUnchanged(None))
+        self.assertTrue(isUnchanged('"abc"'))
+        self.assertFalse(isUnchanged('"xyz"'))
+        self.assertFalse(isUnchanged('W/"abc"'))
+        self.assertTrue(isUnchanged(formatdate(lastModified, usegmt=True)))
+        self.assertFalse(isUnchanged(formatdate(lastModified - 10, usegmt=True)))
+        self.assertFalse(isUnchanged('not a date'))
+
+        responseCnt.eTag = responseCnt.lastModified = None
+        self.assertFalse(isUnchanged('"abc"'))
+        self.assertFalse(isUnchanged(formatdate(lastModified, usegmt=True)))
+
+    def testSingleRange(self):
+        response, responseCnt = self.process({'Range': 'bytes=10-19'})
+
+        self.assertEqual(response.status, PARTIAL_CONTENT.status)
+        self.assertEqual(response.encoderHeader.headers['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(responseCnt.length, 10)
+        self.assertEqual(responseCnt.source.read(), self.content[10:20])
+
+    def testMultipleRanges(self):
+        response, responseCnt = self.process({'Range': 'bytes=0-9, 300-549, -5'})
+
+        self.assertEqual(response.status, PARTIAL_CONTENT.status)
+        self.assertTrue(responseCnt.type.startswith('multipart/byteranges; boundary='))
+        boundary = responseCnt.type.partition('boundary=')[2]
+
+        data = b''.join(responseCnt.source)
+        self.assertEqual(responseCnt.length, len(data))
+        self.assertTrue(data.startswith(('--%s\r\nContent-Type: text/plain\r\n' % boundary).encode('ascii')))
+        self.assertTrue(data.endswith(('\r\n--%s--\r\n' % boundary).encode('ascii')))
+        self.assertIn(b'Content-Range: bytes 300-549/1024\r\n\r\n' + self.content[300:550] + b'\r\n', data)
+        self.assertIn(b'Content-Range: bytes 1019-1023/1024\r\n\r\n' + self.content[1019:], data)
+
+    def testNotSatisfiable(self):
+        response, responseCnt = self.process({'Range': 'bytes=2000-'})
+
+        self.assertEqual(response.status, RANGE_NOT_SATISFIABLE.status)
+        self.assertEqual(response.encoderHeader.headers['Content-Range'], 'bytes */1024')
+        self.assertIsNone(responseCnt.source)
+
+    def testChanged(self):
+        response, responseCnt = self.process({'Range': 'bytes=0-9', 'If-Range': '"xyz"'}, eTag='"abc"')
+
+        self.assertEqual(response.status, PATH_FOUND.status)
+        self.assertEqual(responseCnt.length, len(self.content))
+        self.assertEqual(response.encoderHeader.headers['Accept-Ranges'], 'bytes')
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,156 @@
+'''
+Created on Mar 26, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the conditional GET handling based on the entity tag and last modified validators.
+'''
+
+from ally.container.ioc import injected
+from ally.design.processor.attribute import requires, defines, optional
+from ally.design.processor.context import Context
+from ally.design.processor.handler import HandlerProcessorProceed
+from ally.http.spec.codes import NOT_MODIFIED, PATH_FOUND
+from ally.http.spec.server import IDecoderHeader, IEncoderHeader, HTTP_GET
+from ally.support.util_io import IInputStream, IClosable
+from collections import Iterable
+from email.utils import formatdate, parsedate_tz, mktime_tz
+import hashlib
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    '''
+    The request context.
+    '''
+    # ---------------------------------------------------------------- Required
+    method = requires(str)
+    decoderHeader = requires(IDecoderHeader)
+
+class Response(Context):
+    '''
+    The response context.
+    '''
+    # ---------------------------------------------------------------- Required
+    encoderHeader = requires(IEncoderHeader)
+    # ---------------------------------------------------------------- Defined
+    code = defines(str)
+    status = defines(int)
+    isSuccess = defines(bool)
+
+class ResponseContent(Context):
+    '''
+    The response content context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    lastModified = optional(int)
+    # ---------------------------------------------------------------- Defined
+    source = defines(IInputStream, Iterable)
+    length = defines(int)
+    eTag = defines(str, doc='''
+    @rtype: string
+    The strong entity tag, including the quotes, for the response content, if not provided by a previous processor
+    it is computed from the rendered content.
+    ''')
+
+# --------------------------------------------------------------------
+
+@injected
+class ConditionalHandler(HandlerProcessorProceed):
+    '''
+    Implementation for a processor that encodes the entity tag and last modified validators of a successful GET response
+    and answers with a not modified response if the request conditional headers match the validators. The entity tag is
+    either provided by a previous processor or is the hash of the response content, only content that is already
+    rendered in memory is hashed, streamed content has no entity tag unless one is provided.
+    '''
+
+    nameETag = 'ETag'
+    # The header name for the entity tag.
+    nameLastModified = 'Last-Modified'
+    # The header name for the last modified date.
+    nameIfNoneMatch = 'If-None-Match'
+    # The header name for the entity tags to be matched.
+    nameIfModifiedSince = 'If-Modified-Since'
+    # The header name for the date to check the modification against.
+    hashContent = True
+    # Flag indicating that the entity tag should be computed from the rendered content if none is provided.
+
+    def __init__(self):
+        assert isinstance(self.nameETag, str), 'Invalid entity tag name %s' % self.nameETag
+        assert isinstance(self.nameLastModified, str), 'Invalid last modified name %s' % self.nameLastModified
+        assert isinstance(self.nameIfNoneMatch, str), 'Invalid if none match name %s' % self.nameIfNoneMatch
+        assert isinstance(self.nameIfModifiedSince, str), \
+        'Invalid if modified since name %s' % self.nameIfModifiedSince
+        assert isinstance(self.hashContent, bool), 'Invalid hash content flag %s' % self.hashContent
+        super().__init__()
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        '''
+        @see: HandlerProcessorProceed.process
+
+        Encodes the validators and checks the conditional headers.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+
+        if response.isSuccess is False: return  # Skip in case the response is in error
+        if request.method != HTTP_GET or response.status != PATH_FOUND.status: return
+        assert isinstance(request.decoderHeader, IDecoderHeader), 'Invalid header decoder %s' % request.decoderHeader
+        assert isinstance(response.encoderHeader, IEncoderHeader), \
+        'Invalid response header encoder %s' % response.encoderHeader
+
+        if not responseCnt.eTag and self.hashContent and isinstance(responseCnt.source, (tuple, list)):
+            digest = hashlib.md5()
+            for bytes in responseCnt.source: digest.update(bytes)
+            responseCnt.eTag = '"%s"' % digest.hexdigest()
+
+        if ResponseContent.lastModified in responseCnt: lastModified = responseCnt.lastModified
+        else: lastModified = None
+
+        if responseCnt.eTag: response.encoderHeader.encode(self.nameETag, responseCnt.eTag)
+        if lastModified is not None:
+            response.encoderHeader.encode(self.nameLastModified, formatdate(lastModified, usegmt=True))
+
+        if self.isNotModified(request.decoderHeader, responseCnt.eTag, lastModified):
+            if isinstance(responseCnt.source, IClosable): responseCnt.source.close()
+            responseCnt.source = responseCnt.length = None
+            response.code, response.status, response.isSuccess = NOT_MODIFIED
+
+    # ----------------------------------------------------------------
+
+    def isNotModified(self, decoder, eTag, lastModified):
+        '''
+        Checks if the conditional headers indicate that the client has the content, if the request has entity tags to
+        match the modification date is not checked anymore.
+
+        @param decoder: IDecoderHeader
+            The request headers decoder.
+        @param eTag: string|None
+            The entity tag of the response content.
+        @param lastModified: integer|None
+            The last modification time of the response content.
+        @return: boolean
+            True if the response content is not modified, False otherwise.
+        '''
+        assert isinstance(decoder, IDecoderHeader), 'Invalid header decoder %s' % decoder
+
+        value = decoder.retrieve(self.nameIfNoneMatch)
+        if value:
+            if not eTag: return False
+            for tag in value.split(','):
+                tag = tag.strip()
+                if tag == '*': return True
+                if tag.startswith('W/'): tag = tag[2:]
+                if tag == eTag: return True
+            return False
+
+        if lastModified is None: return False
+        value = decoder.retrieve(self.nameIfModifiedSince)
+        if not value: return False
+        since = parsedate_tz(value)
+        if since is None: return False
+        return lastModified <= mktime_tz(since)
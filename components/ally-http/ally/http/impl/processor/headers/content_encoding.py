@@ -0,0 +1,271 @@
+'''
+Created on Mar 27, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the accept encoding and content encoding headers handling, basically the response content compression.
+'''
+
+from ally.container.ioc import injected
+from ally.design.processor.attribute import requires, defines, optional
+from ally.design.processor.context import Context
+from ally.design.processor.handler import HandlerProcessorProceed
+from ally.http.spec.server import IDecoderHeader, IEncoderHeader
+from ally.support.util_io import IInputStream, IClosable
+from collections import Iterable
+import zlib
+
+# --------------------------------------------------------------------
+
+ENCODING_GZIP = 'gzip'
+# The gzip content encoding name.
+ENCODING_DEFLATE = 'deflate'
+# The deflate content encoding name.
+ENCODING_WBITS = {ENCODING_GZIP: 16 + zlib.MAX_WBITS, ENCODING_DEFLATE: zlib.MAX_WBITS}
+# The zlib window bits to use for the content encodings, the gzip header is written by zlib without a timestamp.
+
+# --------------------------------------------------------------------
+
+class RequestDecode(Context):
+    '''
+    The request decode context.
+    '''
+    # ---------------------------------------------------------------- Required
+    decoderHeader = requires(IDecoderHeader)
+    # ---------------------------------------------------------------- Defined
+    accEncodings = defines(list, doc='''
+    @rtype: list[string]
+    The content encodings accepted for response, in the order of preference.
+    ''')
+
+# --------------------------------------------------------------------
+
+@injected
+class AcceptEncodingDecodeHandler(HandlerProcessorProceed):
+    '''
+    Implementation for a processor that provides the decoding of accept encoding HTTP request header.
+    '''
+
+    nameAcceptEncoding = 'Accept-Encoding'
+    # The name for the accept encoding header
+    attrQuality = 'q'
+    # The attribute name for the encoding quality.
+
+    def __init__(self):
+        assert isinstance(self.nameAcceptEncoding, str), 'Invalid accept encoding name %s' % self.nameAcceptEncoding
+        assert isinstance(self.attrQuality, str), 'Invalid quality attribute name %s' % self.attrQuality
+        super().__init__()
+
+    def process(self, request:RequestDecode, **keyargs):
+        '''
+        @see: HandlerProcessorProceed.process
+
+        Decode the accepted encodings, the encodings that have a zero quality are not accepted.
+        '''
+        assert isinstance(request, RequestDecode), 'Invalid request %s' % request
+        assert isinstance(request.decoderHeader, IDecoderHeader), 'Invalid decoder header %s' % request.decoderHeader
+
+        value = request.decoderHeader.decode(self.nameAcceptEncoding)
+        if not value: return
+
+        encodings = []
+        for encoding, attributes in value:
+            try: quality = float(attributes.get(self.attrQuality, 1))
+            except ValueError: continue
+            if quality > 0: encodings.append((quality, encoding.lower()))
+        encodings.sort(key=lambda pack: pack[0], reverse=True)
+        request.accEncodings = [encoding for _quality, encoding in encodings]
+
+# --------------------------------------------------------------------
+
+class RequestEncode(Context):
+    '''
+    The request context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    accEncodings = optional(list)
+
+class ResponseEncode(Context):
+    '''
+    The response context.
+    '''
+    # ---------------------------------------------------------------- Required
+    encoderHeader = requires(IEncoderHeader)
+    # ---------------------------------------------------------------- Optional
+    isSuccess = optional(bool)
+
+class ResponseContentEncode(Context):
+    '''
+    The response content context.
+    '''
+    # ---------------------------------------------------------------- Required
+    type = requires(str)
+    # ---------------------------------------------------------------- Optional
+    eTag = optional(str)
+    # ---------------------------------------------------------------- Defined
+    source = defines(IInputStream, Iterable)
+    length = defines(int)
+    encoding = defines(str, doc='''
+    @rtype: string
+    The content encoding of the response content, if a previous processor provides an already encoded content it
+    needs to set the encoding also.
+    ''')
+
+# --------------------------------------------------------------------
+
+@injected
+class ContentEncodingEncodeHandler(HandlerProcessorProceed):
+    '''
+    Implementation for a processor that compresses the response content based on the accepted encodings and provides the
+    encoding of content encoding HTTP response header. The content already rendered in memory is compressed at once and
+    the content length is adjusted, the streamed content is compressed incrementally while read and has no length.
+    '''
+
+    nameContentEncoding = 'Content-Encoding'
+    # The name for the content encoding header
+    nameVary = 'Vary'
+    # The name for the vary header
+    nameAcceptEncoding = 'Accept-Encoding'
+    # The name for the accept encoding header, used as a value for the vary header.
+    minimumSize = 1024
+    # The minimum size in bytes that the content needs to have in order to be compressed.
+    compressLevel = 6
+    # The zlib compression level.
+    bufferSize = 4096
+    # The buffer size used in reading the streamed content.
+    excludedTypes = ['image/', 'audio/', 'video/', 'application/zip', 'application/gzip', 'application/x-gzip',
+                     'application/x-compress', 'application/x-bzip2', 'application/x-rar-compressed',
+                     'application/x-7z-compressed', 'application/pdf', 'application/octet-stream']
+    # The content types, or content type prefixes, that are not compressed since they are already compressed.
+
+    def __init__(self):
+        assert isinstance(self.nameContentEncoding, str), 'Invalid content encoding name %s' % self.nameContentEncoding
+        assert isinstance(self.nameVary, str), 'Invalid vary name %s' % self.nameVary
+        assert isinstance(self.nameAcceptEncoding, str), 'Invalid accept encoding name %s' % self.nameAcceptEncoding
+        assert isinstance(self.minimumSize, int), 'Invalid minimum size %s' % self.minimumSize
+        assert isinstance(self.compressLevel, int), 'Invalid compress level %s' % self.compressLevel
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        assert isinstance(self.excludedTypes, (list, tuple)), 'Invalid excluded types %s' % self.excludedTypes
+        super().__init__()
+
+        self._excludedTypes = tuple(self.excludedTypes)
+
+    def process(self, request:RequestEncode, response:ResponseEncode, responseCnt:ResponseContentEncode, **keyargs):
+        '''
+        @see: HandlerProcessorProceed.process
+
+        Compresses the response content.
+        '''
+        assert isinstance(request, RequestEncode), 'Invalid request %s' % request
+        assert isinstance(response, ResponseEncode), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContentEncode), 'Invalid response content %s' % responseCnt
+        assert isinstance(response.encoderHeader, IEncoderHeader), \
+        'Invalid response header encoder %s' % response.encoderHeader
+
+        if ResponseEncode.isSuccess in response and response.isSuccess is False: return  # Skip in case of error
+        if responseCnt.source is None: return
+        if responseCnt.encoding:
+            response.encoderHeader.encode(self.nameVary, self.nameAcceptEncoding)
+            response.encoderHeader.encode(self.nameContentEncoding, responseCnt.encoding)
+            return
+
+        if not responseCnt.type or responseCnt.type.lower().startswith(self._excludedTypes): return
+        response.encoderHeader.encode(self.nameVary, self.nameAcceptEncoding)
+
+        if RequestEncode.accEncodings not in request or not request.accEncodings: return
+        for encoding in request.accEncodings:
+            if encoding in ENCODING_WBITS: break
+        else: return
+
+        compressor = zlib.compressobj(self.compressLevel, zlib.DEFLATED, ENCODING_WBITS[encoding])
+        if isinstance(responseCnt.source, (tuple, list)):
+            content = b''.join(responseCnt.source)
+            if len(content) < self.minimumSize: return
+            content = compressor.compress(content) + compressor.flush()
+            responseCnt.source, responseCnt.length = (content,), len(content)
+        else:
+            if responseCnt.length is not None and responseCnt.length < self.minimumSize: return
+            responseCnt.source = StreamCompressed(responseCnt.source, compressor, self.bufferSize)
+            responseCnt.length = None
+
+        if ResponseContentEncode.eTag in responseCnt and responseCnt.eTag:
+            responseCnt.eTag = '%s-%s"' % (responseCnt.eTag[:-1], encoding)
+        responseCnt.encoding = encoding
+        response.encoderHeader.encode(self.nameContentEncoding, encoding)
+
+# --------------------------------------------------------------------
+
+class StreamCompressed(IInputStream, IClosable):
+    '''
+    Provides a class that implements the @see: IInputStream that compresses the content read from a stream or generator.
+    '''
+    __slots__ = ('_source', '_compressor', '_bufferSize', '_buffer', '_closed')
+
+    def __init__(self, source, compressor, bufferSize):
+        '''
+        Constructs the compressed stream.
+
+        @param source: IInputStream|Iterable
+            The source to compress the content for.
+        @param compressor: zlib compress object
+            The compressor to use.
+        @param bufferSize: integer
+            The buffer size used in reading the source stream.
+        '''
+        assert isinstance(source, (IInputStream, Iterable)), 'Invalid source %s' % source
+        assert isinstance(bufferSize, int), 'Invalid buffer size %s' % bufferSize
+
+        if not isinstance(source, IInputStream): source = iter(source)
+        self._source = source
+        self._compressor = compressor
+        self._bufferSize = bufferSize
+        self._buffer = bytearray()
+        self._closed = False
+
+    def read(self, nbytes=None):
+        '''
+        @see: IInputStream.read
+        '''
+        if self._closed: raise ValueError('I/O operation on a closed content file')
+
+        buffer = self._buffer
+        while self._source is not None and (not nbytes or len(buffer) < nbytes):
+            if isinstance(self._source, IInputStream): data = self._source.read(self._bufferSize) or None
+            else: data = next(self._source, None)
+            if data is not None: buffer.extend(self._compressor.compress(data))
+            else:
+                buffer.extend(self._compressor.flush())
+                self._closeSource()
+
+        if not nbytes or nbytes >= len(buffer):
+            data = bytes(buffer)
+            del buffer[:]
+        else:
+            data = bytes(buffer[:nbytes])
+            del buffer[:nbytes]
+        return data
+
+    def close(self):
+        '''
+        @see: IClosable.close
+        '''
+        self._closed = True
+        self._closeSource()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # ----------------------------------------------------------------
+
+    def _closeSource(self):
+        '''
+        Closes the source.
+        '''
+        if isinstance(self._source, IClosable): self._source.close()
+        self._source = None
@@ -0,0 +1,265 @@
+'''
+Created on Apr 2, 2013
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the partial content (byte ranges) handling for the GET requests.
+'''
+
+from ally.container.ioc import injected
+from ally.design.processor.attribute import requires, defines, optional
+from ally.design.processor.context import Context
+from ally.design.processor.handler import HandlerProcessorProceed
+from ally.http.spec.codes import PATH_FOUND, PARTIAL_CONTENT, RANGE_NOT_SATISFIABLE
+from ally.http.spec.server import IDecoderHeader, IEncoderHeader, HTTP_GET
+from ally.support.util_io import IInputStream, IClosable, StreamRegion
+from collections import Iterable
+from email.utils import parsedate_tz, mktime_tz
+from uuid import uuid4
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    '''
+    The request context.
+    '''
+    # ---------------------------------------------------------------- Required
+    method = requires(str)
+    decoderHeader = requires(IDecoderHeader)
+
+class Response(Context):
+    '''
+    The response context.
+    '''
+    # ---------------------------------------------------------------- Required
+    encoderHeader = requires(IEncoderHeader)
+    # ---------------------------------------------------------------- Defined
+    code = defines(str)
+    status = defines(int)
+    isSuccess = defines(bool)
+
+class ResponseContent(Context):
+    '''
+    The response content context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    lastModified = optional(int)
+    eTag = optional(str)
+    # ---------------------------------------------------------------- Defined
+    source = defines(IInputStream, Iterable)
+    length = defines(int)
+    type = defines(str, doc='''
+    @rtype: string
+    The content type, for multiple ranges is the multipart byte ranges type.
+    ''')
+
+# --------------------------------------------------------------------
+
+@injected
+class PartialContentHandler(HandlerProcessorProceed):
+    '''
+    Implementation for a processor that delivers only the requested byte ranges of a successful GET response, only the
+    streamed content that can be positioned (is seekable) and has a known length is delivered partially. A single range
+    is delivered as a region of the content stream and multiple ranges as a multipart byte ranges content. The ranges
+    are delivered only if the content is not modified according to the if range header.
+    '''
+
+    nameRange = 'Range'
+    # The header name for the requested ranges.
+    nameIfRange = 'If-Range'
+    # The header name for the validator the ranges are conditioned by.
+    nameAcceptRanges = 'Accept-Ranges'
+    # The header name for the accepted range units.
+    nameContentRange = 'Content-Range'
+    # The header name for the delivered content range.
+    unitBytes = 'bytes'
+    # The range unit for the bytes.
+    maximumRanges = 20
+    # The maximum number of ranges delivered, if the request has more ranges (after merging the overlapping ones) then
+    # the entire content is delivered.
+    bufferSize = 64 * 1024
+    # The buffer size used in reading the ranges for the multipart content.
+
+    def __init__(self):
+        assert isinstance(self.nameRange, str), 'Invalid range name %s' % self.nameRange
+        assert isinstance(self.nameIfRange, str), 'Invalid if range name %s' % self.nameIfRange
+        assert isinstance(self.nameAcceptRanges, str), 'Invalid accept ranges name %s' % self.nameAcceptRanges
+        assert isinstance(self.nameContentRange, str), 'Invalid content range name %s' % self.nameContentRange
+        assert isinstance(self.unitBytes, str), 'Invalid bytes unit %s' % self.unitBytes
+        assert isinstance(self.maximumRanges, int) and self.maximumRanges > 0, \
+        'Invalid maximum ranges %s' % self.maximumRanges
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        super().__init__()
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        '''
+        @see: HandlerProcessorProceed.process
+
+        Delivers the requested ranges.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+
+        if response.isSuccess is False: return  # Skip in case the response is in error
+        if request.method != HTTP_GET or response.status != PATH_FOUND.status: return
+        if responseCnt.length is None or not isinstance(responseCnt.source, IInputStream): return
+        seekable = getattr(responseCnt.source, 'seekable', None)
+        if seekable is None or not seekable(): return
+        assert isinstance(request.decoderHeader, IDecoderHeader), 'Invalid header decoder %s' % request.decoderHeader
+        assert isinstance(response.encoderHeader, IEncoderHeader), \
+        'Invalid response header encoder %s' % response.encoderHeader
+
+        response.encoderHeader.encode(self.nameAcceptRanges, self.unitBytes)
+
+        value = request.decoderHeader.retrieve(self.nameRange)
+        if not value: return
+        ranges = self.parseRanges(value, responseCnt.length)
+        if ranges is None or len(ranges) > self.maximumRanges: return
+        if not self.isUnchanged(request.decoderHeader, responseCnt): return
+
+        if not ranges:
+            response.encoderHeader.encode(self.nameContentRange, '%s */%s' % (self.unitBytes, responseCnt.length))
+            if isinstance(responseCnt.source, IClosable): responseCnt.source.close()
+            responseCnt.source = responseCnt.length = None
+            response.code, response.status, response.isSuccess = RANGE_NOT_SATISFIABLE
+            return
+
+        source, length = responseCnt.source, responseCnt.length
+        assert isinstance(source, IInputStream)
+        base = source.tell()
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            response.encoderHeader.encode(self.nameContentRange, '%s %s-%s/%s' % (self.unitBytes, start, end, length))
+            responseCnt.source = StreamRegion(source, base + start, end - start + 1)
+            responseCnt.length = end - start + 1
+        else:
+            boundary = uuid4().hex
+            heads, size = [], 0
+            for start, end in ranges:
+                head = ['--%s' % boundary]
+                if responseCnt.type: head.append('Content-Type: %s' % responseCnt.type)
+                head.append('%s: %s %s-%s/%s' % (self.nameContentRange, self.unitBytes, start, end, length))
+                head = ('\r\n' if heads else '') + '\r\n'.join(head) + '\r\n\r\n'
+                heads.append(head.encode('ascii'))
+                size += len(heads[-1]) + end - start + 1
+            tail = ('\r\n--%s--\r\n' % boundary).encode('ascii')
+
+            responseCnt.source = readRanges(source, base, ranges, heads, tail, self.bufferSize)
+            responseCnt.length = size + len(tail)
+            responseCnt.type = 'multipart/byteranges; boundary=%s' % boundary
+
+        response.code, response.status, response.isSuccess = PARTIAL_CONTENT
+
+    # ----------------------------------------------------------------
+
+    def parseRanges(self, value, length):
+        '''
+        Parses the ranges header value, the overlapping and adjacent ranges are merged.
+
+        @param value: string
+            The ranges header value.
+        @param length: integer
+            The length of the content.
+        @return: list[tuple(integer, integer)]|None
+            The satisfiable ranges as first and last byte positions, or None if the header value is not valid and
+            needs to be ignored.
+        '''
+        assert isinstance(value, str), 'Invalid value %s' % value
+        assert isinstance(length, int), 'Invalid length %s' % length
+
+        unit, _sep, specs = value.partition('=')
+        if unit.strip().lower() != self.unitBytes: return None
+
+        ranges = []
+        for spec in specs.split(','):
+            spec = spec.strip()
+            if not spec: continue
+            first, sep, last = spec.partition('-')
+            first, last = first.strip(), last.strip()
+            if not sep or (first and not first.isdigit()) or (last and not last.isdigit()): return None
+            if first:
+                start = int(first)
+                if not last: end = length - 1
+                else:
+                    end = int(last)
+                    if end < start: return None
+            elif last:
+                start, end = max(length - int(last), 0), length - 1
+                if int(last) == 0: continue
+            else: return None
+
+            if start < length: ranges.append((start, min(end, length - 1)))
+
+        ranges.sort()
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1] + 1: merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else: merged.append((start, end))
+        return merged
+
+    def isUnchanged(self, decoder, responseCnt):
+        '''
+        Checks if the if range header validator matches the content, the entity tags are compared strongly and the date
+        needs to be exactly the last modified date.
+
+        @param decoder: IDecoderHeader
+            The request headers decoder.
+        @param responseCnt: ResponseContent
+            The response content to check.
+        @return: boolean
+            True if the content is not changed or there is no if range header, False otherwise.
+        '''
+        assert isinstance(decoder, IDecoderHeader), 'Invalid header decoder %s' % decoder
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+
+        value = decoder.retrieve(self.nameIfRange)
+        if not value: return True
+        value = value.strip()
+
+        if value.startswith('"') or value.startswith('W/'):
+            if ResponseContent.eTag not in responseCnt or not responseCnt.eTag: return False
+            return value == responseCnt.eTag
+
+        if ResponseContent.lastModified not in responseCnt or responseCnt.lastModified is None: return False
+        since = parsedate_tz(value)
+        if since is None: return False
+        return responseCnt.lastModified == mktime_tz(since)
+
+# --------------------------------------------------------------------
+
+def readRanges(source, base, ranges, heads, tail, bufferSize):
+    '''
+    Provides a generator that reads the multipart byte ranges content, the source is closed once the ranges are read.
+
+    @param source: IInputStream
+        The seekable source to read the ranges from.
+    @param base: integer
+        The source position where the content starts.
+    @param ranges: list[tuple(integer, integer)]
+        The first and last byte positions of the ranges.
+    @param heads: list[bytes]
+        The part heads for the ranges.
+    @param tail: bytes
+        The multipart ending.
+    @param bufferSize: integer
+        The buffer size used in reading the ranges.
+    '''
+    assert isinstance(source, IInputStream), 'Invalid source %s' % source
+    assert isinstance(bufferSize, int), 'Invalid buffer size %s' % bufferSize
+    try:
+        for (start, end), head in zip(ranges, heads):
+            yield head
+            source.seek(base + start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = source.read(min(remaining, bufferSize))
+                if not data: return  # The content has been truncated
+                remaining -= len(data)
+                yield data
+        yield tail
+    finally:
+        if isinstance(source, IClosable): source.close()
@@ -16,10 +16,11 @@ from ally.design.processor.execution import Processing, Chain
 from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
     ResponseContentHTTP, HTTP_GET, HTTP_POST, HTTP_PUT, HTTP_DELETE, HTTP_OPTIONS, \
     HTTP
-from ally.support.util_io import readGenerator, IInputStream
+from ally.support.util_io import readGenerator, IInputStream, fileRegion
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qsl
 import logging
+import os
 
 # --------------------------------------------------------------------
 
@@ -32,6 +33,9 @@ class RequestHandler(BaseHTTPRequestHandler):
     The server class that handles the HTTP requests.
     '''
     
+    sendFile = hasattr(os, 'sendfile')
+    # Flag indicating that the file system files content is sent using os.sendfile, not available in Python 3.2
+    
     def __init__(self, request, address, server):
         '''
         Create the request.
@@ -70,7 +74,7 @@ class RequestHandler(BaseHTTPRequestHandler):
         proc = self.server.processing
         assert isinstance(proc, Processing), 'Invalid processing %s' % proc
         
-        request, requestCnt = proc.ctx.request(), proc.ctx.requestCnt()
+        request, requestCnt = proc.acquire('request'), proc.acquire('requestCnt')
         assert isinstance(request, RequestHTTP), 'Invalid request %s' % request
         assert isinstance(requestCnt, RequestContentHTTP), 'Invalid request content %s' % requestCnt
 
@@ -83,29 +87,47 @@ class RequestHandler(BaseHTTPRequestHandler):
         
         requestCnt.source = self.rfile
 
+        response, responseCnt = proc.acquire('response'), proc.acquire('responseCnt')
         chain = Chain(proc)
         chain.process(**proc.fillIn(request=request, requestCnt=requestCnt,
-                                    response=proc.ctx.response(), responseCnt=proc.ctx.responseCnt())).doAll()
+                                    response=response, responseCnt=responseCnt)).doAll()
 
         response, responseCnt = chain.arg.response, chain.arg.responseCnt
         assert isinstance(response, ResponseHTTP), 'Invalid response %s' % response
         assert isinstance(responseCnt, ResponseContentHTTP), 'Invalid response content %s' % responseCnt
 
-        if ResponseHTTP.headers in response and response.headers is not None:
-            for name, value in response.headers.items(): self.send_header(name, value)
-
         assert isinstance(response.status, int), 'Invalid response status code %s' % response.status
         if ResponseHTTP.text in response and response.text: text = response.text
         elif ResponseHTTP.code in response and response.code: text = response.code
         else: text = None
         self.send_response(response.status, text)
+
+        if ResponseHTTP.headers in response and response.headers is not None:
+            for name, value in response.headers.items(): self.send_header(name, value)
         self.end_headers()
 
         if ResponseContentHTTP.source in responseCnt and responseCnt.source is not None:
-            if isinstance(responseCnt.source, IInputStream): source = readGenerator(responseCnt.source)
-            else: source = responseCnt.source
+            region = fileRegion(responseCnt.source) if self.sendFile else None
+            if region is not None:
+                with responseCnt.source: self._sendFile(*region)
+            else:
+                if isinstance(responseCnt.source, IInputStream): source = readGenerator(responseCnt.source)
+                else: source = responseCnt.source
+
+                for bytes in source: self.wfile.write(bytes)
+
+        proc.release(request=request, requestCnt=requestCnt, response=response, responseCnt=responseCnt)
 
-            for bytes in source: self.wfile.write(bytes)
+    def _sendFile(self, fd, offset, remaining):
+        '''
+        Sends the file region directly to the connection using os.sendfile.
+        '''
+        self.wfile.flush()
+        while remaining > 0:
+            sent = os.sendfile(self.connection.fileno(), fd, offset, remaining)
+            if sent == 0: break  # The file has been truncated
+            offset += sent
+            remaining -= sent
 
     # ----------------------------------------------------------------
 
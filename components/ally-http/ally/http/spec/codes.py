@@ -54,6 +54,9 @@ def isSuccess(status):
 
 PATH_NOT_FOUND = CodeHTTP('Not found', 404, False)  # HTTP code 404 Not Found
 PATH_FOUND = CodeHTTP('OK', 200, True)  # HTTP code 200 OK
+PARTIAL_CONTENT = CodeHTTP('Partial content', 206, True)  # HTTP code 206 Partial Content
+
+NOT_MODIFIED = CodeHTTP('Not modified', 304, True)  # HTTP code 304 Not Modified
 
 METHOD_NOT_AVAILABLE = CodeHTTP('Method not allowed', 405, False)  # HTTP code 405 Method Not Allowed
 
@@ -61,6 +64,8 @@ BAD_REQUEST = CodeHTTP('Bad Request', 400, False)  # HTTP code 400 Bad Request
 
 HEADER_ERROR = CodeHTTP('Invalid header', 400, False)  # HTTP code 400 Bad Request
 
+RANGE_NOT_SATISFIABLE = CodeHTTP('Range not satisfiable', 416, False)  # HTTP code 416 Range Not Satisfiable
+
 INTERNAL_ERROR = CodeHTTP('Internal error', 500, False)  # HTTP code 500 Internal Server Error
 
 # --------------------------------------------------------------------
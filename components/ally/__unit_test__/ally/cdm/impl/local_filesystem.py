@@ -19,10 +19,11 @@ if True:
 from ally.cdm.impl.local_filesystem import HTTPDelivery, LocalFileSystemCDM, \
     LocalFileSystemLinkCDM
 from ally.cdm.spec import PathNotFound
+from ally.container import ioc
 from ally.zip.util_zip import normOSPath
 from datetime import datetime
 from io import BytesIO
-from os import makedirs, remove, sep, stat
+from os import makedirs, remove, sep, stat, walk, utime
 from os.path import join, dirname, isfile, isdir
 from shutil import rmtree
 from tempfile import NamedTemporaryFile, TemporaryDirectory
@@ -142,6 +143,76 @@ class TestHTTPDelivery(unittest.TestCase):
         finally:
             rmtree(join(d.getRepositoryPath(), dirname(path)))
 
+    def testLocalFilesystemUnchangedCDM(self):
+        d = HTTPDelivery()
+        rootDir = TemporaryDirectory()
+        d.serverURI = 'http://localhost/content/'
+        d.repositoryPath = rootDir.name
+        cdm = LocalFileSystemCDM()
+        cdm.delivery = d
+        ioc.initialize(d)
+        ioc.initialize(cdm)
+
+        # test the unchanged content is not touched on publish
+        cdm.publishContent('testunchanged/content.txt', BytesIO(b'test'))
+        filePath = join(d.getRepositoryPath(), 'testunchanged', 'content.txt')
+        utime(filePath, (1000000000, 1000000000))
+        cdm.publishContent('testunchanged/content.txt', BytesIO(b'test'))
+        self.assertEqual(stat(filePath).st_mtime, 1000000000)
+
+        srcTmpDir = TemporaryDirectory()
+        with open(join(srcTmpDir.name, 'file.txt'), 'wb') as f: f.write(b'test file')
+        cdm.publishFromDir('testunchanged/dir', srcTmpDir.name)
+        filePath = join(d.getRepositoryPath(), 'testunchanged', 'dir', 'file.txt')
+        utime(filePath, (1000000000, 1000000000))
+        cdm.publishFromDir('testunchanged/dir', srcTmpDir.name)
+        self.assertEqual(stat(filePath).st_mtime, 1000000000)
+
+        # test the changed content is written
+        cdm.publishContent('testunchanged/content.txt', BytesIO(b'test changed'))
+        filePath = join(d.getRepositoryPath(), 'testunchanged', 'content.txt')
+        self.assertNotEqual(stat(filePath).st_mtime, 1000000000)
+        with open(filePath, 'rb') as f: self.assertEqual(f.read(), b'test changed')
+
+    def testLocalFilesystemBlobsCDM(self):
+        d = HTTPDelivery()
+        rootDir = TemporaryDirectory()
+        d.serverURI = 'http://localhost/content/'
+        d.repositoryPath = join(rootDir.name, 'repository')
+        cdm = LocalFileSystemCDM()
+        cdm.delivery = d
+        cdm.blobsPath = join(rootDir.name, 'blobs')
+        ioc.initialize(d)
+        ioc.initialize(cdm)
+
+        # test the same content is stored once and not rewritten on publish
+        cdm.publishContent('testblob1/content1.txt', BytesIO(b'test'))
+        cdm.publishContent('testblob2/content2.txt', BytesIO(b'test'))
+        filePath1 = join(d.getRepositoryPath(), 'testblob1', 'content1.txt')
+        filePath2 = join(d.getRepositoryPath(), 'testblob2', 'content2.txt')
+        self.assertEqual(stat(filePath1).st_ino, stat(filePath2).st_ino)
+        timestamp = cdm.getTimestamp('testblob2/content2.txt')
+        cdm.publishContent('testblob1/content1.txt', BytesIO(b'test'))
+        self.assertEqual(stat(filePath1).st_ino, stat(filePath2).st_ino)
+        self.assertEqual(timestamp, cdm.getTimestamp('testblob2/content2.txt'))
+
+        # test the changed content is relinked
+        cdm.publishContent('testblob1/content1.txt', BytesIO(b'test changed'))
+        with open(filePath1, 'rb') as f: self.assertEqual(f.read(), b'test changed')
+        with open(filePath2, 'rb') as f: self.assertEqual(f.read(), b'test')
+
+        # test publish from a directory from a zip file
+        cdm.publishFromDir('testblob3', join(dirname(__file__), 'test.zip', 'dir1'))
+        self.assertTrue(isfile(join(d.getRepositoryPath(), 'testblob3', 'subdir1', 'file1.txt')))
+        cdm.publishFromDir('testblob3', join(dirname(__file__), 'test.zip', 'dir1'))
+        self.assertTrue(isfile(join(d.getRepositoryPath(), 'testblob3', 'subdir2', 'file2.txt')))
+
+        # test the blobs are removed when not linked anymore
+        cdm.remove('testblob1/content1.txt')
+        cdm.remove('testblob2')
+        cdm.remove('testblob3')
+        for _root, _dirs, files in walk(join(rootDir.name, 'blobs', 'blobs')): self.assertFalse(files)
+
     def testLocalFileSystemLinkCDM(self):
         d = HTTPDelivery()
         rootDir = TemporaryDirectory()
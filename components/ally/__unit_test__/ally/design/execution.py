@@ -0,0 +1,144 @@
+'''
+Created on Mar 19, 2013
+
+@package: ally base
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the processors execution.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.design.processor.assembly import Assembly
+from ally.design.processor.attribute import requires, defines
+from ally.design.processor.context import Context
+from ally.design.processor.execution import Chain
+from ally.design.processor import instrument
+from ally.design.processor.handler import HandlerProcessorProceed, HandlerProcessor
+import unittest
+
+# --------------------------------------------------------------------
+
+class Data(Context):
+    trace = defines(list)
+
+class DataRequired(Context):
+    trace = requires(list)
+
+class Start(HandlerProcessorProceed):
+
+    def process(self, data:Data, **keyargs):
+        data.trace = ['start']
+
+class Proceed(HandlerProcessorProceed):
+
+    def __init__(self, name):
+        self.name = name
+        super().__init__()
+
+    def process(self, data:DataRequired, **keyargs):
+        data.trace.append(self.name)
+
+class Stop(HandlerProcessor):
+
+    def process(self, chain, data:DataRequired, **keyargs):
+        data.trace.append('stop')
+
+class Branch(HandlerProcessor):
+
+    def __init__(self, processing):
+        self.processing = processing
+        super().__init__()
+
+    def process(self, chain, data:DataRequired, **keyargs):
+        data.trace.append('branch')
+        chain.branch(self.processing)
+
+# --------------------------------------------------------------------
+
+class TestExecution(unittest.TestCase):
+
+    def testProceed(self):
+        assembly = Assembly('test')
+        assembly.add(Start(), Proceed('p1'), Proceed('p2'))
+        proc = assembly.create(data=Data)
+
+        self.assertTrue(all(proceedCall is not None for _call, proceedCall in proc.plan))
+        chain = Chain(proc).process(data=proc.ctx.data()).doAll()
+        self.assertTrue(chain.isConsumed())
+        self.assertEqual(chain.arg.data.trace, ['start', 'p1', 'p2'])
+
+    def testStop(self):
+        assembly = Assembly('test')
+        assembly.add(Start(), Stop(), Proceed('p1'))
+        proc = assembly.create(data=Data)
+
+        chain = Chain(proc).process(data=proc.ctx.data()).doAll()
+        self.assertFalse(chain.isConsumed())
+        self.assertEqual(chain.arg.data.trace, ['start', 'stop'])
+
+    def testBranch(self):
+        branched = Assembly('branched')
+        branched.add(Proceed('b1'), Proceed('b2'))
+        assembly = Assembly('test')
+        assembly.add(Start(), Branch(branched.create(data=Data)), Proceed('p1'))
+        proc = assembly.create(data=Data)
+
+        chain = Chain(proc).process(data=proc.ctx.data()).doAll()
+        self.assertTrue(chain.isConsumed())
+        self.assertEqual(chain.arg.data.trace, ['start', 'branch', 'b1', 'b2'])
+
+        # The compiled plan is shared so a new chain on the same processing needs to start from the beginning.
+        chain = Chain(proc).process(data=proc.ctx.data()).doAll()
+        self.assertEqual(chain.arg.data.trace, ['start', 'branch', 'b1', 'b2'])
+
+    def testPool(self):
+        assembly = Assembly('test')
+        assembly.add(Start(), Proceed('p1'))
+        proc = assembly.create(data=Data)
+
+        data = proc.acquire('data')
+        chain = Chain(proc).process(data=data).doAll()
+        self.assertEqual(chain.arg.data.trace, ['start', 'p1'])
+        self.assertTrue(Data.trace in data)
+
+        proc.release(data=data)
+        self.assertIsNone(data.trace)
+        self.assertIs(proc.acquire('data'), data)
+        self.assertIsNot(proc.acquire('data'), data)
+
+    def testInstrument(self):
+        assembly = Assembly('test')
+        assembly.add(Start(), Stop())
+        instrument.enable()
+        try: proc = assembly.create(data=Data)
+        finally: instrument.enable(False)
+
+        for _k in range(3): Chain(proc).process(data=proc.ctx.data()).doAll()
+        statistics = {statistic.processor: statistic for statistic in instrument.statistics()}
+        start, stop = statistics[__name__ + '.Start'], statistics[__name__ + '.Stop']
+        self.assertEqual((start.count, start.proceeded, start.stopped), (3, 3, 0))
+        self.assertEqual((stop.count, stop.proceeded, stop.stopped), (3, 0, 3))
+        self.assertTrue(start.maximum <= start.total)
+
+        other = Assembly('other')
+        other.add(Start(), Stop())
+        instrument.enable()
+        try: proc = other.create(data=Data)
+        finally: instrument.enable(False)
+
+        Chain(proc).process(data=proc.ctx.data()).doAll()
+        statistics = {statistic.processor: statistic for statistic in instrument.statistics()}
+        self.assertEqual(statistics[__name__ + '.Start'].count, 3)
+        self.assertEqual(statistics[__name__ + '.Start#2'].count, 1)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
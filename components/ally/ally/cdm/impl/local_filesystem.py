@@ -11,18 +11,24 @@ Contains the Content Delivery Manager implementation for local file system
 
 from ally.cdm.spec import ICDM, UnsupportedProtocol, PathNotFound
 from ally.container.ioc import injected
+from ally.support.util_io import KeepOpen, synchronizeStreamToFile
 from ally.zip.util_zip import ZIPSEP, normOSPath, normZipPath, getZipFilePath, \
     validateInZipPath
 from datetime import datetime
-from os.path import isdir, isfile, join, dirname, normpath, relpath, abspath
-from shutil import copyfile, copyfileobj, move, rmtree
-from tempfile import TemporaryDirectory
+from io import BytesIO
+from os.path import isdir, isfile, join, dirname, normpath, relpath, abspath, \
+    split
+from shutil import copy2, move, rmtree
+from threading import RLock
 from urllib.parse import urljoin
+from uuid import uuid4
 from zipfile import ZipFile
 import abc
+import hashlib
 import json
 import logging
 import os
+import time
 
 # --------------------------------------------------------------------
 
@@ -103,9 +109,27 @@ class LocalFileSystemCDM(ICDM):
 
     delivery = IDelivery
     # The delivery protocol
+    blobsPath = None
+    # The directory where the published content is stored once by the content digest and hard linked into the
+    # repository paths, if None the content is written directly in the repository paths. In both cases the content that
+    # is not changed is not rewritten.
+    digest = 'sha1'
+    # The hash algorithm used for the published content digest.
+    bufferSize = 64 * 1024
+    # The buffer size used in reading the published content.
 
     def __init__(self):
         assert isinstance(self.delivery, IDelivery), 'Invalid delivery protocol %s' % self.delivery
+        assert self.blobsPath is None or isinstance(self.blobsPath, str), 'Invalid blobs path %s' % self.blobsPath
+        assert isinstance(self.digest, str), 'Invalid digest %s' % self.digest
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        if self.blobsPath is not None:
+            self.blobsPath = normOSPath(self.blobsPath)
+            if not isdir(self.blobsPath): os.makedirs(self.blobsPath)
+
+        self._manifests = {}
+        self._changed = set()
+        self._lock = RLock()
 
     def publishFromFile(self, path, filePath):
         '''
@@ -116,24 +140,8 @@ class LocalFileSystemCDM(ICDM):
             return self._publishFromFileObj(path, filePath)
         assert isinstance(filePath, str), 'Invalid file path value %s' % filePath
         path, dstFilePath = self._validatePath(path)
-        dstDir = dirname(dstFilePath)
-        if not isdir(dstDir):
-            os.makedirs(dstDir)
-        if not isfile(filePath):
-            # not a file, see if it's a entry in a zip file
-            zipFilePath, inFilePath = getZipFilePath(filePath, self.delivery.getRepositoryPath())
-            zipFile = ZipFile(zipFilePath)
-            fileInfo = zipFile.getinfo(inFilePath)
-            if fileInfo.filename.endswith(ZIPSEP):
-                raise IOError('Trying to publish a file from a ZIP directory path: %s' % fileInfo.filename)
-            if not self._isSyncFile(zipFilePath, dstFilePath):
-                copyfileobj(zipFile.open(inFilePath), open(dstFilePath, 'w+b'))
-                assert log.debug('Success publishing ZIP file %s (%s) to path %s', inFilePath, zipFilePath, path) or True
-            return
-        assert os.access(filePath, os.R_OK), 'Unable to read the file path %s' % filePath
-        if not self._isSyncFile(filePath, dstFilePath):
-            copyfile(filePath, dstFilePath)
-            assert log.debug('Success publishing file %s to path %s', filePath, path) or True
+        self._publishFile(path, dstFilePath, filePath)
+        self._saveManifests()
 
     def publishFromDir(self, path, dirPath):
         '''
@@ -147,6 +155,7 @@ class LocalFileSystemCDM(ICDM):
             zipFilePath, inDirPath = getZipFilePath(dirPath, self.delivery.getRepositoryPath())
             if not inDirPath.endswith(ZIPSEP): inDirPath = inDirPath + ZIPSEP
             self._copyZipDir(zipFilePath, inDirPath, fullPath)
+            self._saveManifests()
             assert log.debug('Success publishing ZIP dir %s (%s) to path %s', inDirPath, zipFilePath, path) or True
             return
         dirPath = normpath(dirPath)
@@ -154,10 +163,10 @@ class LocalFileSystemCDM(ICDM):
         for root, _dirs, files in os.walk(dirPath):
             relPath = relpath(root, dirPath)
             for file in files:
-                publishPath = join(normOSPath(path), relPath.lstrip(os.sep), file)
-                filePath = join(root, file)
-                self.publishFromFile(publishPath, filePath)
+                publishPath, dstFilePath = self._validatePath(join(normOSPath(path), relPath.lstrip(os.sep), file))
+                self._publishFile(publishPath, dstFilePath, join(root, file))
             assert log.debug('Success publishing directory %s to path %s', dirPath, path) or True
+        self._saveManifests()
 
     def publishContent(self, path, content):
         '''
@@ -166,12 +175,9 @@ class LocalFileSystemCDM(ICDM):
         assert isinstance(path, str), 'Invalid content path %s' % path
         # assert isinstance(content, ) or , 'Invalid binary content for path %s' % path
         path, dstFilePath = self._validatePath(path)
-        dstDir = dirname(dstFilePath)
-        if not isdir(dstDir):
-            os.makedirs(dstDir)
-        with open(dstFilePath, 'w+b') as dstFile:
-            copyfileobj(content, dstFile)
+        if self._publish(dstFilePath, lambda: KeepOpen(content)):
             assert log.debug('Success publishing content to path %s', path) or True
+        self._saveManifests()
 
 
     def republish(self, oldPath, newPath):
@@ -188,6 +194,15 @@ class LocalFileSystemCDM(ICDM):
         if not isdir(dstDir):
             os.makedirs(dstDir)
         move(oldFullPath, newFullPath)
+        if self.blobsPath is not None:
+            with self._lock:
+                oldKey, oldManifest, oldName = self._manifest(oldFullPath)
+                entry = oldManifest.pop(oldName, None)
+                if entry is not None:
+                    newKey, newManifest, newName = self._manifest(newFullPath)
+                    newManifest[newName] = entry
+                    self._changed.update((oldKey, newKey))
+            self._saveManifests()
 
     def remove(self, path):
         '''
@@ -195,11 +210,15 @@ class LocalFileSystemCDM(ICDM):
         '''
         path, itemPath = self._validatePath(path)
         if isdir(itemPath):
+            if self.blobsPath is not None:
+                for root, _dirs, files in os.walk(itemPath):
+                    for file in files: self._removeFile(join(root, file))
             rmtree(itemPath)
         elif isfile(itemPath):
-            os.remove(itemPath)
+            self._removeFile(itemPath)
         else:
             raise PathNotFound(path)
+        self._saveManifests()
         assert log.debug('Success removing path %s', path) or True
 
     def getSupportedProtocols(self):
@@ -228,7 +247,7 @@ class LocalFileSystemCDM(ICDM):
         path, itemPath = self._validatePath(path)
         if not isdir(itemPath) and not isfile(itemPath):
             raise PathNotFound(path)
-        return datetime.fromtimestamp(os.stat(itemPath).st_mtime)
+        return self._getTimestamp(itemPath)
 
     def _publishFromFileObj(self, path, fileObj):
         '''
@@ -243,12 +262,92 @@ class LocalFileSystemCDM(ICDM):
         assert isinstance(path, str), 'Invalid content path %s' % path
         assert hasattr(fileObj, 'read'), 'Invalid file object %s' % fileObj
         path, dstFilePath = self._validatePath(path)
+        if self._publish(dstFilePath, lambda: KeepOpen(fileObj)):
+            assert log.debug('Success publishing stream to path %s', path) or True
+        self._saveManifests()
+
+    def _publishFile(self, path, dstFilePath, filePath):
+        '''
+        Publish the file or ZIP file entry to the repository file path.
+
+        @param path: string
+            The path of the content item.
+        @param dstFilePath: string
+            The repository file path to publish to.
+        @param filePath: string
+            The file path or ZIP file entry path to publish.
+        '''
+        if not isfile(filePath):
+            # not a file, see if it's a entry in a zip file
+            zipFilePath, inFilePath = getZipFilePath(filePath, self.delivery.getRepositoryPath())
+            zipFile = ZipFile(zipFilePath)
+            fileInfo = zipFile.getinfo(inFilePath)
+            if fileInfo.filename.endswith(ZIPSEP):
+                raise IOError('Trying to publish a file from a ZIP directory path: %s' % fileInfo.filename)
+            if self._publish(dstFilePath, lambda: zipFile.open(fileInfo), self._sourceKey(zipFilePath),
+                             fileInfo.file_size):
+                assert log.debug('Success publishing ZIP file %s (%s) to path %s',
+                                 inFilePath, zipFilePath, path) or True
+            return
+        assert os.access(filePath, os.R_OK), 'Unable to read the file path %s' % filePath
+        key = self._sourceKey(filePath)
+        if self._publish(dstFilePath, lambda: open(filePath, 'rb'), key, key[1]):
+            assert log.debug('Success publishing file %s to path %s', filePath, path) or True
+
+    def _publish(self, dstFilePath, opener, key=None, size=None):
+        '''
+        Publish the content to the repository file path, the content is written only if changed.
+
+        @param dstFilePath: string
+            The repository file path to publish to.
+        @param opener: callable()
+            Provides the stream with the content to publish, is called only if the content needs to be read, the
+            stream is closed after the content is published.
+        @param key: list[float, integer]|None
+            The modification time and size of the content source, if provided the content is read only if the source is
+            modified since the last publish.
+        @param size: integer|None
+            The size of the content if known.
+        @return: boolean
+            True if the content has been written, False if the published content is the same.
+        '''
+        assert callable(opener), 'Invalid opener %s' % opener
         dstDir = dirname(dstFilePath)
         if not isdir(dstDir):
             os.makedirs(dstDir)
-        with open(dstFilePath, 'w+b') as dstFile:
-            copyfileobj(fileObj, dstFile)
-            assert log.debug('Success publishing stream to path %s', path) or True
+        if self.blobsPath is not None:
+            return self._publishBlob(dstFilePath, opener, key)
+
+        if key is not None and isfile(dstFilePath) and key[0] < os.stat(dstFilePath).st_mtime: return False
+        source = opener()
+        # The unchanged file is not touched so the last modified and entity tag of the delivered content are kept.
+        try: return synchronizeStreamToFile(source, dstFilePath, size, self.bufferSize)
+        finally: source.close()
+
+    def _publishBlob(self, dstFilePath, opener, key):
+        '''
+        Publish the content as a blob linked to the repository file path, the content is read only if the source is
+        modified and the link is replaced only if the content digest is changed.
+        @see: _publish
+        '''
+        with self._lock:
+            manifestKey, manifest, name = self._manifest(dstFilePath)
+            entry = manifest.get(name)
+            if entry is not None and key is not None and entry[1] == key and self._isLinked(dstFilePath, entry[0]):
+                return False
+
+            source = opener()
+            try: digest = self._storeBlob(source)
+            finally: source.close()
+
+            changed = entry is None or entry[0] != digest or not self._isLinked(dstFilePath, digest)
+            if changed:
+                if isdir(dstFilePath): rmtree(dstFilePath)
+                self._linkBlob(digest, dstFilePath)
+                if entry is not None and entry[0] != digest: self._releaseBlob(entry[0])
+            manifest[name] = [digest, key, time.time()]
+            self._changed.add(manifestKey)
+        return changed
 
     def _getItemPath(self, path):
         return join(self.delivery.getRepositoryPath(), normOSPath(path.lstrip(os.sep), True))
@@ -260,18 +359,42 @@ class LocalFileSystemCDM(ICDM):
             raise PathNotFound(path)
         return (path, fullPath)
 
-    def _isSyncFile(self, srcFilePath, dstFilePath):
+    def _sourceKey(self, srcFilePath):
+        '''
+        Provides the key that identifies the state of the source file, the modification time and size.
+        '''
+        srcStat = os.stat(srcFilePath)
+        return [srcStat.st_mtime, srcStat.st_size]
+
+    def _getTimestamp(self, fullPath):
+        '''
+        Provides the publish time stamp for the repository path, for the blobs the time stamp is kept in the manifest
+        since the linked files share the modification time.
+        '''
+        if self.blobsPath is not None and isfile(fullPath):
+            with self._lock:
+                _manifestKey, manifest, name = self._manifest(fullPath)
+                entry = manifest.get(name)
+            if entry is not None and self._isLinked(fullPath, entry[0]): return datetime.fromtimestamp(entry[2])
+        return datetime.fromtimestamp(os.stat(fullPath).st_mtime)
+
+    def _removeFile(self, fullPath):
         '''
-        Return true if the destination file exists and was newer than
-        the source file.
+        Removes the repository file, the blob linked to the file is removed if there is no other link to it.
         '''
-        return ((isfile(srcFilePath) and isfile(dstFilePath)) or \
-                (isdir(srcFilePath) and isdir(dstFilePath))) \
-                and os.stat(srcFilePath).st_mtime < os.stat(dstFilePath).st_mtime
+        os.remove(fullPath)
+        if self.blobsPath is None: return
+        with self._lock:
+            manifestKey, manifest, name = self._manifest(fullPath)
+            entry = manifest.pop(name, None)
+            if entry is not None:
+                self._releaseBlob(entry[0])
+                self._changed.add(manifestKey)
 
     def _copyZipDir(self, zipFilePath, inDirPath, path):
         '''
-        Copy a directory from a ZIP archive to a filesystem directory
+        Copy a directory from a ZIP archive to a filesystem directory, only the changed entries are written and the
+        files from the copied directories that are not in the ZIP archive anymore are removed.
 
         @param zipFilePath: string
             The path of the ZIP archive
@@ -285,16 +408,125 @@ class LocalFileSystemCDM(ICDM):
         # make sure the ZIP file path is normalized and uses the ZIP separator
         inDirPath = normZipPath(inDirPath)
         zipFile = ZipFile(zipFilePath)
-        entries = [ent for ent in zipFile.namelist() if ent.startswith(inDirPath)]
-        tmpDir = TemporaryDirectory()
-        zipFile.extractall(tmpDir.name, entries)
-        tmpDirPath = join(tmpDir.name, normOSPath(inDirPath))
+        key, path, published, roots = self._sourceKey(zipFilePath), normpath(path), set(), set()
         if not isdir(path): os.makedirs(path)
-        for entry in os.listdir(tmpDirPath):
-            dstPath = join(path, entry)
-            if isfile(dstPath): os.remove(dstPath)
-            elif isdir(dstPath): rmtree(dstPath)
-            move(join(tmpDirPath, entry), path)
+        for fileInfo in zipFile.infolist():
+            if not fileInfo.filename.startswith(inDirPath): continue
+            subPath = fileInfo.filename[len(inDirPath):]
+            if not subPath: continue
+            roots.add(subPath.split(ZIPSEP, 1)[0])
+            dstPath = normpath(join(path, normOSPath(subPath)))
+            if subPath.endswith(ZIPSEP):
+                if not isdir(dstPath): os.makedirs(dstPath)
+                continue
+            published.add(dstPath)
+            self._publish(dstPath, lambda: zipFile.open(fileInfo), key, fileInfo.file_size)
+
+        for root in roots:
+            for dirPath, _dirs, files in os.walk(join(path, root)):
+                for file in files:
+                    filePath = join(dirPath, file)
+                    if filePath not in published: self._removeFile(filePath)
+
+    # ----------------------------------------------------------------
+
+    def _manifest(self, fullPath):
+        '''
+        Provides the manifest of the repository directory containing the file path, the manifest contains for each
+        published file name the blob digest, the source key and the publish time.
+
+        @return: tuple(string, dictionary{string: list}, string)
+            The manifest key, the manifest and the file name in the manifest.
+        '''
+        dirPath, name = split(fullPath)
+        manifestKey = normZipPath(relpath(dirPath, self.delivery.getRepositoryPath()))
+        manifest = self._manifests.get(manifestKey)
+        if manifest is None:
+            manifestPath = self._manifestPath(manifestKey)
+            manifest = {}
+            if isfile(manifestPath):
+                with open(manifestPath) as f:
+                    try: manifest = json.load(f)
+                    except ValueError: log.warning('Invalid manifest %s, the content is republished', manifestPath)
+            self._manifests[manifestKey] = manifest
+        return manifestKey, manifest, name
+
+    def _manifestPath(self, manifestKey):
+        return join(self.blobsPath, 'manifests', '%s.json' % hashlib.new(self.digest, manifestKey.encode()).hexdigest())
+
+    def _saveManifests(self):
+        '''
+        Saves the changed manifests.
+        '''
+        if self.blobsPath is None: return
+        with self._lock:
+            for manifestKey in self._changed:
+                manifestPath = self._manifestPath(manifestKey)
+                if not self._manifests[manifestKey]:
+                    if isfile(manifestPath): os.remove(manifestPath)
+                    continue
+                if not isdir(dirname(manifestPath)): os.makedirs(dirname(manifestPath))
+                content = json.dumps(self._manifests[manifestKey]).encode()
+                synchronizeStreamToFile(BytesIO(content), manifestPath, len(content), self.bufferSize)
+            self._changed.clear()
+
+    def _blobPath(self, digest):
+        return join(self.blobsPath, 'blobs', digest[:2], digest[2:])
+
+    def _storeBlob(self, source):
+        '''
+        Stores the stream content as a blob, the content is written only if there is no blob with the same digest.
+
+        @return: string
+            The blob digest.
+        '''
+        hashed = hashlib.new(self.digest)
+        tmpPath = join(self.blobsPath, '%s.tmp' % uuid4().hex)
+        try:
+            with open(tmpPath, 'wb') as dest:
+                while True:
+                    data = source.read(self.bufferSize)
+                    if not data: break
+                    hashed.update(data)
+                    dest.write(data)
+            digest = hashed.hexdigest()
+            blobPath = self._blobPath(digest)
+            if isfile(blobPath): os.remove(tmpPath)
+            else:
+                if not isdir(dirname(blobPath)): os.makedirs(dirname(blobPath))
+                os.rename(tmpPath, blobPath)
+        except:
+            if isfile(tmpPath): os.remove(tmpPath)
+            raise
+        return digest
+
+    def _linkBlob(self, digest, dstFilePath):
+        '''
+        Links the blob to the repository file path, the blob is copied if the file system does not support hard links.
+        '''
+        blobPath = self._blobPath(digest)
+        tmpPath = '%s.%s.tmp' % (dstFilePath, uuid4().hex[:8])
+        try: os.link(blobPath, tmpPath)
+        except (OSError, AttributeError): copy2(blobPath, tmpPath)
+        if os.name == 'nt' and isfile(dstFilePath): os.remove(dstFilePath)
+        os.rename(tmpPath, dstFilePath)
+
+    def _isLinked(self, filePath, digest):
+        '''
+        Checks if the repository file is linked (or copied) to the blob with the provided digest.
+        '''
+        blobPath = self._blobPath(digest)
+        if not isfile(filePath) or not isfile(blobPath): return False
+        fileStat, blobStat = os.stat(filePath), os.stat(blobPath)
+        if fileStat.st_ino and fileStat.st_ino == blobStat.st_ino and fileStat.st_dev == blobStat.st_dev: return True
+        return fileStat.st_size == blobStat.st_size and fileStat.st_mtime == blobStat.st_mtime
+
+    def _releaseBlob(self, digest):
+        '''
+        Removes the blob if is not linked anymore in the repository.
+        '''
+        blobPath = self._blobPath(digest)
+        if isfile(blobPath) and os.stat(blobPath).st_nlink <= 1: os.remove(blobPath)
 
 
 @injected
@@ -341,7 +573,8 @@ class LocalFileSystemLinkCDM(LocalFileSystemCDM):
         '''
         path, entryPath = self._validatePath(path)
         if isfile(entryPath.rstrip(os.sep)):
-            return os.remove(entryPath)
+            self._removeFile(entryPath)
+            return self._saveManifests()
 
         linkPath = entryPath
         repPathLen = len(self.delivery.getRepositoryPath())
@@ -390,7 +623,7 @@ class LocalFileSystemLinkCDM(LocalFileSystemCDM):
         assert isinstance(path, str), 'Invalid content path %s' % path
         path, entryPath = self._validatePath(path)
         if isdir(entryPath) or isfile(entryPath):
-            return datetime.fromtimestamp(os.stat(entryPath).st_mtime)
+            return self._getTimestamp(entryPath)
 
         linkPath = entryPath
         repPathLen = len(self.delivery.getRepositoryPath())
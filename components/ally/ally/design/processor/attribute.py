@@ -159,6 +159,14 @@ class Descriptor:
         assert value is None or isinstance(value, self.types), 'Invalid value \'%s\' for %s' % (value, self.types)
         self.descriptor.__set__(obj, value)
 
+def slot(clazz, name, types):
+    '''
+    Descriptor factory that provides the slot descriptor of the object context class as it is, used whenever the
+    application is not in debug mode and there is no need to validate the values.
+    '''
+    assert isclass(clazz), 'Invalid class %s' % clazz
+    return getattr(clazz, name)
+
 # --------------------------------------------------------------------
 
 DEFINED = 1 << 1
@@ -430,7 +438,7 @@ class Resolver(IResolver):
         if self.status == REQUIRED: raise AttrError('Resolver %s\n, cannot generate attribute' % self)
         if self.status & OPTIONAL: return  # If is optional then no need to create it
         if self.nameAttribute in attributes: return  # There is already an attribute
-        attributes[self.nameAttribute] = Attribute(self.status, self.types, self.doc, Descriptor)
+        attributes[self.nameAttribute] = Attribute(self.status, self.types, self.doc, Descriptor if __debug__ else slot)
         
     def createDefinition(self, attributes):
         '''
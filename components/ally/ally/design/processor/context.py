@@ -78,6 +78,7 @@ def definerObject(name, bases, namespace):
     assert '__attributes__' in namespace, 'No attributes defined for context object'
     
     namespace['__slots__'] = tuple(namespace['__attributes__'])
+    namespace['__contained__'] = {}
     return name, bases, namespace
 
 # --------------------------------------------------------------------
@@ -138,6 +139,30 @@ class Object(metaclass=ContextMetaClass):
         @param attribute: tuple(string, IAttribute) or descriptor with '__name__' and '__objclass__'
             The attribute to check if contained.
         '''
+        # The containment depends only on the object class so the result is cached in the class.
+        try: return self.__contained__[attribute]
+        except (KeyError, TypeError): pass
+        contained = self.__class__.isContained(attribute)
+        try: self.__contained__[attribute] = contained
+        except TypeError: pass
+        return contained
+    
+    def reset(self):
+        '''
+        Resets all the attributes values of the object, this way the object can be reused.
+        '''
+        for name in self.__slots__: setattr(self, name, None)
+    
+    @classmethod
+    def isContained(cls, attribute):
+        '''
+        Checks if the attribute is contained in the object class.
+        
+        @param attribute: tuple(string, IAttribute) or descriptor with '__name__' and '__objclass__'
+            The attribute to check if contained.
+        @return: boolean
+            True if the attribute is contained, False otherwise.
+        '''
         if attribute is None: return False
         if not isinstance(attribute, IAttribute):
             try: name, clazz = attribute.__name__, attribute.__objclass__
@@ -150,7 +175,7 @@ class Object(metaclass=ContextMetaClass):
             if not isinstance(attribute, IAttribute): return False
             assert isinstance(attribute, IAttribute)
         
-        return attribute.isIn(self.__class__)
+        return attribute.isIn(cls)
     
     def __str__(self):
         '''
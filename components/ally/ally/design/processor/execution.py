@@ -9,6 +9,7 @@ Created on Feb 11, 2013
 Contains the classes used in the execution of processors.
 '''
 
+from .instrument import isEnabled, instrument
 from .spec import ContextMetaClass
 from collections import Iterable, deque
 import logging
@@ -19,13 +20,20 @@ log = logging.getLogger(__name__)
 
 # --------------------------------------------------------------------
         
+POOL_SIZE = 100
+# The maximum number of released context objects kept by a processing for each context name.
+
+# --------------------------------------------------------------------
+        
 class Processing:
     '''
     Container for processor's, provides chains for their execution.
-    !!! Attention, never ever use a processing in multiple threads, only one thread is allowed to execute 
-    a processing at one time.
+    A processing can be shared by multiple threads, the calls and the compiled plan are not changed after construction
+    and each execution uses its own chain. The context objects pools are safe only because @see: acquire and
+    @see: release use atomic list operations (pop and append), any other changes of the processing (like @see: update)
+    need to be done before the processing is shared.
     '''
-    __slots__ = ('ctx', '_calls')
+    __slots__ = ('ctx', '_calls', '_plan', '_pools')
 
     class Ctx:
         '''
@@ -50,8 +58,9 @@ class Processing:
         assert isinstance(calls, Iterable), 'Invalid calls %s' % calls
         
         self._calls = list(calls)
-        if __debug__:
-            for call in self._calls: assert callable(call), 'Invalid call %s' % call
+        if isEnabled(): self._calls = [instrument(call) for call in self._calls]
+        self._plan = compilePlan(self._calls)
+        self._pools = {}
                 
         self.ctx = Processing.Ctx()
         if contexts:
@@ -70,6 +79,10 @@ class Processing:
     @rtype: Iterable(call)
     The iterable containing the calls of this processing.
     ''')
+    plan = property(lambda self: self._plan, doc='''
+    @rtype: tuple(tuple(callable, callable|None))
+    The compiled execution plan of this processing, @see: compilePlan.
+    ''')
     
     def update(self, **contexts):
         '''
@@ -87,6 +100,40 @@ class Processing:
         self.ctx.__dict__.update(contexts)
         return self
     
+    def acquire(self, name):
+        '''
+        Provides a context object for the provided context name, the object is taken from the released objects if there
+        are any available otherwise a new object is created.
+        
+        @param name: string
+            The context name to provide the object for.
+        @return: Object
+            The context object.
+        '''
+        assert isinstance(name, str), 'Invalid context name %s' % name
+        pool = self._pools.get(name)
+        if pool:
+            try: return pool.pop()
+            except IndexError: pass  # Another thread has taken the last object
+        return getattr(self.ctx, name)()
+    
+    def release(self, **contexts):
+        '''
+        Releases the provided context objects in order to be reused by @see: acquire, the objects are reset and they
+        should not be used anymore by the releaser.
+        
+        @param contexts: key arguments{string: Object}
+            The context objects to release.
+        '''
+        for name, obj in contexts.items():
+            clazz = getattr(self.ctx, name, None)
+            if clazz is None or obj.__class__ is not clazz: continue  # Only the objects of this processing are pooled
+            pool = self._pools.get(name)
+            if pool is None: pool = self._pools.setdefault(name, [])
+            if len(pool) < POOL_SIZE:
+                obj.reset()
+                pool.append(obj)
+    
     def fillIn(self, **keyargs):
         '''
         Updates the provided arguments with the rest of the contexts that this processing has. The fill in process is done
@@ -110,7 +157,7 @@ class Chain:
     A chain that contains a list of processors (callables) that are executed one by one. Each processor will have
     the duty to proceed with the processing if is the case by calling the chain.
     '''
-    __slots__ = ('arg', '_calls', '_callBacks', '_callBacksErrors', '_consumed', '_proceed')
+    __slots__ = ('arg', '_plan', '_index', '_callBacks', '_callBacksErrors', '_consumed', '_proceed')
 
     class Arg:
         '''
@@ -132,11 +179,9 @@ class Chain:
         '''
         if isinstance(processing, Processing):
             assert isinstance(processing, Processing)
-            processing = processing.calls
-        assert isinstance(processing, Iterable), 'Invalid processing %s' % processing
-        self._calls = deque(processing)
-        if __debug__:
-            for call in self._calls: assert callable(call), 'Invalid processor call %s' % call
+            self._plan = processing._plan
+        else: self._plan = compilePlan(processing)
+        self._index = 0
         self.arg = Chain.Arg()
         self._callBacks = deque()
         self._callBacksErrors = deque()
@@ -166,8 +211,10 @@ class Chain:
             This chain for chaining purposes.
         '''
         assert not self._consumed, 'Chain is consumed cannot process'
+        if __debug__:
+            for key in keyargs: assert not key.startswith('_'), 'The argument name \'%s\' cannot start with an _' % key
         self.arg.__dict__.clear()
-        for key, value in keyargs.items(): setattr(self.arg, key, value)
+        self.arg.__dict__.update(keyargs)
         self._proceed = True
         return self
     
@@ -199,10 +246,9 @@ class Chain:
         '''
         if isinstance(processing, Processing):
             assert isinstance(processing, Processing)
-            processing = processing.calls
-        assert isinstance(processing, Iterable), 'Invalid processing %s' % processing
-        self._calls.clear()
-        self._calls.extend(processing)
+            self._plan = processing._plan
+        else: self._plan = compilePlan(processing)
+        self._index = 0
         self._proceed = True
         return self
     
@@ -245,13 +291,18 @@ class Chain:
             True if the chain has performed the execution of the next element, False if there is no more to be executed.
         '''
         assert not self._consumed, 'Chain is consumed cannot do anymore'
-        assert self._calls, 'Nothing to execute'
+        assert self._index < len(self._plan), 'Nothing to execute'
         assert self._proceed, 'Cannot proceed if no process is called'
         
-        call = self._calls.popleft()
+        call, proceedCall = self._plan[self._index]
+        self._index += 1
         assert log.debug('Processing %s', call) or True
         self._proceed = False
-        try: call(self, **self.arg.__dict__)
+        try:
+            if proceedCall is None: call(self, **self.arg.__dict__)
+            else:
+                proceedCall(**self.arg.__dict__)
+                self._proceed = True
         except:
             if self._callBacksErrors:
                 self._proceed = False
@@ -261,11 +312,11 @@ class Chain:
         assert log.debug('Processing finalized \'%s\'', call) or True
         if self._proceed:
             assert log.debug('Proceed signal received, continue execution') or True
-            if self._calls: return True
+            if self._index < len(self._plan): return True
             assert log.debug('Processing finalized by consuming') or True
             self._consumed = True
         else:
-            self._calls.clear()
+            self._index = len(self._plan)
         while self._callBacks: self._callBacks.pop()()
         return False
         
@@ -276,10 +327,19 @@ class Chain:
         @return: this chain
             This chain for chaining purposes.
         '''
-        while True:
-            if not self.do(): break
+        do = self.do
+        while do(): pass
         return self
 
+    def isProceeding(self):
+        '''
+        Checks if the chain is marked for proceeding.
+        
+        @return: boolean
+            True if the chain has been marked for proceeding by the executing processor, False otherwise.
+        '''
+        return self._proceed
+
     def isConsumed(self):
         '''
         Checks if the chain is consumed.
@@ -289,3 +349,24 @@ class Chain:
             the execution of the other processors.
         '''
         return self._consumed
+
+# --------------------------------------------------------------------
+
+def compilePlan(calls):
+    '''
+    Compiles the execution plan for the provided calls. The plan contains for each call a tuple having on the first
+    position the call and on the second position the processor call that needs to be invoked directly if the call is
+    a wrapper that always proceeds (as is the case for the @see: HandlerProcessorProceed processors), None otherwise.
+    The direct calls are made by the chain without the wrapper and proceed overhead.
+    
+    @param calls: Iterable(callable)
+        The calls to compile the plan for.
+    @return: tuple(tuple(callable, callable|None))
+        The compiled execution plan.
+    '''
+    assert isinstance(calls, Iterable), 'Invalid calls %s' % calls
+    plan = []
+    for call in calls:
+        assert callable(call), 'Invalid call %s' % call
+        plan.append((call, getattr(call, 'proceedCall', None)))
+    return tuple(plan)
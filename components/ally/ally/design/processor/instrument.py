@@ -0,0 +1,170 @@
+'''
+Created on Mar 20, 2013
+
+@package: ally base
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the processors calls instrumentation, once enabled the processings that are created will collect for each
+processor the calls count, the execution times and if the processor proceeded or stopped the chain.
+'''
+
+from ally.support.util_sys import fullyQName
+from inspect import ismethod
+import logging
+
+try: from time import perf_counter as clock
+except ImportError: from time import time as clock  # Python 3.2 has no performance counter
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+_enabled = False
+# Flag indicating that the instrumentation is enabled.
+_statistics = {}
+# The statistics indexed by processor object.
+_names = {}
+# The number of processors instrumented for each processor name.
+
+# --------------------------------------------------------------------
+
+class Statistic:
+    '''
+    Container for the statistic of a processor.
+    '''
+    __slots__ = ('processor', 'count', 'proceeded', 'stopped', 'total', 'maximum')
+
+    def __init__(self, processor):
+        '''
+        Construct the statistic.
+
+        @param processor: string
+            The processor name.
+        '''
+        assert isinstance(processor, str), 'Invalid processor name %s' % processor
+        self.processor = processor
+        self.count = self.proceeded = self.stopped = 0
+        self.total = self.maximum = 0.0
+
+    def record(self, elapsed, proceeded):
+        '''
+        Records a processor call, the statistics are not synchronized so for concurrent calls the values are approximate.
+
+        @param elapsed: float
+            The number of seconds the call took.
+        @param proceeded: boolean
+            True if the processor proceeded the chain, False if it stopped the chain.
+        '''
+        self.count += 1
+        if proceeded: self.proceeded += 1
+        else: self.stopped += 1
+        self.total += elapsed
+        if elapsed > self.maximum: self.maximum = elapsed
+
+# --------------------------------------------------------------------
+
+def enable(flag=True):
+    '''
+    Enables or disables the instrumentation, only the processings created after enabling are instrumented.
+
+    @param flag: boolean
+        True to enable the instrumentation, False to disable it.
+    '''
+    assert isinstance(flag, bool), 'Invalid flag %s' % flag
+    global _enabled
+    if flag and not _enabled: log.info('The processors calls instrumentation is enabled')
+    _enabled = flag
+
+def isEnabled():
+    '''
+    Checks if the instrumentation is enabled.
+
+    @return: boolean
+        True if the instrumentation is enabled.
+    '''
+    return _enabled
+
+def statistics():
+    '''
+    Provides the collected statistics.
+
+    @return: list[Statistic]
+        The statistics of the instrumented processors.
+    '''
+    return list(_statistics.values())
+
+def reset():
+    '''
+    Resets the collected statistics.
+    '''
+    for statistic in _statistics.values():
+        assert isinstance(statistic, Statistic), 'Invalid statistic %s' % statistic
+        statistic.__init__(statistic.processor)
+
+# --------------------------------------------------------------------
+
+def processorFor(call):
+    '''
+    Provides the processor for the provided processing call.
+
+    @param call: callable
+        The call to provide the processor for.
+    @return: object
+        The processor object, or the function if the call is not a method.
+    '''
+    call = getattr(call, 'proceedCall', call)
+    while hasattr(call, '__wrapped__'): call = call.__wrapped__
+    if ismethod(call): return call.__self__
+    return call
+
+def nameFor(call):
+    '''
+    Provides the processor name for the provided processing call.
+
+    @param call: callable
+        The call to provide the name for.
+    @return: string
+        The processor name.
+    '''
+    call = getattr(call, 'proceedCall', call)
+    while hasattr(call, '__wrapped__'): call = call.__wrapped__
+    if ismethod(call): return fullyQName(call.__self__)
+    return '%s.%s' % (call.__module__, call.__name__)
+
+def instrument(call):
+    '''
+    Instruments the provided processing call, the proceed calls (@see: compilePlan) are instrumented also.
+
+    @param call: callable
+        The call to instrument.
+    @return: callable
+        The instrumented call.
+    '''
+    assert callable(call), 'Invalid call %s' % call
+    processor = processorFor(call)
+    statistic = _statistics.get(processor)
+    if statistic is None:
+        # The statistics are kept for each processor, the processors of the same class are distinguished by a number.
+        name = nameFor(call)
+        count = _names[name] = _names.get(name, 0) + 1
+        if count > 1: name = '%s#%s' % (name, count)
+        statistic = _statistics[processor] = Statistic(name)
+    assert isinstance(statistic, Statistic)
+
+    def instrumented(chain, **keyargs):
+        start = clock()
+        try: call(chain, **keyargs)
+        finally: statistic.record(clock() - start, chain.isProceeding())
+    instrumented.__wrapped__ = call
+
+    proceedCall = getattr(call, 'proceedCall', None)
+    if proceedCall is not None:
+        def instrumentedProceed(**keyargs):
+            start = clock()
+            try: proceedCall(**keyargs)
+            finally: statistic.record(clock() - start, True)
+        instrumented.proceedCall = instrumentedProceed
+
+    return instrumented
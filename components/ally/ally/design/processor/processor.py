@@ -168,6 +168,7 @@ class Contextual(Processor):
                 assert isinstance(chain, Chain), 'Invalid processors chain %s' % chain
                 call(**keyargs)
                 chain.proceed()
+            wrapper.proceedCall = call  # Used by the execution plan to invoke the call directly
             return wrapper
         return call
     
@@ -266,6 +267,7 @@ class Brancher(Contextual):
         '''
         def wrapper(*args, **keyargs):
             call(*chain(args, self.processings), **keyargs)
+        wrapper.__wrapped__ = call
         return super().processCall(wrapper)
 
 # --------------------------------------------------------------------
@@ -15,13 +15,13 @@ from datetime import datetime
 from genericpath import isdir, exists
 from os import stat, makedirs
 from os.path import isfile, normpath, join, dirname
-from shutil import copy, move
+from shutil import copyfileobj
 from zipfile import ZipFile, ZipInfo
 import abc
 import os
-from tempfile import TemporaryDirectory
-from stat import S_IEXEC
-from io import StringIO
+from uuid import uuid4
+from stat import S_IEXEC, S_ISREG
+from io import StringIO, BufferedReader, FileIO
 
 # --------------------------------------------------------------------
 
@@ -197,6 +197,31 @@ def readGenerator(fileObj, bufferSize=1024):
                 break
             yield buffer
 
+def fileRegion(fileObj):
+    '''
+    Provides the file system region that is left to be read from the provided file object, the region can be used for
+    sending the file content directly by the kernel (os.sendfile) without copying it through user space.
+
+    @param fileObj: object
+        The file object to provide the region for.
+    @return: tuple(integer, integer, integer)|None
+        The file descriptor, the offset and the number of bytes left to read, or None if the file object is not a regular
+        file opened from the file system.
+    '''
+    if isinstance(fileObj, StreamRegion):
+        assert isinstance(fileObj, StreamRegion)
+        region = fileRegion(fileObj._fileObj)
+        if region is None: return None
+        return region[0], fileObj._offset + fileObj._position, fileObj._size - fileObj._position
+    # Only the actual file objects are considered since proxies like ReplaceInFile delegate the fileno call.
+    if not isinstance(fileObj, (BufferedReader, FileIO)): return None
+    try: fd = fileObj.fileno()
+    except (OSError, ValueError): return None
+    stats = os.fstat(fd)
+    if not S_ISREG(stats.st_mode): return None
+    offset = fileObj.tell()
+    return fd, offset, max(stats.st_size - offset, 0)
+
 def writeGenerator(generator, fileObj):
     '''
     Provides a generator that read data from the provided file object.
@@ -287,12 +312,10 @@ def synchronizeURIToDir(path, dirPath):
         zipFile = ZipFile(zipFilePath)
         if not inDirPath.endswith(ZIPSEP): inDirPath = inDirPath + ZIPSEP
 
-        tmpDir = TemporaryDirectory()
-
         lenPath, zipTime = len(inDirPath), datetime.fromtimestamp(stat(zipFilePath).st_mtime)
         for zipInfo in zipFile.filelist:
             assert isinstance(zipInfo, ZipInfo), 'Invalid zip info %s' % zipInfo
-            if zipInfo.filename.startswith(inDirPath):
+            if zipInfo.filename.startswith(inDirPath) and not zipInfo.filename.endswith(ZIPSEP):
                 if zipInfo.filename[0] == '/': dest = zipInfo.filename[1:]
                 else: dest = zipInfo.filename
 
@@ -302,8 +325,7 @@ def synchronizeURIToDir(path, dirPath):
                 destDir = dirname(dest)
                 if not exists(destDir): makedirs(destDir)
 
-                zipFile.extract(zipInfo.filename, tmpDir.name)
-                move(join(tmpDir.name, normOSPath(zipInfo.filename)), dest)
+                with zipFile.open(zipInfo.filename) as source: synchronizeStreamToFile(source, dest, zipInfo.file_size)
                 if zipInfo.filename.endswith('.exe'): os.chmod(dest, stat(dest).st_mode | S_IEXEC)
         return
 
@@ -314,14 +336,72 @@ def synchronizeURIToDir(path, dirPath):
         for file in files:
             src, dest = join(root, file), join(dirPath, root[lenPath:], file)
 
+            srcStat = stat(src)
             if exists(dest) and \
-            datetime.fromtimestamp(stat(src).st_mtime) <= datetime.fromtimestamp(stat(dest).st_mtime): continue
+            datetime.fromtimestamp(srcStat.st_mtime) <= datetime.fromtimestamp(stat(dest).st_mtime): continue
 
             destDir = dirname(dest)
             if not exists(destDir): makedirs(destDir)
-            copy(src, dest)
+            with open(src, 'rb') as source: synchronizeStreamToFile(source, dest, srcStat.st_size)
             if file.endswith('.exe'): os.chmod(dest, stat(dest).st_mode | S_IEXEC)
 
+def synchronizeStreamToFile(source, path, size=None, bufferSize=64 * 1024):
+    '''
+    Writes the stream content to the file path only if the file content is different, the content is compared while read
+    and the file is replaced only after the new content is completely written, so the file is never partially written.
+
+    @param source: IInputStream|file
+        The stream to write the content from.
+    @param path: string
+        The file path to synchronize with.
+    @param size: integer|None
+        The size of the stream content if known, used to avoid the content compare if the file has a different size.
+    @param bufferSize: integer
+        The buffer size used in reading and comparing the content.
+    @return: boolean
+        True if the file has been written, False if the file already has the same content.
+    '''
+    assert isinstance(path, str), 'Invalid path %s' % path
+    assert size is None or isinstance(size, int), 'Invalid size %s' % size
+    assert isinstance(bufferSize, int), 'Invalid buffer size %s' % bufferSize
+
+    prefix, chunk, current = 0, b'', None
+    try:
+        if isfile(path) and (size is None or size == stat(path).st_size):
+            current = open(path, 'rb')
+            while True:
+                chunk = source.read(bufferSize)
+                if not chunk:
+                    if not current.read(1): return False
+                    break
+                if current.read(len(chunk)) != chunk: break
+                prefix += len(chunk)
+
+        tmpPath = '%s.%s.tmp' % (path, uuid4().hex[:8])
+        try:
+            flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+            with FileIO(os.open(tmpPath, flags, 0o666), 'w') as dest:
+                if prefix:
+                    # The content up to the first difference is the same so we copy it from the current file.
+                    current.seek(0)
+                    while prefix > 0:
+                        data = current.read(min(prefix, bufferSize))
+                        dest.write(data)
+                        prefix -= len(data)
+                if chunk: dest.write(chunk)
+                copyfileobj(source, dest, bufferSize)
+            if current is not None:
+                current.close()
+                current = None
+            if os.name == 'nt' and exists(path): os.remove(path)
+            os.rename(tmpPath, path)
+        except:
+            if exists(tmpPath): os.remove(tmpPath)
+            raise
+    finally:
+        if current is not None: current.close()
+    return True
+
 class KeepOpen:
     '''
     Keeps opened a file object, basically blocks the close calls.
@@ -345,3 +425,79 @@ class KeepOpen:
 
     def __getattr__(self, name): return getattr(self._fileObj, name)
 
+
+class StreamRegion(IInputStream, IClosable):
+    '''
+    Provides the stream for a region of a seekable file object, the region is read directly from the file object and
+    can be also sent by the kernel (os.sendfile) since it is recognized by @see: fileRegion.
+    '''
+    __slots__ = ('_fileObj', '_offset', '_size', '_position')
+
+    def __init__(self, fileObj, offset, size):
+        '''
+        Construct the region stream, the file object is closed when the region is closed.
+
+        @param fileObj: file
+            A seekable file type object to provide the region for, if a region stream is provided the new region is
+            relative to it.
+        @param offset: integer
+            The offset in the file object where the region starts.
+        @param size: integer
+            The number of bytes in the region.
+        '''
+        assert isinstance(offset, int) and offset >= 0, 'Invalid offset %s' % offset
+        assert isinstance(size, int) and size >= 0, 'Invalid size %s' % size
+        if isinstance(fileObj, StreamRegion):
+            assert isinstance(fileObj, StreamRegion)
+            offset += fileObj._offset
+            size = max(min(size, fileObj._size - offset + fileObj._offset), 0)
+            fileObj = fileObj._fileObj
+        assert fileObj.seekable(), 'Invalid seekable file object %s' % fileObj
+
+        self._fileObj = fileObj
+        self._offset = offset
+        self._size = size
+        self._position = 0
+        fileObj.seek(offset)
+
+    def read(self, nbytes=None):
+        '''
+        @see: IInputStream.read
+        '''
+        remaining = self._size - self._position
+        if nbytes is None or nbytes < 0 or nbytes > remaining: nbytes = remaining
+        if nbytes == 0: return b''
+        data = self._fileObj.read(nbytes)
+        self._position += len(data)
+        return data
+
+    def seekable(self):
+        '''
+        The region stream can be positioned.
+        '''
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        '''
+        Positions the stream in the region, the position cannot exceed the region.
+        '''
+        if whence == os.SEEK_CUR: offset += self._position
+        elif whence == os.SEEK_END: offset += self._size
+        self._position = max(min(offset, self._size), 0)
+        self._fileObj.seek(self._offset + self._position)
+        return self._position
+
+    def tell(self):
+        '''
+        Provides the position in the region.
+        '''
+        return self._position
+
+    def close(self):
+        '''
+        @see: IClosable.close
+        '''
+        self._fileObj.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *args): self.close()
@@ -10,7 +10,8 @@ Provides the configurations for delivering files from the local file system.
 '''
 
 from ..ally_http.processor import contentLengthEncode, allowEncode, \
-    internalError, contentTypeResponseEncode
+    internalError, contentTypeResponseEncode, headerDecodeRequest, conditional, \
+    allow_compression, acceptEncodingDecode, contentEncodingEncode, partialContent
 from __setup__.ally_http.processor import headerEncodeResponse
 from ally.container import ioc
 from ally.core.cdm.processor.content_delivery import ContentDeliveryHandler
@@ -25,6 +26,19 @@ def repository_path():
     ''' The repository absolute or relative (to the distribution folder) path from where to serve the files '''
     return path.join('workspace', 'shared', 'cdm')
 
+@ioc.config
+def repository_check_interval():
+    '''
+    The number of seconds the repository links, deletion marks and zip archives are cached before being checked again for
+    changes, if 0 then the changes are checked on every request
+    '''
+    return 1.0
+
+@ioc.config
+def repository_zip_cache_size():
+    ''' The maximum number of zip archives kept opened for delivering the zip linked files '''
+    return 50
+
 # --------------------------------------------------------------------
 # Creating the processors used in handling the request
 
@@ -32,6 +46,8 @@ def repository_path():
 def contentDelivery() -> Handler:
     b = ContentDeliveryHandler()
     b.repositoryPath = repository_path()
+    b.checkInterval = repository_check_interval()
+    b.zipCacheSize = repository_zip_cache_size()
     return b
 
 # --------------------------------------------------------------------
@@ -47,6 +63,9 @@ def assemblyContent() -> Assembly:
 
 @ioc.before(assemblyContent)
 def updateAssemblyContent():
-    assemblyContent().add(internalError(), headerEncodeResponse(), contentDelivery(), allowEncode(), contentTypeResponseEncode(),
-                          contentLengthEncode())
+    assemblyContent().add(internalError(), headerDecodeRequest(), headerEncodeResponse(), contentDelivery(), conditional(),
+                          partialContent(), allowEncode(), contentTypeResponseEncode(), contentLengthEncode())
+    if allow_compression():
+        assemblyContent().add(acceptEncodingDecode(), before=contentDelivery())
+        assemblyContent().add(contentEncodingEncode(), before=conditional())
     
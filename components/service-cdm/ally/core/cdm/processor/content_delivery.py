@@ -10,21 +10,27 @@ Provides the content delivery handler.
 '''
 
 from ally.container.ioc import injected
-from ally.design.processor.attribute import requires, defines
+from ally.design.processor.attribute import requires, defines, optional
 from ally.design.processor.context import Context
 from ally.design.processor.handler import HandlerProcessorProceed
 from ally.http.spec.codes import METHOD_NOT_AVAILABLE, PATH_NOT_FOUND, \
     PATH_FOUND
+from ally.http.impl.processor.headers.content_encoding import ENCODING_GZIP
 from ally.http.spec.server import HTTP_GET
-from ally.support.util_io import IInputStream
+from ally.support.util_io import IInputStream, StreamRegion
 from ally.zip.util_zip import normOSPath, normZipPath
+from collections import OrderedDict
 from mimetypes import guess_type
-from os.path import isdir, isfile, join, dirname, normpath, sep
+from os.path import isdir, isfile, join, dirname, normpath, sep, split
+from stat import S_ISREG
+from struct import unpack
+from threading import Lock
 from urllib.parse import unquote
-from zipfile import ZipFile
+from zipfile import ZipFile, ZIP_STORED, structFileHeader, sizeFileHeader, stringFileHeader
 import json
 import logging
 import os
+import time
 
 # --------------------------------------------------------------------
 
@@ -40,6 +46,8 @@ class Request(Context):
     scheme = requires(str)
     uri = requires(str)
     method = requires(str)
+    # ---------------------------------------------------------------- Optional
+    accEncodings = optional(list)
 
 class Response(Context):
     '''
@@ -71,6 +79,18 @@ class ResponseContent(Context):
     @rtype: string
     The type for the streamed content.
     ''')
+    lastModified = defines(int, doc='''
+    @rtype: integer
+    The last modification time of the content, as a POSIX timestamp in seconds.
+    ''')
+    eTag = defines(str, doc='''
+    @rtype: string
+    The entity tag for the content, made of the last modification time and the size.
+    ''')
+    encoding = defines(str, doc='''
+    @rtype: string
+    The content encoding of the delivered file, set if a precompressed file is delivered.
+    ''')
 
 # --------------------------------------------------------------------
 
@@ -84,8 +104,19 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
     # The directory where the file repository is
     defaultContentType = 'application/octet-stream'
     # The default mime type to set on the content response if None could be guessed
+    servePrecompressed = True
+    # Flag indicating that the '.gz' sibling of a file, if present, is delivered to the requests accepting gzip
+    checkInterval = 1.0
+    # The number of seconds the cached links, deletion marks and zip archives are used before checking them again for
+    # changes on the file system, if 0 then they are checked on every request.
+    zipCacheSize = 50
+    # The maximum number of zip archives kept open for delivering the zip linked content.
     _linkExt = '.link'
     # Extension to mark the link files in the repository.
+    _gzipExt = '.gz'
+    # Extension of the precompressed files in the repository.
+    _deletedExt = '.deleted'
+    # Extension to mark the deleted paths in the repository.
     _zipHeader = 'ZIP'
     # Marker used in the link file to indicate that a link is inside a zip file.
     _fsHeader = 'FS'
@@ -94,6 +125,9 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
     def __init__(self):
         assert isinstance(self.repositoryPath, str), 'Invalid repository path value %s' % self.repositoryPath
         assert isinstance(self.defaultContentType, str), 'Invalid default content type %s' % self.defaultContentType
+        assert isinstance(self.servePrecompressed, bool), 'Invalid serve precompressed flag %s' % self.servePrecompressed
+        assert isinstance(self.checkInterval, (int, float)), 'Invalid check interval %s' % self.checkInterval
+        assert isinstance(self.zipCacheSize, int) and self.zipCacheSize > 0, 'Invalid zip cache size %s' % self.zipCacheSize
         self.repositoryPath = normpath(self.repositoryPath)
         if not os.path.exists(self.repositoryPath): os.makedirs(self.repositoryPath)
         assert isdir(self.repositoryPath) and os.access(self.repositoryPath, os.R_OK), \
@@ -101,6 +135,10 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
         super().__init__()
 
         self._linkTypes = {self._fsHeader:self._processLink, self._zipHeader:self._processZiplink}
+        self._directories = {}
+        self._links = {}
+        self._zips = OrderedDict()
+        self._zipsLock = Lock()
 
     def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
         '''
@@ -124,14 +162,20 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
             else:
                 # Initialize the read file handler with None value
                 # This will be set upon successful file open
-                rf = None
+                rf = encoding = None
                 if isfile(entryPath):
-                    rf, size = open(entryPath, 'rb'), os.path.getsize(entryPath)
+                    filePath = entryPath
+                    if self.servePrecompressed and Request.accEncodings in request and request.accEncodings \
+                    and ENCODING_GZIP in request.accEncodings and isfile(entryPath + self._gzipExt):
+                        filePath, encoding = entryPath + self._gzipExt, ENCODING_GZIP
+                    rf = open(filePath, 'rb')
+                    stat = os.fstat(rf.fileno())
+                    size, modified = stat.st_size, stat.st_mtime
                 else:
                     linkPath = entryPath
                     while len(linkPath) > len(self.repositoryPath):
-                        if isfile(linkPath + self._linkExt):
-                            with open(linkPath + self._linkExt) as f: links = json.load(f)
+                        links = self._getLinks(linkPath)
+                        if links is not None:
                             subPath = normOSPath(entryPath[len(linkPath):]).lstrip(sep)
                             for linkType, *data in links:
                                 if linkType in self._linkTypes:
@@ -139,7 +183,7 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
                                     if not self._isPathDeleted(join(linkPath, subPath)):
                                         entry = self._linkTypes[linkType](subPath, *data)
                                         if entry is not None:
-                                            rf, size = entry
+                                            rf, size, modified = entry
                                             break
                             break
                         subLinkPath = dirname(linkPath)
@@ -153,6 +197,9 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
                     response.code, response.status, response.isSuccess = PATH_FOUND
                     responseCnt.source = rf
                     responseCnt.length = size
+                    responseCnt.lastModified = int(modified)
+                    responseCnt.eTag = '"%x-%x"' % (responseCnt.lastModified, size)
+                    responseCnt.encoding = encoding
                     responseCnt.type, _encoding = guess_type(entryPath)
                     if not responseCnt.type: responseCnt.type = self.defaultContentType
                     responseCnt.type += '; charset=utf-8'
@@ -163,7 +210,7 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
     def _processLink(self, subPath, linkedFilePath):
         '''
         Reads a link description file and returns a file handler to
-        the linked file.
+        the linked file, the file size and the file modification time.
         '''
         # make sure the file path uses the OS separator
         linkedFilePath = normOSPath(linkedFilePath)
@@ -174,22 +221,34 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
         else:
             return None
         if isfile(resPath):
-            return open(resPath, 'rb'), os.path.getsize(resPath)
+            return open(resPath, 'rb'), os.path.getsize(resPath), os.path.getmtime(resPath)
 
     def _processZiplink(self, subPath, zipFilePath, inFilePath):
         '''
         Reads a link description file and returns a file handler to
-        the linked file inside the ZIP archive.
+        the linked file inside the ZIP archive, the file size and the ZIP archive modification time.
         '''
         # make sure the ZIP file path uses the OS separator
         zipFilePath = normOSPath(zipFilePath)
         # convert the internal ZIP path to OS format in order to use standard path functions
         inFilePath = normOSPath(inFilePath)
-        zipFile = ZipFile(zipFilePath)
         # resource internal ZIP path should be in ZIP format
-        resPath = normZipPath(join(inFilePath, subPath))
-        if resPath in zipFile.NameToInfo:
-            return zipFile.open(resPath, 'r'), zipFile.getinfo(resPath).file_size
+        return self._openZip(zipFilePath, normZipPath(join(inFilePath, subPath)))
+
+    def _openStored(self, zipFilePath, info):
+        '''
+        Opens the stream for a stored (not compressed nor encrypted) entry directly from the ZIP archive file, the stream
+        can be positioned and sent by the kernel.
+        '''
+        f = open(zipFilePath, 'rb')
+        f.seek(info.header_offset)
+        header = f.read(sizeFileHeader)
+        if len(header) != sizeFileHeader or header[:4] != stringFileHeader:
+            f.close()
+            return None
+        # The local header file name length and extra field length, the extra field can differ from the central one
+        header = unpack(structFileHeader, header)
+        return StreamRegion(f, info.header_offset + sizeFileHeader + header[10] + header[11], info.file_size)
 
     def _isPathDeleted(self, path):
         '''
@@ -198,8 +257,100 @@ class ContentDeliveryHandler(HandlerProcessorProceed):
         '''
         path = normpath(path)
         while len(path) > len(self.repositoryPath):
-            if isfile(path + '.deleted'): return True
-            subPath = dirname(path)
+            subPath, name = split(path)
+            if name + self._deletedExt in self._getMarks(subPath): return True
             if subPath == path: break
             path = subPath
         return False
+
+    def _getMarks(self, path):
+        '''
+        Provides the names of the link files and deletion marks that are in the directory, the names are cached for
+        as long as the directory is not modified.
+        '''
+        now, entry = time.time(), self._directories.get(path)
+        if entry is not None and now < entry[0]: return entry[2]
+
+        try: stat = os.stat(path)
+        except OSError:
+            self._directories.pop(path, None)
+            return ()
+        if entry is not None and entry[1] == stat.st_mtime: names = entry[2]
+        else:
+            names = frozenset(name for name in os.listdir(path)
+                              if name.endswith(self._linkExt) or name.endswith(self._deletedExt))
+        self._directories[path] = (now + self.checkInterval, stat.st_mtime, names)
+        return names
+
+    def _getLinks(self, path):
+        '''
+        Provides the links for the path if there is a link file for it, the links are cached for as long as the link
+        file is not modified.
+        '''
+        directory, name = split(path)
+        if name + self._linkExt not in self._getMarks(directory): return None
+
+        linkFile = path + self._linkExt
+        now, entry = time.time(), self._links.get(linkFile)
+        if entry is not None and now < entry[0]: return entry[2]
+
+        try: stat = os.stat(linkFile)
+        except OSError:
+            self._links.pop(linkFile, None)
+            return None
+        mark = (stat.st_mtime, stat.st_size)
+        if entry is not None and entry[1] == mark: links = entry[2]
+        else:
+            with open(linkFile) as f: links = json.load(f)
+        self._links[linkFile] = (now + self.checkInterval, mark, links)
+        return links
+
+    def _openZip(self, path, name):
+        '''
+        Opens the stream for the entry name inside the zip archive path, the recently used zip files are kept opened for
+        as long as the archive is not modified. The entry stream is opened while holding the zips lock since the zip
+        files that are evicted or replaced are closed by other requests.
+        '''
+        now = time.time()
+        with self._zipsLock:
+            entry = self._zips.get(path)
+            if entry is not None:
+                self._zips.move_to_end(path)
+                if now < entry[0]: return self._openEntry(path, entry[2], name, entry[1][0])
+
+        try: stat = os.stat(path)
+        except OSError: stat = None
+        if stat is not None and not S_ISREG(stat.st_mode): stat = None
+        mark = None if stat is None else (stat.st_mtime, stat.st_size)
+        if entry is not None and entry[1] == mark:
+            with self._zipsLock:
+                if self._zips.get(path) is entry:  # The zip file has not been closed in the meantime
+                    entry[0] = now + self.checkInterval
+                    return self._openEntry(path, entry[2], name, mark[0])
+
+        zipFile = None if stat is None else ZipFile(path)
+        closed = []
+        try:
+            with self._zipsLock:
+                current = self._zips.pop(path, None)
+                if current is not None: closed.append(current[2])
+                if zipFile is None: return None
+                self._zips[path] = [now + self.checkInterval, mark, zipFile]
+                while len(self._zips) > self.zipCacheSize: closed.append(self._zips.popitem(last=False)[1][2])
+                return self._openEntry(path, zipFile, name, mark[0])
+        finally:
+            # The opened entries streams are not affected by the closing of the zip file
+            for closedZip in closed: closedZip.close()
+
+    def _openEntry(self, path, zipFile, name, modified):
+        '''
+        Opens the stream for the entry name of the opened zip file, returns the stream, the entry size and the provided
+        modification time.
+        '''
+        assert isinstance(zipFile, ZipFile), 'Invalid zip file %s' % zipFile
+        info = zipFile.NameToInfo.get(name)
+        if info is None: return None
+        if info.compress_type == ZIP_STORED and not info.flag_bits & 0x1:
+            stream = self._openStored(path, info)
+            if stream is not None: return stream, info.file_size, modified
+        return zipFile.open(info, 'r'), info.file_size, modified
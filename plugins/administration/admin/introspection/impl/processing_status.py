@@ -0,0 +1,75 @@
+'''
+Created on Mar 20, 2013
+
+@package: introspection request
+@copyright: 2011 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides a Node on the resource manager with an invoker that presents the processors instrumentation statistics.
+'''
+
+from ally.api.config import GET, DELETE
+from ally.api.type import Input, Integer, typeFor, Boolean, Non
+from ally.container import wire
+from ally.container.ioc import injected
+from ally.core.impl.invoker import InvokerFunction
+from ally.core.impl.node import NodePath
+from ally.core.spec.resources import Node
+from ally.design.processor import instrument
+from collections import OrderedDict
+
+# --------------------------------------------------------------------
+
+@injected
+class ProcessingStatusPresenter:
+    '''
+    Class providing the processors instrumentation statistics presentation, the statistics are available only if the
+    instrumentation is enabled by the "server_instrumentation" configuration. Attention the time of a branching processor
+    includes also the time of the processors executed in the branch.
+    '''
+
+    resourcesRoot = Node; wire.entity('resourcesRoot')
+    # The resources root node structure.
+
+    def __init__(self):
+        assert isinstance(self.resourcesRoot, Node), 'Invalid root node %s' % self.resourcesRoot
+        node = NodePath(self.resourcesRoot, True, 'ProcessingStatus')
+        node.get = InvokerFunction(GET, self.present, typeFor(Non),
+                                   [
+                                    Input('limit', typeFor(Integer), True, None),
+                                    ], {})
+        node.delete = InvokerFunction(DELETE, self.reset, typeFor(Boolean), [], {})
+
+    def present(self, limit):
+        '''
+        Provides the dictionary structure presenting the processors statistics, sorted by the total time.
+
+        @return: dictionary
+            The dictionary containing the processing status.
+        '''
+        statistics = sorted(instrument.statistics(), key=lambda statistic: statistic.total, reverse=True)
+        if limit: statistics = statistics[:limit]
+
+        processors = OrderedDict()
+        for statistic in statistics:
+            assert isinstance(statistic, instrument.Statistic), 'Invalid statistic %s' % statistic
+            processors[statistic.processor] = {
+                                               'Count': str(statistic.count),
+                                               'Proceeded': str(statistic.proceeded),
+                                               'Stopped': str(statistic.stopped),
+                                               'Total': '%.6f' % statistic.total,
+                                               'Average': '%.6f' % (statistic.total / statistic.count if statistic.count else 0),
+                                               'Maximum': '%.6f' % statistic.maximum,
+                                               }
+        return {'Processing': {'Instrumented': str(instrument.isEnabled()), 'Processor': processors}}
+
+    def reset(self):
+        '''
+        Resets the processors statistics.
+
+        @return: boolean
+            True if the statistics have been reset.
+        '''
+        instrument.reset()
+        return True
@@ -54,7 +54,7 @@ class IActionManagerService:
         Register an action here
         '''
 
-    @call
+    @call(cache=True)
     def getAll(self, path:str=None, origPath:str=None) -> Iter(Action):
         '''
         Get all actions registered
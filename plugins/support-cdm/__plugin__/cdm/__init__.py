@@ -39,6 +39,15 @@ def use_linked_cdm():
     ''' Set to true when the files should not be copied into cdm'''
     return True
 
+@ioc.config
+def repository_blobs_path():
+    '''
+    The blobs absolute or relative (to the distribution folder) path, if provided the CDM stores the published content
+    once by digest in this directory and hard links it into the repository, the directory should be on the same file
+    system as the repository. If None the content is written directly in the repository.
+    '''
+    return None
+
 # --------------------------------------------------------------------
 # Creating the content delivery managers
 
@@ -53,5 +62,6 @@ def delivery() -> IDelivery:
 def contentDeliveryManager() -> ICDM:
     cdm = LocalFileSystemLinkCDM() if use_linked_cdm() else LocalFileSystemCDM()
     cdm.delivery = delivery()
+    cdm.blobsPath = repository_blobs_path()
     return cdm
 
@@ -0,0 +1,33 @@
+'''
+Created on Mar 12, 2013
+
+@package: support sqlalchemy
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the asyncore web server plugins patch for the database connection pools.
+'''
+
+import logging
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+try: from __setup__ import ally_http_asyncore_server
+except ImportError: log.info('No asyncore server available thus skip the multiple processes database pools')
+else:
+    ally_http_asyncore_server = ally_http_asyncore_server  # Just to avoid the import warning
+    # ----------------------------------------------------------------
+
+    from __setup__.ally_http import server_type
+    from __setup__.ally_http_asyncore_server.server import server_workers, SERVER_ASYNCORE
+    from sql_alchemy.multiprocess_config import enableMultiProcessPool
+
+    # ----------------------------------------------------------------
+
+    # The asyncore server workers are forked processes so each one of them needs to have its own connections pool.
+    if server_type() == SERVER_ASYNCORE and server_workers() != 1: enableMultiProcessPool()